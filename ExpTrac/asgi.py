@@ -14,3 +14,9 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ExpTrac.settings')
 
 application = get_asgi_application()
+
+# Closes expired blocks / finalizes overdue goals in the background
+# (one active runner across processes; see EXPIRY_RUNNER_INTERVAL)
+from main.expiry import start_expiry_runner  # noqa: E402
+
+start_expiry_runner()
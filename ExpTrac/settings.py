@@ -148,6 +148,53 @@ DATABASES = {
 }
 
 
+# ============================
+# CACHE CONFIGURATION
+# ============================
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "exptrac-default",
+    },
+    # Login rate limit counters (see LOGIN_RATE_LIMIT_CACHE below). For more
+    # than one worker process point this at a shared server, e.g.
+    #   "BACKEND": "django.core.cache.backends.redis.RedisCache",
+    #   "LOCATION": "redis://127.0.0.1:6379/1",
+    # (needs the redis package) or PyMemcacheCache with "127.0.0.1:11211".
+    "rate_limit": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "exptrac-rate-limit",
+    },
+}
+
+DASHBOARD_CACHE_TIMEOUT = 60 * 15  # Per-user dashboard snapshot lifetime (seconds)
+# Expired blocks / overdue goals are closed by the in-process expiry runner
+# (main/expiry.py). Each worker process starts its thread, but a PostgreSQL
+# advisory lock lets only one of them run close_expired. Set 0 to disable it
+# when scheduling `manage.py close_expired` from cron instead.
+EXPIRY_RUNNER_INTERVAL = 60 * 10  # In-process close_expired run interval (seconds); 0 disables it
+
+# Login rate limiting. The failure counters live only in the
+# LOGIN_RATE_LIMIT_CACHE cache. With the default LocMemCache each worker
+# process keeps its own counters (N workers allow N times the attempts) and a
+# restart clears every lockout; configure a shared Redis / Memcached backend
+# for the "rate_limit" alias above when running more than one process.
+LOGIN_RATE_LIMIT_CACHE = "rate_limit"
+LOGIN_RATE_LIMIT_WINDOW = 60 * 60  # Sliding window for failed attempts (seconds)
+LOGIN_MAX_FAILURES_PER_EMAIL = 5
+LOGIN_MAX_FAILURES_PER_IP = 20
+LOGIN_AUDIT_SAMPLE_RATE = 0.1  # Share of failed attempts written to LoginAttempt
+LOGIN_ATTEMPT_RETENTION_DAYS = 90  # prune_login_attempts keeps this many days of attempts
+
+# Database backups run as background jobs (see main/backup_jobs.py)
+BACKUP_COMPRESSION = "gzip"  # "gzip", "zstd" (needs the zstandard package; pg_dump 16+ for directory backups) or "none"
+BACKUP_WORKERS = 1  # Concurrent pg_dump jobs per process
+BACKUP_PARALLEL_JOBS = None  # pg_dump/pg_restore -j for directory backups; None uses every CPU
+BACKUP_JOB_HEARTBEAT_INTERVAL = 30  # Seconds between heartbeats of the jobs a process holds
+BACKUP_JOB_TIMEOUT = 5 * 60  # Unfinished jobs without a heartbeat for this long (seconds) are marked failed: their process is gone
+
+
 # ============================
 # PASSWORD VALIDATION
 # ============================
@@ -192,6 +239,9 @@ STATIC_ROOT = BASE_DIR / "staticfiles"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+PROFILE_AVATAR_SIZE = 128  # Square avatar variants (px), served instead of the original upload
+PROFILE_IMAGE_WORKERS = 2  # Background threads generating avatar variants
+
 
 # ============================
 # DEFAULT PRIMARY KEY FIELD
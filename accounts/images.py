@@ -0,0 +1,178 @@
+import hashlib
+import io
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps, features
+
+from .models import UserProfile
+
+
+logger = logging.getLogger(__name__)
+
+VARIANT_DIR = os.path.join('Users', 'ProfileImages', 'Variants')
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+# ============================================
+# Variant rendering (pure Pillow, no database)
+# ============================================
+def _square(image, size):
+    """EXIF-rotated, centre-cropped `size` x `size` copy of `image`"""
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info or image.mode in ('LA', 'PA') else 'RGB')
+    return ImageOps.fit(image, (size, size), method=Image.LANCZOS)
+
+
+def render_variants(data, size=None):
+    """
+    Render the avatar variants of the image bytes `data`.
+    Returns {field name: (extension, encoded bytes)}; the WebP variant is
+    skipped when Pillow was built without a WebP encoder.
+    """
+    size = size or _setting('PROFILE_AVATAR_SIZE', 128)
+
+    with Image.open(io.BytesIO(data)) as source:
+        # JPEGs are decoded straight at a reduced scale (still >= size)
+        source.draft('RGB', (size, size))
+        image = _square(source, size)
+
+    variants = {}
+
+    # Thumbnail: PNG keeps transparency, everything else becomes a JPEG
+    buffer = io.BytesIO()
+    if image.mode == 'RGBA':
+        image.save(buffer, 'PNG', optimize=True)
+        variants['profile_thumbnail'] = ('png', buffer.getvalue())
+    else:
+        image.save(buffer, 'JPEG', quality=85, optimize=True, progressive=True)
+        variants['profile_thumbnail'] = ('jpg', buffer.getvalue())
+
+    if features.check('webp'):
+        buffer = io.BytesIO()
+        image.save(buffer, 'WEBP', quality=80, method=4)
+        variants['profile_webp'] = ('webp', buffer.getvalue())
+
+    return variants
+
+
+def variant_name(digest, size, extension):
+    """Content-hashed storage name, so an unchanged image maps to the same file"""
+    return os.path.join(VARIANT_DIR, f'{digest[:32]}_{size}.{extension}')
+
+
+# ============================================
+# Processing a profile
+# ============================================
+def process_profile_image(profile_id, source_name=None):
+    """
+    Generate and store the avatar variants for a profile's current image.
+    `source_name` is the image the job was scheduled for: when the profile
+    has moved on to another image (or none) the result is discarded.
+    Returns True when the profile was updated.
+    """
+    profile = UserProfile.objects.filter(pk=profile_id).first()
+    if profile is None or not profile.profile_image:
+        return False
+    if source_name is None:
+        source_name = profile.profile_image.name
+    if profile.profile_image.name != source_name:
+        return False
+
+    with default_storage.open(source_name, 'rb') as source:
+        data = source.read()
+
+    size = _setting('PROFILE_AVATAR_SIZE', 128)
+    digest = hashlib.sha256(data).hexdigest()
+    names = {}
+    for field, (extension, content) in render_variants(data, size).items():
+        name = variant_name(digest, size, extension)
+        if not default_storage.exists(name):
+            name = default_storage.save(name, ContentFile(content))
+        names[field] = name
+    names.setdefault('profile_webp', None)
+
+    # Only attach the variants if the image was not replaced meanwhile
+    with transaction.atomic():
+        updated = UserProfile.objects.filter(
+            pk=profile_id, profile_image=source_name
+        ).update(**names)
+
+    if updated:
+        _delete_unreferenced(
+            [profile.profile_thumbnail.name, profile.profile_webp.name], keep=names.values()
+        )
+    else:
+        _delete_unreferenced(names.values())
+    return bool(updated)
+
+
+def clear_profile_variants(profile):
+    """
+    Detach the variants of a profile whose image is removed or replaced. Call
+    it inside the transaction that saves the profile: the files are deleted
+    on commit, once nothing references them.
+    """
+    old_names = [profile.profile_thumbnail.name, profile.profile_webp.name]
+    profile.profile_thumbnail = None
+    profile.profile_webp = None
+    transaction.on_commit(lambda: _delete_unreferenced(old_names))
+
+
+def _delete_unreferenced(names, keep=()):
+    """Delete variant files no profile points to any more (identical uploads share files)"""
+    keep = set(keep)
+    for name in set(filter(None, names)) - keep:
+        referenced = UserProfile.objects.filter(profile_thumbnail=name) | UserProfile.objects.filter(profile_webp=name)
+        if not referenced.exists():
+            default_storage.delete(name)
+
+
+# ============================================
+# Background pool
+# ============================================
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=_setting('PROFILE_IMAGE_WORKERS', 2),
+                    thread_name_prefix='profile-image'
+                )
+    return _executor
+
+
+def _run_job(profile_id, source_name):
+    try:
+        process_profile_image(profile_id, source_name)
+    except Exception:
+        logger.exception('Failed to process profile image %s of profile %s', source_name, profile_id)
+    finally:
+        close_old_connections()
+
+
+def schedule_profile_variants(profile):
+    """
+    Queue variant generation for the profile's current image once the
+    surrounding transaction commits, keeping Pillow off the request path.
+    Until it finishes, avatar_url falls back to the original image.
+    """
+    if not profile.profile_image:
+        return
+    profile_id, source_name = profile.pk, profile.profile_image.name
+    transaction.on_commit(lambda: _get_executor().submit(_run_job, profile_id, source_name))
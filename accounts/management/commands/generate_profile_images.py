@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from accounts.images import process_profile_image
+from accounts.models import UserProfile
+
+
+class Command(BaseCommand):
+    help = 'Generate the avatar thumbnail and WebP variants of profile images'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Regenerate variants that already exist too')
+
+    def handle(self, *args, **options):
+        profiles = UserProfile.objects.exclude(profile_image='').exclude(profile_image__isnull=True)
+        if not options['all']:
+            profiles = profiles.filter(Q(profile_thumbnail='') | Q(profile_thumbnail__isnull=True))
+
+        processed = failed = 0
+        for profile_id, name in profiles.values_list('id', 'profile_image').iterator():
+            try:
+                if process_profile_image(profile_id, name):
+                    processed += 1
+            except Exception as e:
+                failed += 1
+                self.stdout.write(self.style.WARNING(f'Profile {profile_id} ({name}): {e}'))
+
+        self.stdout.write(self.style.SUCCESS(f'Generated variants for {processed} profile image(s)'))
+        if failed:
+            self.stdout.write(self.style.ERROR(f'{failed} profile image(s) could not be processed'))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from accounts.retention import convert_to_partitioned, ensure_partitions, is_partitioned
+
+
+class Command(BaseCommand):
+    help = 'Range-partition LoginAttempt by month on attempt_time (PostgreSQL) and create upcoming partitions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months-ahead', type=int, default=3, help='Monthly partitions to create ahead of today')
+        parser.add_argument('--convert', action='store_true', help='Convert the existing table (one-time, locks it while copying)')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            self.stdout.write(self.style.ERROR('Partitioning requires PostgreSQL'))
+            return
+
+        if not is_partitioned():
+            if not options['convert']:
+                self.stdout.write(self.style.WARNING('LoginAttempt is not partitioned; run again with --convert'))
+                return
+            convert_to_partitioned(months_ahead=options['months_ahead'])
+            self.stdout.write(self.style.SUCCESS('Converted LoginAttempt to monthly range partitions'))
+            return
+
+        created = ensure_partitions(months_ahead=options['months_ahead'])
+        self.stdout.write(self.style.SUCCESS(f'Created {len(created)} partition(s)'))
@@ -0,0 +1,45 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from accounts.models import LoginAttempt
+from accounts.retention import PRUNE_BATCH_SIZE, drop_expired_partitions, is_partitioned, prune_in_batches
+
+
+class Command(BaseCommand):
+    help = 'Delete login attempts older than the retention period (drops whole partitions when partitioned)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None, help='Retention in days (default: LOGIN_ATTEMPT_RETENTION_DAYS)')
+        parser.add_argument('--batch-size', type=int, default=PRUNE_BATCH_SIZE, help='Rows deleted per transaction')
+        parser.add_argument('--pause', type=float, default=0, help='Seconds to sleep between batches')
+        parser.add_argument('--dry-run', action='store_true', help='Only count what would be deleted')
+
+    def handle(self, *args, **options):
+        days = options['days']
+        if days is None:
+            days = getattr(settings, 'LOGIN_ATTEMPT_RETENTION_DAYS', 90)
+        if days < 1:
+            self.stdout.write(self.style.ERROR('Retention must be at least 1 day'))
+            return
+
+        cutoff = timezone.now() - timedelta(days=days)
+
+        if options['dry_run']:
+            count = LoginAttempt.objects.filter(attempt_time__lt=cutoff).count()
+            self.stdout.write(self.style.WARNING(f'{count} login attempt(s) older than {days} day(s) would be deleted'))
+            return
+
+        if is_partitioned():
+            dropped = drop_expired_partitions(cutoff)
+            for name in dropped:
+                self.stdout.write(f'Dropped partition {name}')
+
+        # Rows in the partition straddling the cutoff (or an unpartitioned table)
+        deleted = prune_in_batches(cutoff, batch_size=options['batch_size'], pause=options['pause'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {deleted} login attempt(s) older than {days} day(s)'
+        ))
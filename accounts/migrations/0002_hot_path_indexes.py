@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:54
+
+from django.db import migrations, models
+
+from ExpTrac.migration_operations import AddIndexConcurrentlyIfPostgres
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction; building the
+    # indexes this way does not block writes on existing tables (on
+    # PostgreSQL; other databases, e.g. SQLite for tests, get plain indexes)
+    atomic = False
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        AddIndexConcurrentlyIfPostgres(
+            model_name='loginattempt',
+            index=models.Index(fields=['email', 'was_successful', 'attempt_time'], name='login_email_success_time_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:58
+
+from django.db import migrations, models
+
+from ExpTrac.migration_operations import AddIndexConcurrentlyIfPostgres
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY (on PostgreSQL) cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('accounts', '0002_hot_path_indexes'),
+    ]
+
+    operations = [
+        AddIndexConcurrentlyIfPostgres(
+            model_name='loginattempt',
+            index=models.Index(fields=['attempt_time'], name='login_attempt_time_idx'),
+        ),
+    ]
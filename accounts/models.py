@@ -10,12 +10,23 @@ def user_profile_path(instance, filename):
 class UserProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
     profile_image = models.ImageField(upload_to=user_profile_path, blank=True, null=True)
+    # Avatar-sized variants generated in the background (see accounts/images.py)
+    profile_thumbnail = models.ImageField(blank=True, null=True, editable=False)
+    profile_webp = models.ImageField(blank=True, null=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.user.email}'s Profile"
 
+    @property
+    def avatar_url(self):
+        """Smallest available avatar: WebP, then the thumbnail, then the original"""
+        for image in (self.profile_webp, self.profile_thumbnail, self.profile_image):
+            if image:
+                return image.url
+        return ''
+
 class LoginAttempt(models.Model):
     email = models.EmailField()
     ip_address = models.GenericIPAddressField()
@@ -24,6 +35,12 @@ class LoginAttempt(models.Model):
 
     class Meta:
         ordering = ['-attempt_time']
+        indexes = [
+            # Rate limit checks: recent failures for an email
+            models.Index(fields=['email', 'was_successful', 'attempt_time'], name='login_email_success_time_idx'),
+            # Retention pruning
+            models.Index(fields=['attempt_time'], name='login_attempt_time_idx'),
+        ]
 
     def __str__(self):
         return f"{self.email} - {'Success' if self.was_successful else 'Failed'} - {self.attempt_time}"
\ No newline at end of file
@@ -0,0 +1,186 @@
+import hashlib
+import logging
+import queue
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import close_old_connections
+
+from .models import LoginAttempt
+
+
+logger = logging.getLogger(__name__)
+
+AUDIT_BATCH_SIZE = 100
+AUDIT_QUEUE_SIZE = 10000
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _cache():
+    """
+    Cache holding the counters. It must be shared by all worker processes
+    (Redis / Memcached) for the limits to hold; a per-process LocMemCache
+    multiplies them by the number of workers and forgets them on restart.
+    """
+    return caches[_setting('LOGIN_RATE_LIMIT_CACHE', 'default')]
+
+
+# ============================================
+# Lockout policy
+# ============================================
+def get_lockout_duration(failed_attempts):
+    """Calculate lockout duration based on failed attempts"""
+    if failed_attempts < 5:
+        return 0
+
+    lockout_multiplier = (failed_attempts - 1) // 5
+    return lockout_multiplier * 5
+
+
+# ============================================
+# Sliding window counters (cache only)
+# ============================================
+def _key(scope, identifier, suffix):
+    digest = hashlib.sha1(str(identifier).encode()).hexdigest()[:20]
+    return f'login-fail:{scope}:{digest}:{suffix}'
+
+
+def _window_keys(scope, identifier, now):
+    window = _setting('LOGIN_RATE_LIMIT_WINDOW', 60 * 60)
+    bucket = int(now // window)
+    return (
+        _key(scope, identifier, bucket),
+        _key(scope, identifier, bucket - 1),
+        _key(scope, identifier, 'last'),
+    )
+
+
+def _estimate(values, keys, now):
+    """
+    Sliding window estimate: the current bucket plus the part of the previous
+    bucket that still overlaps the window. Returns (failures, last_failure_ts).
+    """
+    window = _setting('LOGIN_RATE_LIMIT_WINDOW', 60 * 60)
+    current_key, previous_key, last_key = keys
+    overlap = 1 - (now % window) / window
+    failures = values.get(current_key, 0) + int(values.get(previous_key, 0) * overlap)
+    return failures, values.get(last_key)
+
+
+def _locked_for(failures, last_failure, threshold, now):
+    """Seconds left of the lockout, scaling failures to the 5-attempt policy"""
+    if last_failure is None or failures < threshold:
+        return 0
+    lockout_minutes = get_lockout_duration(failures * 5 // threshold)
+    return max(0, last_failure + lockout_minutes * 60 - now)
+
+
+def check_rate_limit(email, ip_address):
+    """
+    Check if user is rate limited, per email and per IP.
+    One cache round trip and no database queries.
+    Returns (allowed, message, failed_attempts for the email).
+    """
+    now = time.time()
+    email_keys = _window_keys('email', email.lower(), now)
+    ip_keys = _window_keys('ip', ip_address, now)
+    values = _cache().get_many(email_keys + ip_keys)
+
+    email_failures, email_last = _estimate(values, email_keys, now)
+    ip_failures, ip_last = _estimate(values, ip_keys, now)
+
+    remaining = max(
+        _locked_for(email_failures, email_last, _setting('LOGIN_MAX_FAILURES_PER_EMAIL', 5), now),
+        _locked_for(ip_failures, ip_last, _setting('LOGIN_MAX_FAILURES_PER_IP', 20), now),
+    )
+    if remaining > 0:
+        remaining_minutes = int(remaining // 60) + 1
+        return False, f"Too many failed attempts. Please try again in {remaining_minutes} minute(s)", email_failures
+
+    return True, "", email_failures
+
+
+def record_login_attempt(email, ip_address, was_successful):
+    """
+    Record a login attempt in the cache counters; a sample of attempts is
+    also written to LoginAttempt in the background for auditing.
+    """
+    email = email.lower()
+    now = time.time()
+    email_keys = _window_keys('email', email, now)
+    cache = _cache()
+
+    if was_successful:
+        # A successful login clears the email's failures (not the IP's)
+        cache.delete_many(email_keys)
+    else:
+        window = _setting('LOGIN_RATE_LIMIT_WINDOW', 60 * 60)
+        ip_keys = _window_keys('ip', ip_address, now)
+        for current_key, _, last_key in (email_keys, ip_keys):
+            # Buckets must outlive the window they are still counted in
+            cache.add(current_key, 0, window * 2)
+            try:
+                cache.incr(current_key)
+            except ValueError:
+                cache.set(current_key, 1, window * 2)
+            cache.set(last_key, now, window * 2)
+
+    audit_login_attempt(email, ip_address, was_successful)
+
+
+# ============================================
+# Sampled, asynchronous audit trail
+# ============================================
+_audit_queue = queue.Queue(maxsize=AUDIT_QUEUE_SIZE)
+_audit_writer = None
+_audit_lock = threading.Lock()
+
+
+def audit_login_attempt(email, ip_address, was_successful):
+    """
+    Queue a LoginAttempt row for the background writer. Successes are always
+    kept; failures are sampled at LOGIN_AUDIT_SAMPLE_RATE. Rows are dropped
+    (never blocking the login) when the queue is full.
+    """
+    if not was_successful and random.random() >= _setting('LOGIN_AUDIT_SAMPLE_RATE', 0.1):
+        return
+
+    _start_audit_writer()
+    try:
+        _audit_queue.put_nowait(
+            LoginAttempt(email=email, ip_address=ip_address, was_successful=was_successful)
+        )
+    except queue.Full:
+        logger.warning('Login audit queue full; dropping attempt for %s', email)
+
+
+def _start_audit_writer():
+    global _audit_writer
+    if _audit_writer is not None:
+        return
+    with _audit_lock:
+        if _audit_writer is None:
+            _audit_writer = threading.Thread(target=_write_audit_rows, name='login-audit', daemon=True)
+            _audit_writer.start()
+
+
+def _write_audit_rows():
+    while True:
+        batch = [_audit_queue.get()]
+        while len(batch) < AUDIT_BATCH_SIZE:
+            try:
+                batch.append(_audit_queue.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            LoginAttempt.objects.bulk_create(batch)
+        except Exception:
+            logger.exception('Failed to write %s login audit row(s)', len(batch))
+        finally:
+            close_old_connections()
@@ -0,0 +1,196 @@
+import re
+import time
+from datetime import date
+
+from django.db import connection, transaction
+
+from .models import LoginAttempt
+
+
+PRUNE_BATCH_SIZE = 5000
+PARTITION_NAME = re.compile(r'_p(\d{4})(\d{2})$')
+
+
+def table_name():
+    return LoginAttempt._meta.db_table
+
+
+# ============================================
+# Batched deletes
+# ============================================
+def prune_in_batches(cutoff, batch_size=PRUNE_BATCH_SIZE, pause=0):
+    """
+    Delete attempts older than `cutoff` in short transactions of at most
+    `batch_size` rows, so the table is never locked for long and concurrent
+    logins keep writing. Returns the number of rows deleted.
+    """
+    deleted = 0
+    while True:
+        with transaction.atomic():
+            ids = list(
+                LoginAttempt.objects.filter(attempt_time__lt=cutoff)
+                .order_by().values_list('id', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            deleted += LoginAttempt.objects.filter(id__in=ids).delete()[0]
+        if pause:
+            time.sleep(pause)
+    return deleted
+
+
+# ============================================
+# PostgreSQL range partitions (monthly, by attempt_time)
+# ============================================
+def _month_start(year, month):
+    while month > 12:
+        year, month = year + 1, month - 12
+    return date(year, month, 1)
+
+
+def partition_name(month):
+    return f'{table_name()}_p{month:%Y%m}'
+
+
+def is_partitioned():
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+            "WHERE c.relname = %s AND pg_table_is_visible(c.oid)",
+            [table_name()]
+        )
+        return cursor.fetchone() is not None
+
+
+def list_partitions():
+    """{first day of month: partition table name} for the monthly partitions"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = %s AND pg_table_is_visible(p.oid)",
+            [table_name()]
+        )
+        names = [row[0] for row in cursor.fetchall()]
+
+    partitions = {}
+    for name in names:
+        match = PARTITION_NAME.search(name)
+        if match:
+            partitions[date(int(match.group(1)), int(match.group(2)), 1)] = name
+    return partitions
+
+
+def ensure_partitions(months_ahead=3, today=None):
+    """
+    Create the monthly partitions from this month up to `months_ahead`.
+    Run it ahead of time (e.g. daily): a month whose rows already went to the
+    DEFAULT partition can no longer be split off.
+    """
+    today = today or date.today()
+    existing = list_partitions()
+    created = []
+    qn = connection.ops.quote_name
+
+    with connection.cursor() as cursor:
+        for offset in range(months_ahead + 1):
+            month = _month_start(today.year, today.month + offset)
+            if month in existing:
+                continue
+            upper = _month_start(month.year, month.month + 1)
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {qn(partition_name(month))} PARTITION OF {qn(table_name())} "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"
+            )
+            created.append(partition_name(month))
+    return created
+
+
+def drop_expired_partitions(cutoff):
+    """
+    Drop every monthly partition that ends on or before `cutoff`: old
+    attempts are removed in O(1) without scanning or deleting rows.
+    Returns the dropped partition names.
+    """
+    qn = connection.ops.quote_name
+    dropped = []
+    with connection.cursor() as cursor:
+        for month, name in sorted(list_partitions().items()):
+            upper = _month_start(month.year, month.month + 1)
+            if upper <= cutoff.date():
+                cursor.execute(f"DROP TABLE {qn(name)}")
+                dropped.append(name)
+    return dropped
+
+
+def convert_to_partitioned(months_ahead=3):
+    """
+    One-time conversion of the LoginAttempt table into a table range
+    partitioned by month on attempt_time: existing rows are copied into
+    monthly partitions, indexes are recreated under their original names and
+    a DEFAULT partition catches rows outside the created ranges. The primary
+    key becomes (id, attempt_time) because PostgreSQL requires the partition
+    key in unique constraints. Runs in one transaction under an exclusive lock.
+    """
+    table = table_name()
+    old_table = f'{table}_unpartitioned'
+    qn = connection.ops.quote_name
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"LOCK TABLE {qn(table)} IN ACCESS EXCLUSIVE MODE")
+
+        cursor.execute(
+            "SELECT indexname, indexdef FROM pg_indexes WHERE tablename = %s AND schemaname = current_schema()",
+            [table]
+        )
+        indexes = cursor.fetchall()
+        cursor.execute(
+            "SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'p'",
+            [table]
+        )
+        primary_key = cursor.fetchone()[0]
+        cursor.execute(f"SELECT MIN(attempt_time)::date FROM {qn(table)}")
+        first_day = cursor.fetchone()[0] or date.today()
+        cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [table])
+        old_sequence = cursor.fetchone()[0]
+
+        # Free the table and index names for the new table
+        cursor.execute(f"ALTER TABLE {qn(table)} RENAME TO {qn(old_table)}")
+        for name, _ in indexes:
+            if name != primary_key:
+                cursor.execute(f"ALTER INDEX {qn(name)} RENAME TO {qn((name + '_old')[:63])}")
+        cursor.execute(
+            f"ALTER TABLE {qn(old_table)} RENAME CONSTRAINT {qn(primary_key)} TO {qn((primary_key + '_old')[:63])}"
+        )
+
+        cursor.execute(
+            f"CREATE TABLE {qn(table)} (LIKE {qn(old_table)} INCLUDING DEFAULTS INCLUDING IDENTITY) "
+            f"PARTITION BY RANGE (attempt_time)"
+        )
+        cursor.execute(f"ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(primary_key)} PRIMARY KEY (id, attempt_time)")
+        for name, definition in indexes:
+            if name != primary_key:
+                cursor.execute(definition)
+
+        # Monthly partitions covering the existing rows, plus a catch-all
+        today = date.today()
+        months = (today.year - first_day.year) * 12 + today.month - first_day.month
+        ensure_partitions(months_ahead=months + months_ahead, today=first_day)
+        cursor.execute(f"CREATE TABLE {qn(table + '_default')} PARTITION OF {qn(table)} DEFAULT")
+
+        cursor.execute(f"INSERT INTO {qn(table)} SELECT * FROM {qn(old_table)}")
+
+        # Identity columns get a new sequence; serial ids keep the old one
+        cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [table])
+        sequence = cursor.fetchone()[0]
+        if sequence is None:
+            cursor.execute(f"ALTER SEQUENCE {old_sequence} OWNED BY {qn(table)}.id")
+            sequence = old_sequence
+        cursor.execute(
+            f"SELECT setval(%s, COALESCE((SELECT MAX(id) FROM {qn(table)}), 0) + 1, false)",
+            [sequence]
+        )
+        cursor.execute(f"DROP TABLE {qn(old_table)}")
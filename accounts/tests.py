@@ -1,3 +1,109 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+
+from .rate_limit import _window_keys, check_rate_limit, record_login_attempt
+
+
+AJAX = {'HTTP_X_REQUESTED_WITH': 'XMLHttpRequest'}
+# Middle of an hour bucket, so the window never rolls over during a test
+NOW = 1_800_000_000 + 1800
+
+
+# ============================================
+# Login rate limiting
+# ============================================
+@override_settings(
+    LOGIN_RATE_LIMIT_CACHE='rate_limit',
+    LOGIN_RATE_LIMIT_WINDOW=3600,
+    LOGIN_MAX_FAILURES_PER_EMAIL=5,
+    LOGIN_MAX_FAILURES_PER_IP=20,
+)
+class LoginRateLimitTests(TestCase):
+    def setUp(self):
+        caches['rate_limit'].clear()
+        caches['default'].clear()
+        self.now = NOW
+        clock = mock.patch('accounts.rate_limit.time')
+        self.addCleanup(clock.stop)
+        clock.start().time.side_effect = lambda: self.now
+
+        # Audit rows are written by a background thread; keep them out of the test DB
+        audit = mock.patch('accounts.rate_limit.audit_login_attempt')
+        self.addCleanup(audit.stop)
+        audit.start()
+
+    def record_failures(self, times, email='user@example.com', ip='10.0.0.1'):
+        for _ in range(times):
+            record_login_attempt(email, ip, False)
+
+    def test_lockout_after_failures_in_window(self):
+        # 5-attempt policy: the lockout starts once the threshold is passed
+        self.record_failures(5)
+        allowed, _, failures = check_rate_limit('user@example.com', '10.0.0.2')
+        self.assertEqual((allowed, failures), (True, 5))
+
+        self.record_failures(1)
+        allowed, message, failures = check_rate_limit('User@Example.com', '10.0.0.2')
+        self.assertFalse(allowed)
+        self.assertEqual(failures, 6)
+        self.assertIn('Please try again in', message)
+
+        # The lockout runs out before the failures leave the window
+        self.now += 5 * 60 + 1
+        allowed, _, failures = check_rate_limit('user@example.com', '10.0.0.2')
+        self.assertEqual((allowed, failures), (True, 6))
+
+        # Failures older than the window no longer count
+        self.now += 2 * 3600
+        allowed, _, failures = check_rate_limit('user@example.com', '10.0.0.2')
+        self.assertEqual((allowed, failures), (True, 0))
+
+    def test_ip_limit_across_emails(self):
+        # 20 per IP scales to the same policy: locked from the 24th failure (6 of 5)
+        for number in range(23):
+            self.record_failures(1, email=f'user{number}@example.com')
+        self.assertTrue(check_rate_limit('new@example.com', '10.0.0.1')[0])
+
+        self.record_failures(1, email='user23@example.com')
+        allowed, _, failures = check_rate_limit('new@example.com', '10.0.0.1')
+        self.assertEqual((allowed, failures), (False, 0))
+        self.assertTrue(check_rate_limit('new@example.com', '10.0.0.2')[0])
+
+    def test_success_resets_email_failures(self):
+        self.record_failures(6)
+        self.assertFalse(check_rate_limit('user@example.com', '10.0.0.2')[0])
+
+        record_login_attempt('user@example.com', '10.0.0.1', True)
+        allowed, _, failures = check_rate_limit('user@example.com', '10.0.0.2')
+        self.assertEqual((allowed, failures), (True, 0))
+
+    def test_counters_use_rate_limit_cache(self):
+        self.record_failures(1)
+        keys = _window_keys('email', 'user@example.com', self.now)
+        self.assertEqual(caches['rate_limit'].get(keys[0]), 1)
+        self.assertIsNone(caches['default'].get(keys[0]))
+
+        # Clearing the default cache (e.g. dashboard invalidation) keeps the lockout
+        self.record_failures(5)
+        caches['default'].clear()
+        self.assertFalse(check_rate_limit('user@example.com', '10.0.0.2')[0])
+
+        with self.settings(LOGIN_RATE_LIMIT_CACHE='default'):
+            self.assertTrue(check_rate_limit('user@example.com', '10.0.0.2')[0])
+
+    def test_login_view_locks_out(self):
+        User.objects.create_user('user', 'user@example.com', 'password')
+        for _ in range(6):
+            result = self.client.post('/accounts/login/', {'email': 'user@example.com', 'password': 'wrong'}, **AJAX).json()
+            self.assertFalse(result['success'])
+
+        result = self.client.post('/accounts/login/', {'email': 'user@example.com', 'password': 'password'}, **AJAX).json()
+        self.assertFalse(result['success'])
+        self.assertIn('Too many failed attempts', result['message'])
+
+        self.now += 5 * 60 + 1
+        result = self.client.post('/accounts/login/', {'email': 'user@example.com', 'password': 'password'}, **AJAX).json()
+        self.assertTrue(result['success'])
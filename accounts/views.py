@@ -3,13 +3,14 @@ from django.contrib.auth.decorators import login_required
 from django.contrib.auth import update_session_auth_hash
 from django.core.files.storage import default_storage
 from django.core.files.base import ContentFile
-from .models import UserProfile, LoginAttempt
+from .images import clear_profile_variants, schedule_profile_variants
+from .models import UserProfile
+from .rate_limit import check_rate_limit, get_lockout_duration, record_login_attempt
 from django.shortcuts import render, redirect
 from django.contrib.auth.models import User
 from django.http import JsonResponse
 from django.contrib import messages
-from django.utils import timezone
-from datetime import timedelta
+from django.db import transaction
 import re
 
 # ============================================
@@ -136,64 +137,6 @@ def validate_password(password, confirm_password=None):
     
     return True, ""
 
-# ============================================
-# Rate Limiting Functions
-# ============================================
-
-def get_lockout_duration(failed_attempts):
-    """Calculate lockout duration based on failed attempts"""
-    if failed_attempts < 5:
-        return 0
-    
-    lockout_multiplier = (failed_attempts - 1) // 5
-    return lockout_multiplier * 5
-
-def check_rate_limit(email, ip_address):
-    """Check if user is rate limited"""
-    now = timezone.now()
-    
-    one_hour_ago = now - timedelta(hours=1)
-    failed_attempts = LoginAttempt.objects.filter(
-        email=email.lower(),
-        was_successful=False,
-        attempt_time__gte=one_hour_ago
-    ).count()
-    
-    if failed_attempts < 5:
-        return True, "", failed_attempts
-    
-    last_attempt = LoginAttempt.objects.filter(
-        email=email.lower(),
-        was_successful=False
-    ).first()
-    
-    if not last_attempt:
-        return True, "", 0
-    
-    lockout_minutes = get_lockout_duration(failed_attempts)
-    lockout_end = last_attempt.attempt_time + timedelta(minutes=lockout_minutes)
-    
-    if now < lockout_end:
-        remaining = lockout_end - now
-        remaining_minutes = int(remaining.total_seconds() // 60) + 1
-        return False, f"Too many failed attempts. Please try again in {remaining_minutes} minute(s)", failed_attempts
-    
-    return True, "", failed_attempts
-
-def record_login_attempt(email, ip_address, was_successful):
-    """Record a login attempt"""
-    LoginAttempt.objects.create(
-        email=email.lower(),
-        ip_address=ip_address,
-        was_successful=was_successful
-    )
-    
-    if was_successful:
-        LoginAttempt.objects.filter(
-            email=email.lower(),
-            was_successful=False
-        ).delete()
-
 # ============================================
 # Helper to check if request is AJAX
 # ============================================
@@ -383,6 +326,7 @@ def register_view(request):
             if profile_image:
                 profile.profile_image = profile_image
                 profile.save()
+                schedule_profile_variants(profile)
             
             # Log the user in
             login(request, user)
@@ -591,15 +535,20 @@ def profile_view(request):
                 update_session_auth_hash(request, user)
             
             # Handle profile image
-            if remove_image and profile.profile_image:
-                profile.profile_image.delete(save=False)
-                profile.profile_image = None
-                profile.save()
-            elif profile_image:
-                if profile.profile_image:
+            # Variant cleanup / generation runs once the new image is committed
+            with transaction.atomic():
+                if remove_image and profile.profile_image:
                     profile.profile_image.delete(save=False)
-                profile.profile_image = profile_image
-                profile.save()
+                    profile.profile_image = None
+                    clear_profile_variants(profile)
+                    profile.save()
+                elif profile_image:
+                    if profile.profile_image:
+                        profile.profile_image.delete(save=False)
+                    profile.profile_image = profile_image
+                    clear_profile_variants(profile)
+                    profile.save()
+                    schedule_profile_variants(profile)
             
             if is_ajax(request):
                 return JsonResponse({
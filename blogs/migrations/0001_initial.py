@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PortfolioBlogs',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('blog_heading', models.CharField(max_length=255)),
+                ('blog_slug', models.SlugField(blank=True, max_length=255, unique=True)),
+                ('blog_image', models.ImageField(blank=True, null=True, upload_to='blog_images/')),
+                ('blog_created_at', models.DateTimeField(auto_now_add=True)),
+                ('blog_updated_at', models.DateTimeField(auto_now=True)),
+                ('blog_discription', models.TextField()),
+                ('blog_source', models.URLField()),
+                ('blog_created_by', models.CharField(default='Om Pandey', editable=False, max_length=100)),
+            ],
+            options={
+                'ordering': ['-blog_created_at'],
+            },
+        ),
+    ]
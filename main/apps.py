@@ -3,4 +3,6 @@ from django.apps import AppConfig
 
 class MainappConfig(AppConfig):
     name = 'main'
-    
\ No newline at end of file
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,865 @@
+import functools
+import gzip
+import hashlib
+import logging
+import os
+import queue
+import re
+import shutil
+import subprocess
+import tarfile
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import DatabaseBackup, DatabaseRestore
+from .user_export import import_user_data, iter_lines, iter_user_export
+
+try:
+    import zstandard
+except ImportError:  # zstd backups need the optional zstandard package
+    zstandard = None
+
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+UPLOAD_CHUNK_SIZE = 64 * 1024
+UPLOAD_QUEUE_CHUNKS = 32  # Upload chunks buffered ahead of psql (bounds memory)
+PROGRESS_INTERVAL = 1.0  # Seconds between progress writes
+BACKUP_DIR = 'backups'
+EXTENSIONS = {
+    'none': '.sql',
+    'gzip': '.sql.gz',
+    'zstd': '.sql.zst',
+}
+USER_EXTENSIONS = {
+    'none': '.ndjson',
+    'gzip': '.ndjson.gz',
+    'zstd': '.ndjson.zst',
+}
+
+
+class BackupError(Exception):
+    pass
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+# ============================================
+# PostgreSQL client commands
+# ============================================
+def pg_command(program, *args, database=None):
+    """(argv, env) running a PostgreSQL client against the default database"""
+    db_settings = settings.DATABASES['default']
+    env = os.environ.copy()
+    env['PGPASSWORD'] = db_settings['PASSWORD']
+    command = [
+        program,
+        '-h', db_settings['HOST'],
+        '-p', str(db_settings['PORT']),
+        '-U', db_settings['USER'],
+        '-d', database or db_settings['NAME'],
+        *args
+    ]
+    return command, env
+
+
+def estimate_dump_size():
+    """Size of the table data, used as the expected size of a plain dump"""
+    if connection.vendor != 'postgresql':
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT COALESCE(SUM(pg_table_size(c.oid)), 0) FROM pg_class c "
+            "JOIN pg_namespace n ON n.oid = c.relnamespace "
+            "WHERE c.relkind IN ('r', 'm') AND n.nspname NOT IN ('pg_catalog', 'information_schema')"
+        )
+        return cursor.fetchone()[0]
+
+
+def pipe_into(command, env, source):
+    """
+    Run `command` with the readable `source` copied to its stdin in chunks.
+    Returns (returncode, stderr text).
+    """
+    with tempfile.TemporaryFile() as stderr:
+        process = subprocess.Popen(command, env=env, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=stderr)
+        try:
+            while True:
+                chunk = source.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                process.stdin.write(chunk)
+            process.stdin.close()
+        except BrokenPipeError:
+            pass  # the client exited early; its stderr says why
+        except BaseException:
+            process.kill()
+            raise
+        finally:
+            returncode = process.wait()
+        stderr.seek(0)
+        return returncode, stderr.read().decode(errors='replace')
+
+
+# ============================================
+# Compression
+# ============================================
+def available_compressions():
+    return ['none', 'gzip'] + (['zstd'] if zstandard else [])
+
+
+def default_compression(dump_format='plain'):
+    supported = directory_compressions() if dump_format == 'directory' else available_compressions()
+    compression = _setting('BACKUP_COMPRESSION', 'gzip')
+    return compression if compression in supported else 'gzip'
+
+
+class _HashingWriter:
+    """File wrapper that hashes and counts the bytes actually stored"""
+
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data):
+        self.fileobj.write(data)
+        self.sha256.update(data)
+        self.size += len(data)
+        return len(data)
+
+    def flush(self):
+        self.fileobj.flush()
+
+    def close(self):
+        pass
+
+
+def _compressing_writer(compression, writer):
+    if compression == 'gzip':
+        return gzip.GzipFile(fileobj=writer, mode='wb', compresslevel=6)
+    if compression == 'zstd':
+        return zstandard.ZstdCompressor(level=3, threads=-1).stream_writer(writer, closefd=False)
+    return writer
+
+
+def compression_for_filename(filename):
+    """Compression of an uploaded backup, judged by its extension"""
+    if filename.endswith('.gz'):
+        return 'gzip'
+    if filename.endswith('.zst'):
+        return 'zstd'
+    return 'none'
+
+
+def format_for_filename(filename):
+    """Dump format of an uploaded backup, judged by its extension"""
+    if filename.endswith('.tar'):
+        return 'directory'
+    if filename.endswith(tuple(USER_EXTENSIONS.values())):
+        return 'user'
+    return 'plain'
+
+
+def open_decompressed(fileobj, compression):
+    """Readable stream of the uncompressed contents of a backup file"""
+    if compression == 'gzip':
+        return gzip.GzipFile(fileobj=fileobj, mode='rb')
+    if compression == 'zstd':
+        if zstandard is None:
+            raise BackupError('Restoring zstd backups requires the zstandard package')
+        return zstandard.ZstdDecompressor().stream_reader(fileobj)
+    return fileobj
+
+
+# ============================================
+# Directory format (pg_dump -Fd / pg_restore -j)
+# ============================================
+DIRECTORY_COMPRESSION = {
+    'none': ['-Z', '0'],
+    'gzip': ['-Z', '6'],
+    'zstd': ['--compress=zstd'],  # pg_dump 16+
+}
+
+
+@functools.lru_cache(maxsize=1)
+def pg_dump_version():
+    """Major version of the installed pg_dump (e.g. 16), or None when it cannot be run"""
+    try:
+        result = subprocess.run(['pg_dump', '--version'], capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    # e.g. "pg_dump (PostgreSQL) 16.2 (Debian 16.2-1.pgdg120+2)"
+    match = re.search(r'\)\s*(\d+)', result.stdout)
+    return int(match.group(1)) if match else None
+
+
+def directory_compressions():
+    """
+    Compressions pg_dump itself can write to a directory dump. zstd depends
+    on the pg_dump version (16+), not on the Python zstandard package.
+    """
+    version = pg_dump_version() or 0
+    return [name for name in DIRECTORY_COMPRESSION if name != 'zstd' or version >= 16]
+
+
+def parallel_jobs():
+    """Worker count for pg_dump / pg_restore -j (BACKUP_PARALLEL_JOBS, default: all CPUs)"""
+    return max(1, _setting('BACKUP_PARALLEL_JOBS', None) or os.cpu_count() or 1)
+
+
+def directory_size(path):
+    if not os.path.isdir(path):
+        return 0
+    return sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+
+
+def iter_tar(path, chunk_size=CHUNK_SIZE):
+    """
+    Uncompressed tar of a dump directory, generated on the fly (the table
+    files are compressed by pg_dump already). Deterministic for unchanged
+    files, so its SHA-256 can be recorded once and checked after download.
+    """
+    root = os.path.basename(os.path.normpath(path))
+    for name in sorted(os.listdir(path)):
+        file_path = os.path.join(path, name)
+        file_stat = os.stat(file_path)
+        info = tarfile.TarInfo(f'{root}/{name}')
+        info.size = file_stat.st_size
+        info.mtime = int(file_stat.st_mtime)
+        info.mode = 0o644
+        yield info.tobuf(format=tarfile.USTAR_FORMAT)
+
+        with open(file_path, 'rb') as source:
+            while True:
+                chunk = source.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+        remainder = info.size % tarfile.BLOCKSIZE
+        if remainder:
+            yield tarfile.NUL * (tarfile.BLOCKSIZE - remainder)
+    yield tarfile.NUL * (tarfile.BLOCKSIZE * 2)
+
+
+def tar_size(path):
+    """Length of iter_tar(path), for Content-Length"""
+    size = tarfile.BLOCKSIZE * 2
+    for entry in os.scandir(path):
+        blocks = -(-entry.stat().st_size // tarfile.BLOCKSIZE)
+        size += tarfile.BLOCKSIZE * (1 + blocks)
+    return size
+
+
+def _wait_with_progress(process, update):
+    """Wait for `process`, calling update() about once a second meanwhile"""
+    while True:
+        try:
+            return process.wait(timeout=PROGRESS_INTERVAL)
+        except subprocess.TimeoutExpired:
+            update()
+
+
+# ============================================
+# Backup jobs
+# ============================================
+def start_backup(user, notes='', compression=None, dump_format='plain'):
+    """
+    Record a pending backup and queue the dump once the record is committed.
+    The request returns immediately; clients poll the backup's status.
+    Directory backups are stored as the pg_dump directory and downloaded as
+    a .tar built on the fly; 'user' backups hold only `user`'s own data.
+    """
+    compression = compression or default_compression(dump_format)
+    db_name = settings.DATABASES['default']['NAME']
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+
+    if dump_format == 'directory':
+        filename = f"backup_{db_name}_{timestamp}.tar"
+        file_path = f'{BACKUP_DIR}/backup_{db_name}_{timestamp}'
+    elif dump_format == 'user':
+        filename = f"export_user{user.id}_{timestamp}{USER_EXTENSIONS[compression]}"
+        file_path = f'{BACKUP_DIR}/{filename}'
+    else:
+        filename = f"backup_{db_name}_{timestamp}{EXTENSIONS[compression]}"
+        file_path = f'{BACKUP_DIR}/{filename}'
+
+    backup = DatabaseBackup.objects.create(
+        user=user,
+        filename=filename,
+        file_path=file_path,
+        status='pending',
+        compression=compression,
+        dump_format=dump_format,
+        notes=notes
+    )
+    transaction.on_commit(lambda: _queue_job(DatabaseBackup, backup.id, run_backup, backup.id))
+    return backup
+
+
+def run_backup(backup_id):
+    """
+    Dump the database into the backup's file (or directory). Progress is
+    saved about once a second; the final size and SHA-256 of what is
+    downloaded are saved on completion. Output is written under a temporary
+    name, so a failed dump never leaves a partial backup behind.
+    """
+    backup = DatabaseBackup.objects.get(pk=backup_id)
+    backups = DatabaseBackup.objects.filter(pk=backup_id)
+
+    # Per-table compression makes a directory dump's size unpredictable,
+    # and a user export is only a slice of the database
+    estimate = 0
+    if backup.dump_format == 'plain' or (backup.dump_format == 'directory' and backup.compression == 'none'):
+        estimate = estimate_dump_size()
+    backups.update(status='running', estimated_size=estimate, heartbeat_at=timezone.now())
+
+    path = os.path.join(settings.MEDIA_ROOT, str(backup.file_path))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    try:
+        if backup.dump_format == 'directory':
+            result = _dump_directory(backup, backups, path)
+        elif backup.dump_format == 'user':
+            result = _dump_user(backup, backups, path)
+        else:
+            result = _dump_plain(backup, backups, path)
+    except BaseException as e:
+        backups.update(status='failed', error=str(e), completed_at=timezone.now())
+        raise
+
+    backups.update(status='completed', completed_at=timezone.now(), **result)
+
+
+def _dump_plain(backup, backups, file_path):
+    """Stream plain `pg_dump` output through the backup's compression"""
+    part_path = f'{file_path}.part'
+    command, env = pg_command('pg_dump', '-F', 'p')
+
+    try:
+        with tempfile.TemporaryFile() as stderr, open(part_path, 'wb') as output:
+            process = subprocess.Popen(command, env=env, stdout=subprocess.PIPE, stderr=stderr)
+            writer = _HashingWriter(output)
+            compressor = _compressing_writer(backup.compression, writer)
+            processed = 0
+            last_update = time.monotonic()
+            try:
+                while True:
+                    chunk = process.stdout.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    compressor.write(chunk)
+                    processed += len(chunk)
+                    if time.monotonic() - last_update >= PROGRESS_INTERVAL:
+                        backups.update(bytes_processed=processed, file_size=writer.size)
+                        last_update = time.monotonic()
+                compressor.close()
+            except BaseException:
+                process.kill()
+                raise
+            finally:
+                process.stdout.close()
+                returncode = process.wait()
+
+            if returncode != 0:
+                stderr.seek(0)
+                raise BackupError(stderr.read().decode(errors='replace').strip()[-1000:] or 'pg_dump failed')
+
+        os.replace(part_path, file_path)
+    except BaseException:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        raise
+
+    return {
+        'bytes_processed': processed,
+        'file_size': writer.size,
+        'checksum': writer.sha256.hexdigest(),
+    }
+
+
+def _dump_directory(backup, backups, path):
+    """Run `pg_dump -Fd -j N`: one worker per table at a time, N at once"""
+    if backup.compression not in directory_compressions():
+        raise BackupError(
+            f'This pg_dump ({pg_dump_version() or "unknown version"}) cannot write '
+            f'{backup.compression} directory backups; zstd needs PostgreSQL 16 or newer'
+        )
+
+    part_path = f'{path}.part'
+    shutil.rmtree(part_path, ignore_errors=True)
+    command, env = pg_command(
+        'pg_dump', '-F', 'd', '-j', str(parallel_jobs()),
+        *DIRECTORY_COMPRESSION[backup.compression], '-f', part_path
+    )
+
+    try:
+        with tempfile.TemporaryFile() as stderr:
+            process = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=stderr)
+            try:
+                returncode = _wait_with_progress(
+                    process, lambda: backups.update(bytes_processed=directory_size(part_path))
+                )
+            except BaseException:
+                process.kill()
+                process.wait()
+                raise
+
+            if returncode != 0:
+                stderr.seek(0)
+                raise BackupError(stderr.read().decode(errors='replace').strip()[-1000:] or 'pg_dump failed')
+
+        os.replace(part_path, path)
+    except BaseException:
+        shutil.rmtree(part_path, ignore_errors=True)
+        raise
+
+    sha256 = hashlib.sha256()
+    for block in iter_tar(path):
+        sha256.update(block)
+
+    return {
+        'bytes_processed': directory_size(path),
+        'file_size': tar_size(path),
+        'checksum': sha256.hexdigest(),
+    }
+
+
+def _dump_user(backup, backups, file_path):
+    """
+    Write the backup owner's rows as NDJSON through the backup's compression.
+    The export holds this thread's connection in a read-only snapshot, so
+    progress is saved by a second thread on a connection of its own.
+    """
+    part_path = f'{file_path}.part'
+    progress = {'bytes_processed': 0, 'file_size': 0}
+    done = threading.Event()
+    saver = threading.Thread(
+        target=_save_progress, args=(backups, progress, done), name=f'backup-{backup.id}-progress', daemon=True
+    )
+    saver.start()
+    try:
+        with open(part_path, 'wb') as output:
+            writer = _HashingWriter(output)
+            compressor = _compressing_writer(backup.compression, writer)
+            processed = 0
+            for line in iter_user_export(backup.user):
+                compressor.write(line)
+                processed += len(line)
+                progress['bytes_processed'], progress['file_size'] = processed, writer.size
+            compressor.close()
+        os.replace(part_path, file_path)
+    except BaseException:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        raise
+    finally:
+        done.set()
+        saver.join()
+
+    return {
+        'bytes_processed': processed,
+        'file_size': writer.size,
+        'checksum': writer.sha256.hexdigest(),
+    }
+
+
+def _save_progress(backups, progress, done):
+    """Save `progress` (updated by another thread) about once a second until `done` is set"""
+    try:
+        while not done.wait(PROGRESS_INTERVAL):
+            try:
+                backups.update(**progress)
+            except Exception:
+                logger.warning('Could not save backup progress', exc_info=True)
+    finally:
+        connection.close()
+
+
+# ============================================
+# Restore jobs
+# ============================================
+class _ProgressReader:
+    """Readable wrapper counting the bytes read and saving them as progress"""
+
+    def __init__(self, source, restores):
+        self.source = source
+        self.restores = restores
+        self.consumed = 0
+        self.last_update = time.monotonic()
+
+    def read(self, size=-1):
+        data = self.source.read(size)
+        self.consumed += len(data)
+        if time.monotonic() - self.last_update >= PROGRESS_INTERVAL:
+            self.restores.update(bytes_processed=self.consumed)
+            self.last_update = time.monotonic()
+        return data
+
+
+class UploadStream:
+    """
+    Readable bridge between the request thread, which puts upload chunks, and
+    the restore job reading them. The queue is bounded, so a slow psql slows
+    the upload down instead of the upload piling up in memory or on disk.
+    """
+
+    def __init__(self, max_chunks=UPLOAD_QUEUE_CHUNKS):
+        self._queue = queue.Queue(maxsize=max_chunks)
+        self._buffer = b''
+        self._eof = False
+        self._stopped = threading.Event()
+
+    # Request side
+    def put(self, chunk):
+        while True:
+            if self._stopped.is_set():
+                raise BackupError('The restore stopped before the upload finished')
+            try:
+                self._queue.put(chunk, timeout=1)
+                return
+            except queue.Full:
+                continue
+
+    def finish(self):
+        self.put(None)
+
+    def abort(self, reason):
+        try:
+            self._queue.put(BackupError(reason), timeout=1)
+        except queue.Full:
+            pass
+        self._stopped.set()
+
+    # Job side
+    def read(self, size=-1):
+        while not self._eof and (size < 0 or not self._buffer):
+            if self._stopped.is_set() and self._queue.empty():
+                raise BackupError('Upload interrupted')
+            try:
+                item = self._queue.get(timeout=1)
+            except queue.Empty:
+                continue
+            if item is None:
+                self._eof = True
+            elif isinstance(item, Exception):
+                raise item
+            else:
+                self._buffer += item
+
+        if size < 0 or size >= len(self._buffer):
+            data, self._buffer = self._buffer, b''
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    def stop(self):
+        self._stopped.set()
+
+
+def run_restore(restore_id, source):
+    """
+    Terminate the database's other connections, then restore `source`:
+    plain dumps (a readable of the stored or uploaded bytes) are streamed
+    through their decompression into psql's stdin; directory dumps (a path,
+    or an uploaded .tar stream) go to `pg_restore -j N`. Progress counts
+    input bytes. User exports replace only the restoring user's data, so
+    they leave other connections alone.
+    """
+    restore = DatabaseRestore.objects.get(pk=restore_id)
+    restores = DatabaseRestore.objects.filter(pk=restore_id)
+    restores.update(status='running', heartbeat_at=timezone.now())
+
+    if restore.dump_format == 'user':
+        _import_user(restore, restores, source)
+        return
+
+    # Drop and recreate database connections (terminate existing connections)
+    db_name = settings.DATABASES['default']['NAME']
+    terminate_command, env = pg_command(
+        'psql',
+        '-c', f"SELECT pg_terminate_backend(pid) FROM pg_stat_activity WHERE datname = '{db_name}' AND pid <> pg_backend_pid();",
+        database='postgres'
+    )
+    subprocess.run(terminate_command, env=env, capture_output=True, text=True)
+    # This thread's connection was terminated too; reconnect on next use
+    connection.close()
+
+    reader = None
+    try:
+        if isinstance(source, str):
+            _pg_restore(source)
+        else:
+            reader = _ProgressReader(source, restores)
+            if restore.dump_format == 'directory':
+                _restore_tar(reader)
+            else:
+                _restore_plain(reader, restore.compression)
+    except BaseException as e:
+        _finish_restore(
+            restore, status='failed', error=str(e),
+            bytes_processed=reader.consumed if reader else 0, completed_at=timezone.now()
+        )
+        raise
+
+    _finish_restore(
+        restore, status='completed',
+        bytes_processed=reader.consumed if reader else restore.bytes_total, completed_at=timezone.now()
+    )
+
+
+def _import_user(restore, restores, source):
+    reader = _ProgressReader(source, restores)
+    try:
+        import_user_data(restore.user, iter_lines(open_decompressed(reader, restore.compression)))
+    except BaseException as e:
+        restores.update(
+            status='failed', error=str(e), bytes_processed=reader.consumed, completed_at=timezone.now()
+        )
+        raise
+    restores.update(status='completed', bytes_processed=reader.consumed, completed_at=timezone.now())
+
+
+def _restore_plain(reader, compression):
+    restore_command, env = pg_command('psql')
+    returncode, stderr = pipe_into(restore_command, env, open_decompressed(reader, compression))
+    if returncode != 0 and 'ERROR' in stderr:
+        raise BackupError(stderr.strip()[:1000])
+
+
+def _restore_tar(reader):
+    """
+    Unpack an uploaded directory backup as it streams in, then restore it in
+    parallel. pg_restore -j needs the dump on disk, so this is the one
+    restore path that uses (a single copy of) temporary space.
+    """
+    temp_dir = tempfile.mkdtemp(prefix='restore-')
+    try:
+        with tarfile.open(fileobj=reader, mode='r|') as archive:
+            archive.extractall(temp_dir, filter='data')
+        for root, _, files in os.walk(temp_dir):
+            if 'toc.dat' in files:
+                _pg_restore(root)
+                break
+        else:
+            raise BackupError('The archive is not a pg_dump directory backup (no toc.dat)')
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def _pg_restore(directory):
+    """Restore a directory dump with `pg_restore -j N`, replacing existing objects"""
+    command, env = pg_command(
+        'pg_restore', '-j', str(parallel_jobs()), '--clean', '--if-exists', directory
+    )
+    result = subprocess.run(command, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise BackupError(result.stderr.strip()[:1000] or 'pg_restore failed')
+
+
+def _finish_restore(restore, **fields):
+    """
+    Save the job's final state. A --clean restore replaces the
+    DatabaseRestore table too, so the row is put back when it is gone,
+    keeping the outcome pollable.
+    """
+    if DatabaseRestore.objects.filter(pk=restore.pk).update(**fields):
+        return
+    for name, value in fields.items():
+        setattr(restore, name, value)
+    if not DatabaseBackup.objects.filter(pk=restore.backup_id).exists():
+        restore.backup = None
+    try:
+        restore.save(force_insert=True)
+    except Exception:
+        logger.warning('Could not record the outcome of restore %s', restore.pk, exc_info=True)
+
+
+def _restore_from_file(restore_id, file_path):
+    if os.path.isdir(file_path):
+        run_restore(restore_id, file_path)
+        return
+    with open(file_path, 'rb') as source:
+        run_restore(restore_id, source)
+
+
+def _restore_from_upload(restore_id, stream):
+    try:
+        run_restore(restore_id, stream)
+    finally:
+        stream.stop()
+
+
+def start_restore(user, backup):
+    """Queue a restore of a stored backup; returns the DatabaseRestore"""
+    file_path = os.path.join(settings.MEDIA_ROOT, str(backup.file_path))
+    restore = DatabaseRestore.objects.create(
+        user=user,
+        backup=backup,
+        filename=backup.filename,
+        compression=backup.compression,
+        dump_format=backup.dump_format,
+        # pg_restore reports no byte progress for a stored directory
+        bytes_total=0 if os.path.isdir(file_path) else os.path.getsize(file_path)
+    )
+    transaction.on_commit(
+        lambda: _queue_job(DatabaseRestore, restore.id, _restore_from_file, restore.id, file_path)
+    )
+    return restore
+
+
+def start_upload_restore(user, filename, size=0):
+    """
+    Start a restore fed by an upload in progress. Returns (restore, stream):
+    the caller puts the request body into `stream` chunk by chunk and then
+    calls finish(), or abort() when the upload breaks off.
+    """
+    restore = DatabaseRestore.objects.create(
+        user=user,
+        filename=filename,
+        compression=compression_for_filename(filename),
+        dump_format=format_for_filename(filename),
+        bytes_total=size
+    )
+    stream = UploadStream()
+    # Runs alongside the upload, so not on the (possibly busy) job pool
+    _track_job(DatabaseRestore, restore.id)
+    threading.Thread(
+        target=_run_job, args=(DatabaseRestore, restore.id, _restore_from_upload, restore.id, stream),
+        name=f'restore-{restore.id}', daemon=True
+    ).start()
+    return restore, stream
+
+
+# ============================================
+# Lost jobs
+# ============================================
+def fail_stale_jobs(user=None, timeout=None):
+    """
+    Jobs run as threads of the web process, so a restart or crash loses
+    them and leaves their rows pending/running. The process holding a job
+    stamps its heartbeat_at every BACKUP_JOB_HEARTBEAT_INTERVAL seconds, however
+    long the job runs; mark unfinished jobs without a beat (or, never beaten,
+    created) in the last `timeout` seconds (BACKUP_JOB_TIMEOUT) failed and
+    remove partial dump output, so they stop polling and can be deleted.
+    Returns (backups, restores) marked failed.
+    """
+    if timeout is None:
+        timeout = _setting('BACKUP_JOB_TIMEOUT', 5 * 60)
+    now = timezone.now()
+    cutoff = now - timedelta(seconds=timeout)
+    stale = Q(status__in=('pending', 'running'), completed_at__isnull=True) & (
+        Q(heartbeat_at__lte=cutoff) | Q(heartbeat_at__isnull=True, created_at__lte=cutoff)
+    )
+    if user is not None:
+        stale &= Q(user=user)
+    failed = {'status': 'failed', 'error': 'The job was interrupted (the server restarted)', 'completed_at': now}
+
+    backups = 0
+    for backup in DatabaseBackup.objects.filter(stale):
+        # Only the update that wins may touch the files (another job may be finishing it)
+        if DatabaseBackup.objects.filter(stale, pk=backup.pk).update(**failed):
+            backups += 1
+            part_path = os.path.join(settings.MEDIA_ROOT, f'{backup.file_path}.part')
+            if os.path.isdir(part_path):
+                shutil.rmtree(part_path, ignore_errors=True)
+            elif os.path.exists(part_path):
+                os.remove(part_path)
+
+    restores = DatabaseRestore.objects.filter(stale).update(**failed)
+    return backups, restores
+
+
+# ============================================
+# Heartbeats
+# ============================================
+_live_jobs = set()  # (model, pk) of the jobs queued or running in this process
+_live_jobs_lock = threading.Lock()
+_heartbeat = None
+
+
+def _track_job(model, pk):
+    global _heartbeat
+    with _live_jobs_lock:
+        _live_jobs.add((model, pk))
+        if _heartbeat is None:
+            _heartbeat = threading.Thread(target=_beat_forever, name='backup-heartbeat', daemon=True)
+            _heartbeat.start()
+
+
+def _untrack_job(model, pk):
+    with _live_jobs_lock:
+        _live_jobs.discard((model, pk))
+
+
+def beat_live_jobs():
+    """Stamp heartbeat_at on every job this process holds; returns the rows updated"""
+    with _live_jobs_lock:
+        jobs = list(_live_jobs)
+    now = timezone.now()
+    updated = 0
+    for model in (DatabaseBackup, DatabaseRestore):
+        ids = [pk for job_model, pk in jobs if job_model is model]
+        if ids:
+            updated += model.objects.filter(pk__in=ids, completed_at__isnull=True).update(heartbeat_at=now)
+    return updated
+
+
+def _beat_forever():
+    # A separate thread, so jobs blocked in pg_dump / pg_restore / psql keep beating
+    while True:
+        time.sleep(_setting('BACKUP_JOB_HEARTBEAT_INTERVAL', 30))
+        try:
+            beat_live_jobs()
+        except Exception:
+            # e.g. a restore terminated this connection or is replacing the tables
+            logger.warning('Could not record the backup job heartbeat', exc_info=True)
+            connection.close()
+        finally:
+            close_old_connections()
+
+
+# ============================================
+# Job pool
+# ============================================
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=_setting('BACKUP_WORKERS', 1),
+                    thread_name_prefix='backup'
+                )
+    return _executor
+
+
+def _queue_job(model, pk, job, *args):
+    _track_job(model, pk)
+    _get_executor().submit(_run_job, model, pk, job, *args)
+
+
+def _run_job(model, pk, job, *args):
+    try:
+        job(*args)
+    except Exception:
+        logger.exception('%s%r failed', job.__name__, args)
+    finally:
+        _untrack_job(model, pk)
+        close_old_connections()
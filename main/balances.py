@@ -0,0 +1,69 @@
+from decimal import Decimal
+
+from django.db import connection
+from django.utils import timezone
+
+from .models import UserBalance
+
+
+class InsufficientBalance(Exception):
+    def __init__(self, balance, available):
+        self.balance = balance
+        self.available = available
+        super().__init__(
+            f'Insufficient balance in {balance.account_name}. Available: Rs. {available}'
+        )
+
+
+def credit(balance, amount):
+    """Add amount to a balance account; returns the new balance"""
+    return _apply(balance, amount)
+
+
+def debit(balance, amount, allow_overdraft=False):
+    """
+    Subtract amount from a balance account; returns the new balance.
+    Unless allow_overdraft is set, the UPDATE only matches while the account
+    still holds at least `amount`, so concurrent debits can never overdraw it.
+    Raises InsufficientBalance when the funds are not there.
+    """
+    return _apply(balance, -amount, minimum=None if allow_overdraft else amount)
+
+
+def _apply(balance, delta, minimum=None):
+    """
+    Single UPDATE ... RETURNING on the account row: no read-modify-write in
+    Python, so concurrent requests never lose each other's updates.
+    Callers combining several writes should wrap them in transaction.atomic().
+    Raw UPDATEs skip post_save; the dashboard cache is invalidated by the
+    income / expense write that accompanies every balance change.
+    """
+    qn = connection.ops.quote_name
+    column = qn('available_balance')
+
+    sql = (
+        f"UPDATE {qn(UserBalance._meta.db_table)} "
+        f"SET {column} = {column} + %s, {qn('updated_at')} = %s "
+        f"WHERE {qn('id')} = %s"
+    )
+    params = [
+        connection.ops.adapt_decimalfield_value(delta),
+        connection.ops.adapt_datetimefield_value(timezone.now()),
+        balance.pk,
+    ]
+    if minimum is not None:
+        sql += f" AND {column} >= %s"
+        params.append(connection.ops.adapt_decimalfield_value(minimum))
+    sql += f" RETURNING {column}"
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        row = cursor.fetchone()
+
+    if row is None:
+        available = UserBalance.objects.filter(pk=balance.pk).values_list('available_balance', flat=True).first()
+        raise InsufficientBalance(balance, available if available is not None else Decimal('0.00'))
+
+    # Keep the caller's instance in step with the stored value
+    balance.available_balance = Decimal(str(row[0])).quantize(Decimal('0.01'))
+    return balance.available_balance
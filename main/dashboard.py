@@ -0,0 +1,308 @@
+from dataclasses import dataclass, field, fields
+from datetime import date
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+
+from .models import UserBalance, ExpenseBlock, ExpenseItem, UserIncome, UserGoal
+
+
+SNAPSHOT_KEY = 'dashboard:snapshot:{user_id}'
+STATS_HITS_KEY = 'dashboard:stats:hits'
+STATS_MISSES_KEY = 'dashboard:stats:misses'
+
+DAY_ORDER = ['sunday', 'monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday']
+DAY_LABELS = ['Sun', 'Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat']
+DAY_FULL_LABELS = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']
+
+GOAL_STATUS_CHART = [
+    ('new', 'New', '#6366f1'),
+    ('running', 'Running', '#f59e0b'),
+    ('completed', 'Completed', '#10b981'),
+    ('failed', 'Failed', '#ef4444'),
+]
+
+
+@dataclass
+class DashboardSummary:
+    """
+    Every figure rendered by the dashboard.
+    Field names match the template context keys.
+    """
+    today_date: date
+    today_day_name: str
+    current_month: str
+
+    # Balances
+    available_balance: float = 0.0
+    balance_labels: list = field(default_factory=list)
+    balance_values: list = field(default_factory=list)
+    has_balance: bool = False
+
+    # Income
+    total_income: float = 0.0
+    monthly_income: float = 0.0
+    income_labels: list = field(default_factory=list)
+    income_values: list = field(default_factory=list)
+    has_income: bool = False
+
+    # Expenses (current active block)
+    todays_expenses: float = 0.0
+    total_weekly_expense: float = 0.0
+    weekly_amounts: list = field(default_factory=lambda: [0.0] * 7)
+    day_labels: list = field(default_factory=lambda: list(DAY_LABELS))
+    day_full_labels: list = field(default_factory=lambda: list(DAY_FULL_LABELS))
+    has_expenses: bool = False
+
+    # Goals
+    total_goals: int = 0
+    active_goals_count: int = 0
+    completed_goals_count: int = 0
+    failed_goals_count: int = 0
+    has_goals: bool = False
+    has_active_goals: bool = False
+    goals_status_labels: list = field(default_factory=list)
+    goals_status_values: list = field(default_factory=list)
+    goals_status_colors: list = field(default_factory=list)
+    goals_progress_labels: list = field(default_factory=list)
+    goals_progress_values: list = field(default_factory=list)
+    goals_target_values: list = field(default_factory=list)
+    goals_current_values: list = field(default_factory=list)
+    total_goals_target: float = 0.0
+    total_goals_savings: float = 0.0
+    overall_goals_rate: float = 0
+    nearest_goal: dict = None
+    on_track_count: int = 0
+    at_risk_count: int = 0
+    behind_count: int = 0
+    top_active_goals: list = field(default_factory=list)
+
+    def as_context(self):
+        """Flat dict ready to merge into the template context"""
+        return {f.name: getattr(self, f.name) for f in fields(self)}
+
+
+def get_dashboard_summary(user, today=None):
+    """
+    Return the user's dashboard summary from the cache, building it on a miss.
+    Snapshots are dropped by the write signals in main/signals.py and
+    expire at the end of the day they were built for.
+    """
+    today = today or date.today()
+    key = SNAPSHOT_KEY.format(user_id=user.id)
+
+    snapshot = cache.get(key)
+    if snapshot is not None and snapshot['today_date'] == today:
+        _incr_stat(STATS_HITS_KEY)
+        return DashboardSummary(**snapshot)
+
+    _incr_stat(STATS_MISSES_KEY)
+    summary = build_dashboard_summary(user, today)
+
+    timeout = getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', 60 * 15)
+    cache.set(key, summary.as_context(), timeout)
+    return summary
+
+
+def invalidate_dashboard(user_id):
+    """Drop the cached dashboard snapshot for a user"""
+    cache.delete(SNAPSHOT_KEY.format(user_id=user_id))
+
+
+def get_cache_stats():
+    """Dashboard snapshot cache hit/miss counters"""
+    hits = cache.get(STATS_HITS_KEY, 0)
+    misses = cache.get(STATS_MISSES_KEY, 0)
+    lookups = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / lookups * 100, 1) if lookups else 0,
+    }
+
+
+def _incr_stat(key):
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Evicted between add and incr
+        cache.set(key, 1, None)
+
+
+def build_dashboard_summary(user, today=None):
+    """
+    Build the dashboard figures for a user.
+    Uses a fixed number of grouped / conditional aggregate queries,
+    regardless of how much income, expense or goal history the user has.
+    """
+    today = today or date.today()
+    summary = DashboardSummary(
+        today_date=today,
+        today_day_name=ExpenseBlock.get_day_name(today).capitalize(),
+        current_month=today.strftime('%B %Y'),
+    )
+
+    _add_balances(summary, user)
+    _add_income(summary, user, today)
+    _add_expenses(summary, user, today)
+    _add_goals(summary, user)
+
+    return summary
+
+
+def _add_balances(summary, user):
+    """Active balances grouped by income method (1 query)"""
+    rows = UserBalance.objects.filter(
+        user=user,
+        status='active'
+    ).values('income_method').annotate(
+        total=Sum('available_balance')
+    ).order_by()
+
+    total = Decimal('0.00')
+    for row in rows:
+        total += row['total']
+        summary.balance_labels.append(row['income_method'].capitalize())
+        summary.balance_values.append(float(row['total']))
+
+    summary.available_balance = float(total)
+    summary.has_balance = len(summary.balance_labels) > 0
+
+
+def _add_income(summary, user, today):
+    """Lifetime, monthly and per-source income (1 query)"""
+    first_day_of_month = today.replace(day=1)
+    rows = UserIncome.objects.filter(
+        user=user
+    ).values('income_source').annotate(
+        total=Sum('amount'),
+        monthly=Sum('amount', filter=Q(
+            created_at__date__gte=first_day_of_month,
+            created_at__date__lte=today
+        )),
+    ).order_by('-total')
+
+    income_source_display = dict(UserIncome.INCOME_SOURCE_CHOICES)
+    total = Decimal('0.00')
+    monthly = Decimal('0.00')
+
+    for index, row in enumerate(rows):
+        total += row['total']
+        monthly += row['monthly'] or Decimal('0.00')
+
+        # Top 5 sources for the chart
+        if index < 5:
+            source = row['income_source']
+            summary.income_labels.append(income_source_display.get(source, source.capitalize()))
+            summary.income_values.append(float(row['total']))
+
+    summary.total_income = float(total)
+    summary.monthly_income = float(monthly)
+    summary.has_income = len(summary.income_labels) > 0
+
+
+def _add_expenses(summary, user, today):
+    """Today's and this block's expenses grouped by day (2 queries)"""
+    active_block = ExpenseBlock.objects.filter(
+        user=user,
+        status='active',
+        start_date__lte=today,
+        end_date__gte=today
+    ).only('id', 'total_expense').first()
+
+    if not active_block:
+        return
+
+    rows = ExpenseItem.objects.filter(
+        expense_block=active_block
+    ).values('expense_day').annotate(
+        total=Sum('amount'),
+        today_total=Sum('amount', filter=Q(expense_date=today)),
+    ).order_by()
+
+    todays_expenses = Decimal('0.00')
+    for row in rows:
+        day = row['expense_day']
+        if day in DAY_ORDER:
+            summary.weekly_amounts[DAY_ORDER.index(day)] = float(row['total'])
+        todays_expenses += row['today_total'] or Decimal('0.00')
+
+    summary.todays_expenses = float(todays_expenses)
+    summary.total_weekly_expense = float(active_block.total_expense)
+    summary.has_expenses = active_block.total_expense > 0
+
+
+def _add_goals(summary, user):
+    """Goal status counts, progress and predictions (2 queries)"""
+    counts = UserGoal.objects.filter(user=user).aggregate(
+        total=Count('id'),
+        **{
+            status_key: Count('id', filter=Q(status=status_key))
+            for status_key, _, _ in GOAL_STATUS_CHART
+        }
+    )
+
+    summary.total_goals = counts['total']
+    summary.active_goals_count = counts['new'] + counts['running']
+    summary.completed_goals_count = counts['completed']
+    summary.failed_goals_count = counts['failed']
+    summary.has_goals = summary.total_goals > 0
+    summary.has_active_goals = summary.active_goals_count > 0
+
+    for status_key, status_label, color in GOAL_STATUS_CHART:
+        if counts[status_key] > 0:
+            summary.goals_status_labels.append(status_label)
+            summary.goals_status_values.append(counts[status_key])
+            summary.goals_status_colors.append(color)
+
+    if not summary.has_active_goals:
+        return
+
+    # Active goals, newest first, with savings annotated in the same query
+    active_goals = list(UserGoal.objects.filter(user=user, status__in=['new', 'running']).with_progress())
+
+    total_target = 0.0
+    total_savings = 0.0
+    predictions = {'on_track': 0, 'at_risk': 0, 'behind': 0}
+
+    for goal in active_goals:
+        total_target += float(goal.target_amount)
+        total_savings += float(goal.get_current_savings())
+
+        prediction = goal.get_status_prediction()
+        if prediction in predictions:
+            predictions[prediction] += 1
+
+    # Top 5 active goals for the progress chart
+    for goal in active_goals[:5]:
+        title = goal.title[:20] + '...' if len(goal.title) > 20 else goal.title
+        rate = goal.get_achievement_rate()
+
+        summary.goals_progress_labels.append(title)
+        summary.goals_progress_values.append(float(rate))
+        summary.goals_target_values.append(float(goal.target_amount))
+        summary.goals_current_values.append(float(goal.get_current_savings()))
+        summary.top_active_goals.append({
+            'id': goal.id,
+            'title': goal.title,
+            'achievement_rate': float(rate),
+        })
+
+    nearest = min(active_goals, key=lambda g: g.deadline)
+    summary.nearest_goal = {
+        'id': nearest.id,
+        'title': nearest.title,
+        'deadline': nearest.deadline,
+    }
+
+    summary.total_goals_target = total_target
+    summary.total_goals_savings = total_savings
+    if total_target > 0:
+        summary.overall_goals_rate = round(min(100, (total_savings / total_target) * 100), 1)
+
+    summary.on_track_count = predictions['on_track']
+    summary.at_risk_count = predictions['at_risk']
+    summary.behind_count = predictions['behind']
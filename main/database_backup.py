@@ -1,14 +1,16 @@
 import os
-import subprocess
 import shutil
-from datetime import datetime
 from django.conf import settings
-from django.http import JsonResponse, FileResponse, Http404
+from django.http import JsonResponse, FileResponse, Http404, StreamingHttpResponse
 from django.shortcuts import render, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.core.files import File
-from django.core.paginator import Paginator
-from .models import DatabaseBackup
+from .backup_jobs import (
+    UPLOAD_CHUNK_SIZE, BackupError, available_compressions, compression_for_filename, directory_compressions,
+    fail_stale_jobs, iter_tar, start_backup, start_restore, start_upload_restore, tar_size
+)
+from .models import DatabaseBackup, DatabaseRestore
+from .pagination import InvalidCursor, cursor_page, keyset_page, parse_limit
 
 
 # ============================================
@@ -18,19 +20,52 @@ def is_ajax(request):
     return request.headers.get('X-Requested-With') == 'XMLHttpRequest'
 
 
+BACKUP_EXTENSIONS = ('.sql', '.sql.gz', '.sql.zst', '.tar', '.ndjson', '.ndjson.gz', '.ndjson.zst')
+
+
+def serialize_backup(backup):
+    return {
+        'id': backup.id,
+        'filename': backup.filename,
+        'file_size': backup.get_file_size_display(),
+        'created_at': backup.get_created_at_local().strftime('%b %d, %Y %I:%M %p'),
+        'notes': backup.notes or '',
+        'status': backup.status,
+        'compression': backup.compression,
+        'format': backup.dump_format,
+        'progress': backup.get_progress(),
+        'bytes_processed': backup.bytes_processed,
+        'estimated_size': backup.estimated_size,
+        'checksum': backup.checksum,
+        'error': backup.error,
+    }
+
+
+def serialize_restore(restore):
+    return {
+        'id': restore.id,
+        'filename': restore.filename,
+        'status': restore.status,
+        'format': restore.dump_format,
+        'progress': restore.get_progress(),
+        'bytes_processed': restore.bytes_processed,
+        'bytes_total': restore.bytes_total,
+        'error': restore.error,
+    }
+
+
 # ============================================
 # Backup View (Main Page)
 # ============================================
 @login_required(login_url='/401/')
 def backup_view(request):
+    # Jobs lost to a restart would otherwise spin forever
+    fail_stale_jobs(user=request.user)
     backups_list = DatabaseBackup.objects.filter(user=request.user)
-    paginator = Paginator(backups_list, 10)
-    page_number = request.GET.get('page', 1)
-    backups = paginator.get_page(page_number)
+    backups = cursor_page(backups_list, ('-created_at', '-id'), request.GET, per_page=10)
     
     context = {
         'backups': backups,
-        'paginator': paginator,
     }
     return render(request, 'Backup/backup.html', context)
 
@@ -48,77 +83,33 @@ def create_backup(request):
     
     try:
         notes = request.POST.get('notes', '').strip()
+        compression = request.POST.get('compression') or None
+        dump_format = request.POST.get('format') or 'plain'
         
-        # Database credentials
-        db_settings = settings.DATABASES['default']
-        db_name = db_settings['NAME']
-        db_user = db_settings['USER']
-        db_password = db_settings['PASSWORD']
-        db_host = db_settings['HOST']
-        db_port = db_settings['PORT']
-        
-        # Create backup directory if not exists
-        backup_dir = os.path.join(settings.MEDIA_ROOT, 'backups')
-        if not os.path.exists(backup_dir):
-            os.makedirs(backup_dir)
-        
-        # Generate filename with timestamp
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"backup_{db_name}_{timestamp}.sql"
-        file_path = os.path.join(backup_dir, filename)
-        
-        # Set environment variable for password
-        env = os.environ.copy()
-        env['PGPASSWORD'] = db_password
-        
-        # Run pg_dump command
-        command = [
-            'pg_dump',
-            '-h', db_host,
-            '-p', db_port,
-            '-U', db_user,
-            '-d', db_name,
-            '-F', 'p',  # Plain text format
-            '-f', file_path
-        ]
-        
-        result = subprocess.run(
-            command,
-            env=env,
-            capture_output=True,
-            text=True
-        )
+        if dump_format not in ('plain', 'directory', 'user'):
+            return JsonResponse({
+                'success': False,
+                'message': f'Unsupported backup format: {dump_format}',
+                'type': 'error'
+            })
         
-        if result.returncode != 0:
+        # Directory dumps are compressed by pg_dump itself, per table file
+        supported = directory_compressions() if dump_format == 'directory' else available_compressions()
+        if compression and compression not in supported:
             return JsonResponse({
-                'success': False, 
-                'message': f'Backup failed: {result.stderr}', 
+                'success': False,
+                'message': f'Unsupported compression: {compression}',
                 'type': 'error'
             })
         
-        # Get file size
-        file_size = os.path.getsize(file_path)
-        
-        # Save backup record to database
-        backup = DatabaseBackup.objects.create(
-            user=request.user,
-            filename=filename,
-            file_path=f'backups/{filename}',
-            file_size=file_size,
-            notes=notes
-        )
+        # The dump runs in the background; the page polls backup_status
+        backup = start_backup(request.user, notes=notes, compression=compression, dump_format=dump_format)
         
         return JsonResponse({
             'success': True,
-            'message': 'Backup created successfully',
+            'message': 'Backup started',
             'type': 'success',
-            'backup': {
-                'id': backup.id,
-                'filename': backup.filename,
-                'file_size': backup.get_file_size_display(),
-                'created_at': backup.get_created_at_local().strftime('%b %d, %Y %I:%M %p'),
-                'notes': backup.notes or ''
-            }
+            'backup': serialize_backup(backup)
         })
         
     except Exception as e:
@@ -129,18 +120,43 @@ def create_backup(request):
         })
 
 
+# ============================================
+# Backup Status (polled while a backup runs)
+# ============================================
+@login_required(login_url='/401/')
+def backup_status(request, backup_id):
+    if not is_ajax(request):
+        return JsonResponse({'success': False, 'message': 'Invalid request', 'type': 'error'})
+    
+    backup = DatabaseBackup.objects.filter(id=backup_id, user=request.user).first()
+    if backup is None:
+        return JsonResponse({'success': False, 'message': 'Backup not found', 'type': 'error'})
+    
+    if backup.status in ('pending', 'running') and fail_stale_jobs(user=request.user)[0]:
+        backup.refresh_from_db()
+    
+    return JsonResponse({'success': True, 'backup': serialize_backup(backup)})
+
+
 # ============================================
 # Download Backup View
 # ============================================
 @login_required(login_url='/401/')
 def download_backup(request, backup_id):
     try:
-        backup = get_object_or_404(DatabaseBackup, id=backup_id, user=request.user)
+        backup = get_object_or_404(DatabaseBackup, id=backup_id, user=request.user, status='completed')
         file_path = os.path.join(settings.MEDIA_ROOT, str(backup.file_path))
         
         if not os.path.exists(file_path):
             raise Http404("Backup file not found")
         
+        # Directory backups are tarred while they are sent
+        if os.path.isdir(file_path):
+            response = StreamingHttpResponse(iter_tar(file_path), content_type='application/x-tar')
+            response['Content-Length'] = tar_size(file_path)
+            response['Content-Disposition'] = f'attachment; filename="{backup.filename}"'
+            return response
+        
         response = FileResponse(
             open(file_path, 'rb'),
             as_attachment=True,
@@ -164,94 +180,36 @@ def restore_backup(request):
         return JsonResponse({'success': False, 'message': 'Invalid request', 'type': 'error'})
     
     try:
-        backup_id = request.POST.get('backup_id')
-        uploaded_file = request.FILES.get('backup_file')
+        # Uploads arrive as the raw request body and are streamed into psql
+        if request.content_type == 'application/octet-stream':
+            return restore_upload(request)
         
-        # Determine file path
-        if backup_id:
-            # Restore from existing backup
-            backup = get_object_or_404(DatabaseBackup, id=backup_id, user=request.user)
-            file_path = os.path.join(settings.MEDIA_ROOT, str(backup.file_path))
-            
-            if not os.path.exists(file_path):
-                return JsonResponse({
-                    'success': False, 
-                    'message': 'Backup file not found', 
-                    'type': 'error'
-                })
-        elif uploaded_file:
-            # Restore from uploaded file
-            temp_dir = os.path.join(settings.MEDIA_ROOT, 'temp_restore')
-            if not os.path.exists(temp_dir):
-                os.makedirs(temp_dir)
-            
-            file_path = os.path.join(temp_dir, uploaded_file.name)
-            with open(file_path, 'wb+') as destination:
-                for chunk in uploaded_file.chunks():
-                    destination.write(chunk)
-        else:
+        backup_id = request.POST.get('backup_id')
+        if not backup_id:
             return JsonResponse({
                 'success': False, 
                 'message': 'No backup selected', 
                 'type': 'error'
             })
         
-        # Database credentials
-        db_settings = settings.DATABASES['default']
-        db_name = db_settings['NAME']
-        db_user = db_settings['USER']
-        db_password = db_settings['PASSWORD']
-        db_host = db_settings['HOST']
-        db_port = db_settings['PORT']
-        
-        # Set environment variable for password
-        env = os.environ.copy()
-        env['PGPASSWORD'] = db_password
-        
-        # Drop and recreate database connections (terminate existing connections)
-        terminate_command = [
-            'psql',
-            '-h', db_host,
-            '-p', db_port,
-            '-U', db_user,
-            '-d', 'postgres',
-            '-c', f"SELECT pg_terminate_backend(pid) FROM pg_stat_activity WHERE datname = '{db_name}' AND pid <> pg_backend_pid();"
-        ]
-        
-        subprocess.run(terminate_command, env=env, capture_output=True, text=True)
-        
-        # Run psql to restore
-        restore_command = [
-            'psql',
-            '-h', db_host,
-            '-p', db_port,
-            '-U', db_user,
-            '-d', db_name,
-            '-f', file_path
-        ]
-        
-        result = subprocess.run(
-            restore_command,
-            env=env,
-            capture_output=True,
-            text=True
-        )
-        
-        # Clean up temp file if uploaded
-        if uploaded_file and os.path.exists(file_path):
-            os.remove(file_path)
+        # Restore from existing backup
+        backup = get_object_or_404(DatabaseBackup, id=backup_id, user=request.user, status='completed')
+        file_path = os.path.join(settings.MEDIA_ROOT, str(backup.file_path))
         
-        if result.returncode != 0 and 'ERROR' in result.stderr:
+        if not os.path.exists(file_path):
             return JsonResponse({
                 'success': False, 
-                'message': f'Restore failed: {result.stderr[:200]}', 
+                'message': 'Backup file not found', 
                 'type': 'error'
             })
         
+        restore = start_restore(request.user, backup)
+        
         return JsonResponse({
             'success': True,
-            'message': 'Database restored successfully. Please refresh the page.',
-            'type': 'success'
+            'message': 'Restore started',
+            'type': 'success',
+            'restore': serialize_restore(restore)
         })
         
     except Exception as e:
@@ -262,6 +220,70 @@ def restore_backup(request):
         })
 
 
+def restore_upload(request):
+    """
+    Feed the request body to a restore job as it is read: no temporary file,
+    and the bounded stream keeps memory flat whatever the dump size.
+    """
+    filename = os.path.basename(request.headers.get('X-Backup-Filename', ''))
+    if not filename.endswith(BACKUP_EXTENSIONS):
+        return JsonResponse({
+            'success': False,
+            'message': 'Please upload a .sql, .sql.gz, .sql.zst, .tar or .ndjson(.gz/.zst) file',
+            'type': 'error'
+        })
+    
+    if compression_for_filename(filename) not in available_compressions():
+        return JsonResponse({
+            'success': False,
+            'message': 'Restoring zstd backups requires the zstandard package',
+            'type': 'error'
+        })
+    
+    size = int(request.META.get('CONTENT_LENGTH') or 0)
+    restore, stream = start_upload_restore(request.user, filename, size)
+    # Serialized now: the restore terminates this request's DB connection
+    payload = serialize_restore(restore)
+    
+    try:
+        while True:
+            chunk = request.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            stream.put(chunk)
+        stream.finish()
+    except BackupError:
+        pass  # the job already failed; its status says why
+    except Exception:
+        stream.abort('Upload interrupted')
+        raise
+    
+    return JsonResponse({
+        'success': True,
+        'message': 'Restore started',
+        'type': 'success',
+        'restore': payload
+    })
+
+
+# ============================================
+# Restore Status (polled while a restore runs)
+# ============================================
+@login_required(login_url='/401/')
+def restore_status(request, restore_id):
+    if not is_ajax(request):
+        return JsonResponse({'success': False, 'message': 'Invalid request', 'type': 'error'})
+    
+    restore = DatabaseRestore.objects.filter(id=restore_id, user=request.user).first()
+    if restore is None:
+        return JsonResponse({'success': False, 'message': 'Restore not found', 'type': 'error'})
+    
+    if restore.status in ('pending', 'running') and fail_stale_jobs(user=request.user)[1]:
+        restore.refresh_from_db()
+    
+    return JsonResponse({'success': True, 'restore': serialize_restore(restore)})
+
+
 # ============================================
 # Delete Backup View
 # ============================================
@@ -274,12 +296,19 @@ def delete_backup(request, backup_id):
         return JsonResponse({'success': False, 'message': 'Invalid request', 'type': 'error'})
     
     try:
+        # A job lost to a restart becomes failed here, so it can be deleted
+        fail_stale_jobs(user=request.user)
         backup = get_object_or_404(DatabaseBackup, id=backup_id, user=request.user)
         filename = backup.filename
         
+        if backup.status in ('pending', 'running'):
+            return JsonResponse({'success': False, 'message': 'Backup is still in progress', 'type': 'error'})
+        
         # Delete file from media folder
         file_path = os.path.join(settings.MEDIA_ROOT, str(backup.file_path))
-        if os.path.exists(file_path):
+        if os.path.isdir(file_path):
+            shutil.rmtree(file_path)
+        elif os.path.exists(file_path):
             os.remove(file_path)
         
         # Delete database record
@@ -314,13 +343,7 @@ def get_backup(request, backup_id):
         
         return JsonResponse({
             'success': True,
-            'backup': {
-                'id': backup.id,
-                'filename': backup.filename,
-                'file_size': backup.get_file_size_display(),
-                'created_at': backup.get_created_at_local().strftime('%b %d, %Y %I:%M %p'),
-                'notes': backup.notes or ''
-            }
+            'backup': serialize_backup(backup)
         })
         
     except DatabaseBackup.DoesNotExist:
@@ -338,7 +361,12 @@ def get_all_backups(request):
         return JsonResponse({'success': False, 'message': 'Invalid request', 'type': 'error'})
     
     try:
-        backups = DatabaseBackup.objects.filter(user=request.user)
+        backups, next_cursor = keyset_page(
+            DatabaseBackup.objects.filter(user=request.user, status='completed'),
+            ('-created_at', '-id'),
+            cursor=request.GET.get('cursor'),
+            limit=parse_limit(request.GET.get('limit'))
+        )
         backups_list = [{
             'id': b.id,
             'filename': b.filename,
@@ -348,8 +376,12 @@ def get_all_backups(request):
         
         return JsonResponse({
             'success': True,
-            'backups': backups_list
+            'backups': backups_list,
+            'next_cursor': next_cursor,
+            'has_more': next_cursor is not None
         })
         
+    except InvalidCursor as e:
+        return JsonResponse({'success': False, 'message': str(e), 'type': 'error'})
     except Exception as e:
         return JsonResponse({'success': False, 'message': 'An error occurred', 'type': 'error'})
\ No newline at end of file
@@ -0,0 +1,177 @@
+import logging
+import threading
+import time
+from datetime import date
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from .dashboard import invalidate_dashboard
+from .models import ExpenseBlock, HabitBlock, UserGoal
+
+
+logger = logging.getLogger(__name__)
+
+GOAL_BATCH_SIZE = 500
+RUNNER_LOCK_ID = 7_340_021  # pg advisory lock key held by the active expiry runner
+
+
+# ============================================
+# Status transitions
+# ============================================
+def close_expired_blocks(model, today=None):
+    """
+    Close every active block of `model` whose end date has passed with a single
+    UPDATE. Returns (closed, user_ids).
+    """
+    today = today or date.today()
+    expired = model.objects.filter(status='active', end_date__lt=today)
+    closed = 0
+
+    with transaction.atomic():
+        user_ids = set(expired.values_list('user_id', flat=True).distinct())
+        if user_ids:
+            closed = expired.update(status='closed', updated_at=timezone.now())
+    return closed, user_ids
+
+
+def finalize_overdue_goals(today=None, batch_size=GOAL_BATCH_SIZE):
+    """
+    Mark new/running goals past their deadline as completed or failed.
+    Each batch costs one annotated SELECT and at most two UPDATEs.
+    Returns (completed, failed, user_ids).
+    """
+    today = today or date.today()
+    completed = failed = 0
+    user_ids = set()
+    last_id = 0
+
+    while True:
+        goals = list(UserGoal.objects.filter(
+            status__in=['new', 'running'],
+            deadline__lt=today,
+            id__gt=last_id
+        ).with_progress().order_by('id')[:batch_size])
+        if not goals:
+            break
+
+        completed_ids = []
+        failed_ids = []
+        for goal in goals:
+            if goal.get_achievement_rate() >= 100:
+                completed_ids.append(goal.id)
+            else:
+                failed_ids.append(goal.id)
+        now = timezone.now()
+
+        # Re-check the status so a goal edited meanwhile is left alone
+        with transaction.atomic():
+            if completed_ids:
+                completed += UserGoal.objects.filter(
+                    id__in=completed_ids, status__in=['new', 'running']
+                ).update(status='completed', updated_at=now)
+            if failed_ids:
+                failed += UserGoal.objects.filter(
+                    id__in=failed_ids, status__in=['new', 'running']
+                ).update(status='failed', updated_at=now)
+
+        user_ids.update(goal.user_id for goal in goals)
+        last_id = goals[-1].id
+
+    return completed, failed, user_ids
+
+
+def close_expired(today=None):
+    """
+    Run every status transition: expired expense and habit blocks are closed,
+    overdue goals are finalized. Bulk UPDATEs skip post_save, so dashboards of
+    the affected users are invalidated here. Returns counts per kind.
+    """
+    today = today or date.today()
+
+    expense_closed, expense_users = close_expired_blocks(ExpenseBlock, today)
+    habit_closed, _ = close_expired_blocks(HabitBlock, today)
+    completed, failed, goal_users = finalize_overdue_goals(today)
+
+    for user_id in expense_users | goal_users:
+        invalidate_dashboard(user_id)
+
+    return {
+        'expense_blocks': expense_closed,
+        'habit_blocks': habit_closed,
+        'goals_completed': completed,
+        'goals_failed': failed,
+    }
+
+
+# ============================================
+# In-process runner
+# ============================================
+_runner = None
+_runner_lock = threading.Lock()
+_lock_connection = None  # DB connection holding RUNNER_LOCK_ID
+
+
+def start_expiry_runner(interval=None):
+    """
+    Start a daemon thread running close_expired() every EXPIRY_RUNNER_INTERVAL
+    seconds. Every worker process starts one, but on PostgreSQL only the
+    thread holding an advisory lock does the work; the others take over
+    if its process goes away. A zero interval disables it (e.g. when a cron
+    job runs `manage.py close_expired` instead). Safe to call more than once.
+    """
+    global _runner
+
+    if interval is None:
+        interval = getattr(settings, 'EXPIRY_RUNNER_INTERVAL', 0)
+    if not interval:
+        return None
+
+    with _runner_lock:
+        if _runner is None:
+            _runner = threading.Thread(
+                target=_run_forever, args=(interval,), name='expiry-runner', daemon=True
+            )
+            _runner.start()
+    return _runner
+
+
+def _is_active_runner():
+    """
+    Whether this process runs the expiry job: it holds (or now takes) the
+    session-level advisory lock on this thread's connection. The lock goes
+    with the connection, so the holder keeps its connection open.
+    """
+    global _lock_connection
+
+    if connection.vendor != 'postgresql':
+        return True
+    if _lock_connection is not None and connection.connection is _lock_connection and connection.is_usable():
+        return True
+
+    _lock_connection = None
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_try_advisory_lock(%s)', [RUNNER_LOCK_ID])
+        acquired = cursor.fetchone()[0]
+    if acquired:
+        _lock_connection = connection.connection
+    return acquired
+
+
+def _run_forever(interval):
+    while True:
+        active = False
+        try:
+            active = _is_active_runner()
+            if active:
+                close_expired()
+        except Exception:
+            logger.exception('Expiry run failed')
+            active = False
+        finally:
+            if not active:
+                # Standby runners (and failed runs) do not keep a connection
+                close_old_connections()
+                connection.close()
+        time.sleep(interval)
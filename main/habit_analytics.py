@@ -0,0 +1,186 @@
+import sys
+from array import array
+from datetime import date, timedelta
+
+from .models import HabitItem, HabitCheckIn
+
+
+WEEKDAYS = ['sunday', 'monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday']
+
+
+class DayBitset:
+    """
+    One bit per calendar day starting at `origin`, packed into 64-bit words.
+    Analytics run on the whole set at once as Python big-int bit operations.
+    """
+    def __init__(self, origin, days):
+        self.origin = origin
+        self.days = days
+        self.words = array('Q', bytes(8 * ((days + 63) // 64)))
+
+    def add(self, day):
+        offset = (day - self.origin).days
+        if 0 <= offset < self.days:
+            self.words[offset >> 6] |= 1 << (offset & 63)
+
+    def add_range(self, start, end):
+        """Set every day from start to end (inclusive)"""
+        first = max(0, (start - self.origin).days)
+        last = min(self.days - 1, (end - self.origin).days)
+        for offset in range(first, last + 1):
+            self.words[offset >> 6] |= 1 << (offset & 63)
+
+    def as_int(self):
+        # Word i holds bits 64*i..64*i+63: read the words as little-endian
+        words = self.words
+        if sys.byteorder != 'little':
+            words = array('Q', words)
+            words.byteswap()
+        return int.from_bytes(words.tobytes(), 'little')
+
+
+# ============================================
+# Bit helpers (bit i = origin + i days)
+# ============================================
+def longest_run(bits):
+    """Length of the longest run of consecutive set bits"""
+    length = 0
+    while bits:
+        bits &= bits >> 1
+        length += 1
+    return length
+
+
+def run_ending_at(bits, position):
+    """Number of consecutive set bits ending at `position` (inclusive)"""
+    if position < 0:
+        return 0
+    gaps = ~bits & ((1 << (position + 1)) - 1)
+    return position + 1 - gaps.bit_length()
+
+
+def range_mask(start, stop):
+    """Bits start..stop-1"""
+    if stop <= start:
+        return 0
+    return ((1 << (stop - start)) - 1) << start
+
+
+def every_seventh_mask(first, days):
+    """Bits first, first+7, first+14, ... below `days`"""
+    count = (days - first + 6) // 7
+    if count <= 0:
+        return 0
+    # sum(2**(7k) for k < count) == (2**(7*count) - 1) // (2**7 - 1)
+    return (((1 << (7 * count)) - 1) // 127) << first
+
+
+def rate(part, whole):
+    return round(part / whole * 100, 1) if whole else 0
+
+
+# ============================================
+# Analytics
+# ============================================
+def get_habit_names(user):
+    """Distinct habit names the user has tracked, for the analytics picker"""
+    names = HabitItem.objects.filter(
+        habit_block__user=user
+    ).values_list('habit_name', flat=True).order_by('habit_name').distinct()
+
+    seen = {}
+    for name in names:
+        seen.setdefault(name.lower(), name)
+    return list(seen.values())
+
+
+def get_habit_analytics(user, habit_name, today=None, weeks=12):
+    """
+    Streaks, weekly trend and weekday success rates for a habit name across
+    all of the user's habit blocks. Two queries: the blocks tracking the
+    habit and their checked days, which are packed into day bitsets.
+    Returns None when the user never tracked the habit.
+    """
+    today = today or date.today()
+
+    habits = list(HabitItem.objects.filter(
+        habit_block__user=user,
+        habit_name__iexact=habit_name,
+        habit_block__start_date__lte=today
+    ).values_list('id', 'habit_block_id', 'habit_block__start_date', 'habit_block__end_date'))
+
+    if not habits:
+        return None
+
+    origin = min(start for _, _, start, _ in habits)
+    last_day = min(today, max(end for _, _, _, end in habits))
+    days = (last_day - origin).days + 1
+
+    tracked = DayBitset(origin, days)
+    for _, _, start, end in habits:
+        tracked.add_range(start, end)
+
+    checked = DayBitset(origin, days)
+    check_dates = HabitCheckIn.objects.filter(
+        habit_item_id__in=[habit_id for habit_id, _, _, _ in habits],
+        is_checked=True
+    ).values_list('check_date', flat=True)
+    for check_date in check_dates:
+        checked.add(check_date)
+
+    tracked_bits = tracked.as_int()
+    checked_bits = checked.as_int() & tracked_bits
+
+    # A streak is still alive until today is over
+    today_offset = (today - origin).days
+    current_streak = run_ending_at(checked_bits, today_offset)
+    if current_streak == 0:
+        current_streak = run_ending_at(checked_bits, today_offset - 1)
+
+    # Weekly trend (Sunday-start weeks), most recent `weeks` weeks
+    shift = (origin.weekday() + 1) % 7
+    total_weeks = (days + shift + 6) // 7
+    weekly = []
+    for week in range(max(0, total_weeks - weeks), total_weeks):
+        mask = range_mask(max(0, week * 7 - shift), min(days, week * 7 - shift + 7))
+        week_tracked = (tracked_bits & mask).bit_count()
+        week_checked = (checked_bits & mask).bit_count()
+        week_start = origin + timedelta(days=week * 7 - shift)
+        weekly.append({
+            'week_start': week_start.strftime('%Y-%m-%d'),
+            'label': week_start.strftime('%b %d'),
+            'checked': week_checked,
+            'tracked': week_tracked,
+            'rate': rate(week_checked, week_tracked),
+        })
+
+    # Success rate per weekday
+    weekdays = []
+    for index, day_name in enumerate(WEEKDAYS):
+        python_weekday = (index - 1) % 7
+        mask = every_seventh_mask((python_weekday - origin.weekday()) % 7, days)
+        day_tracked = (tracked_bits & mask).bit_count()
+        day_checked = (checked_bits & mask).bit_count()
+        weekdays.append({
+            'day': day_name,
+            'display': day_name.capitalize(),
+            'checked': day_checked,
+            'tracked': day_tracked,
+            'rate': rate(day_checked, day_tracked),
+        })
+
+    tracked_days = tracked_bits.bit_count()
+    checked_days = checked_bits.bit_count()
+
+    return {
+        'habit_name': habit_name,
+        'blocks': len({block_id for _, block_id, _, _ in habits}),
+        'first_day': origin.strftime('%Y-%m-%d'),
+        'tracked_days': tracked_days,
+        'checked_days': checked_days,
+        'completion_rate': rate(checked_days, tracked_days),
+        'current_streak': current_streak,
+        'longest_streak': longest_run(checked_bits),
+        'weekly': weekly,
+        'weekdays': weekdays,
+    }
@@ -0,0 +1,172 @@
+import csv
+import io
+import json
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+
+from .balances import debit
+from .dashboard import invalidate_dashboard
+from .models import UserBalance, ExpenseBlock, ExpenseItem
+from .rollups import apply_delta
+
+
+MAX_IMPORT_ROWS = 10000
+IMPORT_BATCH_SIZE = 500
+
+
+class ExpenseImportError(Exception):
+    def __init__(self, message, errors=None):
+        self.errors = errors or []
+        super().__init__(message)
+
+
+# ============================================
+# Parsing
+# ============================================
+def parse_expense_file(content, file_format):
+    """
+    Rows (dicts) from CSV or JSON text.
+    CSV needs a header row; JSON is a list of objects. Recognised keys are
+    expense_name, amount, expense_date (YYYY-MM-DD), account (id or name)
+    and notes.
+    """
+    if file_format == 'csv':
+        reader = csv.DictReader(io.StringIO(content))
+        rows = [
+            {(key or '').strip().lower(): (value or '').strip() for key, value in row.items()}
+            for row in reader
+        ]
+    elif file_format == 'json':
+        try:
+            rows = json.loads(content)
+        except ValueError:
+            raise ExpenseImportError('Invalid JSON file')
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            raise ExpenseImportError('JSON must be a list of expense objects')
+    else:
+        raise ExpenseImportError('Unsupported file format (use CSV or JSON)')
+
+    if not rows:
+        raise ExpenseImportError('No expenses found in file')
+    if len(rows) > MAX_IMPORT_ROWS:
+        raise ExpenseImportError(f'Too many rows (maximum {MAX_IMPORT_ROWS})')
+    return rows
+
+
+def detect_format(filename, content_type=''):
+    name = (filename or '').lower()
+    if name.endswith('.json') or 'json' in (content_type or ''):
+        return 'json'
+    return 'csv'
+
+
+# ============================================
+# Import
+# ============================================
+def build_expense_items(block, rows, default_balance=None):
+    """
+    Validate every row and build unsaved ExpenseItem objects.
+    Nothing is written; all row errors are collected and raised together.
+    """
+    balances = list(UserBalance.objects.filter(user=block.user, status='active'))
+    by_id = {str(balance.id): balance for balance in balances}
+    by_name = {balance.account_name.lower(): balance for balance in balances}
+
+    items = []
+    errors = []
+
+    for line, row in enumerate(rows, start=1):
+        expense_name = str(row.get('expense_name') or '').strip()
+        amount = str(row.get('amount') or '').strip()
+        expense_date = str(row.get('expense_date') or '').strip()
+        account = str(row.get('account') or '').strip()
+        notes = str(row.get('notes') or '').strip()
+
+        if len(expense_name) < 2 or len(expense_name) > 100:
+            errors.append(f'Row {line}: expense name must be 2-100 characters')
+            continue
+
+        try:
+            amount_decimal = Decimal(amount).quantize(Decimal('0.01'))
+        except (InvalidOperation, ValueError):
+            errors.append(f'Row {line}: invalid amount')
+            continue
+        if amount_decimal <= 0:
+            errors.append(f'Row {line}: amount must be greater than 0')
+            continue
+
+        try:
+            date_value = datetime.strptime(expense_date, '%Y-%m-%d').date()
+        except ValueError:
+            errors.append(f'Row {line}: invalid date (use YYYY-MM-DD)')
+            continue
+        if not (block.start_date <= date_value <= block.end_date):
+            errors.append(f'Row {line}: date is outside the block date range')
+            continue
+
+        if account:
+            balance = by_id.get(account) or by_name.get(account.lower())
+        else:
+            balance = default_balance
+        if balance is None:
+            errors.append(f'Row {line}: account not found or inactive')
+            continue
+
+        # bulk_create skips ExpenseItem.save(), so fill its derived fields here
+        items.append(ExpenseItem(
+            expense_block=block,
+            user_balance=balance,
+            expense_name=expense_name,
+            amount=amount_decimal,
+            payment_method=balance.income_method,
+            expense_day=ExpenseBlock.get_day_name(date_value),
+            expense_date=date_value,
+            notes=notes or None
+        ))
+
+    if errors:
+        raise ExpenseImportError(f'{len(errors)} row(s) could not be imported', errors)
+    return items
+
+
+def import_expenses(block, rows, default_balance=None, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Import many expense items into a block in one transaction:
+    one debit per account, bulk_create in batches, one block total update
+    and one rollup delta per (account, day). Raises ExpenseImportError or
+    InsufficientBalance without writing anything.
+    """
+    if block.status == 'closed':
+        raise ExpenseImportError('This expense block is closed.')
+
+    items = build_expense_items(block, rows, default_balance)
+
+    account_totals = defaultdict(Decimal)
+    day_totals = defaultdict(lambda: [Decimal('0.00'), 0])
+    for item in items:
+        account_totals[item.user_balance] += item.amount
+        day_total = day_totals[(item.user_balance_id, item.expense_date)]
+        day_total[0] += item.amount
+        day_total[1] += 1
+
+    total = sum(account_totals.values(), Decimal('0.00'))
+
+    with transaction.atomic():
+        for balance, amount in account_totals.items():
+            debit(balance, amount)
+
+        ExpenseItem.objects.bulk_create(items, batch_size=batch_size)
+        ExpenseBlock.apply_item_delta(block.id, amount=total, count=len(items))
+
+        for (balance_id, day), (amount, count) in day_totals.items():
+            apply_delta(block.user_id, balance_id, day, expense=amount, txn_count=count)
+
+        # Bulk writes bypass the post_save signals
+        transaction.on_commit(lambda: invalidate_dashboard(block.user_id))
+
+    block.total_expense = Decimal(block.total_expense) + total
+    block.item_count += len(items)
+    return len(items), total
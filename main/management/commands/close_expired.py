@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from main.expiry import close_expired
+
+
+class Command(BaseCommand):
+    help = 'Close expired expense / habit blocks and finalize overdue goals (run daily or from cron)'
+
+    def handle(self, *args, **options):
+        result = close_expired()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Closed {result['expense_blocks']} expense block(s) and {result['habit_blocks']} habit block(s); "
+            f"finalized {result['goals_completed']} completed and {result['goals_failed']} failed goal(s)"
+        ))
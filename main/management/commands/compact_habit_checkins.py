@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from main.models import HabitCheckIn
+
+
+class Command(BaseCommand):
+    help = 'Delete unchecked HabitCheckIn rows left over from before check-ins were stored sparsely'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows deleted per statement')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the rows that would be deleted')
+
+    def handle(self, *args, **options):
+        unchecked = HabitCheckIn.objects.filter(is_checked=False)
+
+        if options['dry_run']:
+            self.stdout.write(f'{unchecked.count()} unchecked check-in row(s) would be deleted')
+            return
+
+        batch_size = max(1, options['batch_size'])
+        deleted = 0
+
+        # Short batches keep each DELETE's locks and WAL small
+        while True:
+            ids = list(unchecked.values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+            HabitCheckIn.objects.filter(id__in=ids).delete()
+            deleted += len(ids)
+
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} unchecked check-in row(s)'))
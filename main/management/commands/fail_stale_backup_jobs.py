@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from main.backup_jobs import fail_stale_jobs
+
+
+class Command(BaseCommand):
+    help = 'Mark backup / restore jobs lost to a restart or crash as failed (run at startup or from cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--timeout', type=int, default=None,
+            help='Seconds without a heartbeat after which an unfinished job counts as lost (default: BACKUP_JOB_TIMEOUT; 0 after a redeploy)'
+        )
+
+    def handle(self, *args, **options):
+        if options['timeout'] is not None and options['timeout'] < 0:
+            self.stdout.write(self.style.ERROR('Timeout must not be negative'))
+            return
+
+        backups, restores = fail_stale_jobs(timeout=options['timeout'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Marked {backups} backup(s) and {restores} restore(s) as failed'
+        ))
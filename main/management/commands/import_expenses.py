@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from main.balances import InsufficientBalance
+from main.imports import ExpenseImportError, IMPORT_BATCH_SIZE, detect_format, import_expenses, parse_expense_file
+from main.models import UserBalance, ExpenseBlock
+
+
+class Command(BaseCommand):
+    help = 'Bulk import expense items into an expense block from a CSV or JSON file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('block_id', type=int, help='Target ExpenseBlock id')
+        parser.add_argument('path', help='CSV (with header row) or JSON file')
+        parser.add_argument('--balance', type=int, help='Default UserBalance id for rows without an account')
+        parser.add_argument('--format', choices=['csv', 'json'], help='File format (default: from the file extension)')
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE, help='Rows per INSERT')
+
+    def handle(self, *args, **options):
+        try:
+            block = ExpenseBlock.objects.select_related('user').get(pk=options['block_id'])
+        except ExpenseBlock.DoesNotExist:
+            raise CommandError(f"Expense block {options['block_id']} not found")
+
+        default_balance = None
+        if options['balance']:
+            default_balance = UserBalance.objects.filter(
+                pk=options['balance'], user=block.user, status='active'
+            ).first()
+            if default_balance is None:
+                raise CommandError('Default account not found, inactive or owned by another user')
+
+        try:
+            with open(options['path'], encoding='utf-8-sig') as f:
+                content = f.read()
+        except OSError as e:
+            raise CommandError(str(e))
+
+        file_format = options['format'] or detect_format(options['path'])
+
+        try:
+            rows = parse_expense_file(content, file_format)
+            imported, total = import_expenses(block, rows, default_balance, batch_size=max(1, options['batch_size']))
+        except ExpenseImportError as e:
+            for error in e.errors:
+                self.stderr.write(self.style.ERROR(error))
+            raise CommandError(str(e))
+        except InsufficientBalance as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {imported} expense(s) totalling Rs. {total} into "{block.title}"'
+        ))
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from main.models import HabitBlock, HabitItem, HabitCheckIn
+
+
+class Command(BaseCommand):
+    help = 'Recompute HabitItem / HabitBlock completion counters from check-ins (backfill and drift repair)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='user_ids', help='Only rebuild this user id (repeatable)')
+
+    def handle(self, *args, **options):
+        items = HabitItem.objects.all()
+        blocks = HabitBlock.objects.all()
+        if options['user_ids']:
+            items = items.filter(habit_block__user_id__in=options['user_ids'])
+            blocks = blocks.filter(user_id__in=options['user_ids'])
+
+        # One UPDATE per table, each counting through a correlated subquery
+        checked_per_item = HabitCheckIn.objects.filter(
+            habit_item=OuterRef('pk'),
+            is_checked=True
+        ).order_by().values('habit_item').annotate(total=Count('id')).values('total')
+
+        checked_per_block = HabitCheckIn.objects.filter(
+            habit_item__habit_block=OuterRef('pk'),
+            is_checked=True
+        ).order_by().values('habit_item__habit_block').annotate(total=Count('id')).values('total')
+
+        habits_per_block = HabitItem.objects.filter(
+            habit_block=OuterRef('pk')
+        ).order_by().values('habit_block').annotate(total=Count('id')).values('total')
+
+        item_rows = items.update(
+            checked_count=Coalesce(Subquery(checked_per_item, output_field=IntegerField()), Value(0))
+        )
+        block_rows = blocks.update(
+            checked_count=Coalesce(Subquery(checked_per_block, output_field=IntegerField()), Value(0)),
+            habit_count=Coalesce(Subquery(habits_per_block, output_field=IntegerField()), Value(0))
+        )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt counters for {item_rows} habit(s) in {block_rows} block(s)'
+        ))
@@ -0,0 +1,45 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from main.rollups import rebuild_user_rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuild DailyAccountRollup rows from raw incomes and expenses, in parallel across users'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='user_ids', help='Only rebuild this user id (repeatable)')
+        parser.add_argument('--workers', type=int, default=min(8, os.cpu_count() or 1), help='Parallel worker threads')
+
+    def handle(self, *args, **options):
+        user_ids = options['user_ids'] or list(User.objects.values_list('id', flat=True))
+        workers = max(1, options['workers'])
+
+        total_rows = 0
+        failed = 0
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(self.rebuild_user, user_id): user_id for user_id in user_ids}
+            for future in as_completed(futures):
+                user_id = futures[future]
+                try:
+                    total_rows += future.result()
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(self.style.ERROR(f'User {user_id}: {e}'))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {total_rows} rollup rows for {len(user_ids) - failed} user(s) using {workers} worker(s)'
+        ))
+
+    @staticmethod
+    def rebuild_user(user_id):
+        # Each worker thread gets its own connection; close it when done
+        try:
+            return rebuild_user_rollups(user_id)
+        finally:
+            connection.close()
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, DecimalField, F, Sum, Value
+from django.db.models.functions import Coalesce
+
+from main.models import ExpenseBlock
+
+
+class Command(BaseCommand):
+    help = 'Check ExpenseBlock total_expense / item_count against their items and optionally repair drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repair', action='store_true', help='Rewrite drifted blocks with the recomputed values')
+        parser.add_argument('--user', type=int, action='append', dest='user_ids', help='Only check this user id (repeatable)')
+
+    def handle(self, *args, **options):
+        blocks = ExpenseBlock.objects.all()
+        if options['user_ids']:
+            blocks = blocks.filter(user_id__in=options['user_ids'])
+
+        # One grouped query: blocks whose stored figures disagree with their items
+        drifted = blocks.annotate(
+            actual_total=Coalesce(Sum('items__amount'), Value(0), output_field=DecimalField(max_digits=12, decimal_places=2)),
+            actual_count=Count('items')
+        ).exclude(
+            total_expense=F('actual_total'),
+            item_count=F('actual_count')
+        ).values('id', 'user_id', 'total_expense', 'actual_total', 'item_count', 'actual_count').order_by('id')
+
+        drifted = list(drifted)
+        for block in drifted:
+            self.stdout.write(self.style.WARNING(
+                f"Block {block['id']} (user {block['user_id']}): "
+                f"total {block['total_expense']} != {block['actual_total']}, "
+                f"items {block['item_count']} != {block['actual_count']}"
+            ))
+            if options['repair']:
+                ExpenseBlock.objects.filter(pk=block['id']).update(
+                    total_expense=block['actual_total'],
+                    item_count=block['actual_count']
+                )
+
+        if options['repair']:
+            self.stdout.write(self.style.SUCCESS(f'Repaired {len(drifted)} block(s)'))
+        elif drifted:
+            self.stdout.write(self.style.ERROR(f'{len(drifted)} block(s) drifted (run with --repair to fix)'))
+        else:
+            self.stdout.write(self.style.SUCCESS('All block totals match their items'))
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:54
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Existing rows start at 0; run_docker.sh backfills them with
+    # rebuild_rollups, verify_block_totals --repair and rebuild_habit_counters
+
+    dependencies = [
+        ('main', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='expenseblock',
+            name='item_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='habitblock',
+            name='habit_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='habitblock',
+            name='checked_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='habititem',
+            name='checked_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='DailyAccountRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('income_total', models.DecimalField(decimal_places=2, default=0.0, max_digits=14)),
+                ('expense_total', models.DecimalField(decimal_places=2, default=0.0, max_digits=14)),
+                ('txn_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to=settings.AUTH_USER_MODEL)),
+                ('balance_account', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='main.userbalance')),
+            ],
+            options={
+                'ordering': ['-date'],
+                'unique_together': {('user', 'balance_account', 'date')},
+            },
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:54
+
+from django.conf import settings
+from django.db import migrations, models
+
+from ExpTrac.migration_operations import AddIndexConcurrentlyIfPostgres
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction; building the
+    # indexes this way does not block writes on existing tables (on
+    # PostgreSQL; other databases, e.g. SQLite for tests, get plain indexes)
+    atomic = False
+
+    dependencies = [
+        ('main', '0002_rollups_and_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrentlyIfPostgres(
+            model_name='expenseblock',
+            index=models.Index(fields=['user', '-start_date', '-created_at'], name='expblock_user_start_idx'),
+        ),
+        AddIndexConcurrentlyIfPostgres(
+            model_name='expenseblock',
+            index=models.Index(condition=models.Q(('status', 'active')), fields=['user', 'start_date', 'end_date'], name='expblock_user_active_idx'),
+        ),
+        AddIndexConcurrentlyIfPostgres(
+            model_name='expenseblock',
+            index=models.Index(condition=models.Q(('status', 'active')), fields=['end_date'], name='expblock_active_end_idx'),
+        ),
+        AddIndexConcurrentlyIfPostgres(
+            model_name='expenseitem',
+            index=models.Index(fields=['expense_block', 'expense_date'], name='expitem_block_date_idx'),
+        ),
+        AddIndexConcurrentlyIfPostgres(
+            model_name='expenseitem',
+            index=models.Index(fields=['user_balance', 'expense_date'], name='expitem_balance_date_idx'),
+        ),
+        AddIndexConcurrentlyIfPostgres(
+            model_name='habitblock',
+            index=models.Index(fields=['user', '-start_date', '-created_at'], name='habitblock_user_start_idx'),
+        ),
+        AddIndexConcurrentlyIfPostgres(
+            model_name='habitblock',
+            index=models.Index(condition=models.Q(('status', 'active')), fields=['end_date'], name='habitblock_active_end_idx'),
+        ),
+        AddIndexConcurrentlyIfPostgres(
+            model_name='usergoal',
+            index=models.Index(condition=models.Q(('status__in', ['new', 'running'])), fields=['deadline'], name='goal_open_deadline_idx'),
+        ),
+        AddIndexConcurrentlyIfPostgres(
+            model_name='userincome',
+            index=models.Index(fields=['user', '-created_at'], name='income_user_created_idx'),
+        ),
+        AddIndexConcurrentlyIfPostgres(
+            model_name='userincome',
+            index=models.Index(fields=['balance_account', 'created_at'], name='income_balance_created_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0005_database_restore'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='databasebackup',
+            name='dump_format',
+            field=models.CharField(choices=[('plain', 'Plain SQL'), ('directory', 'Directory (parallel)')], default='plain', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='databaserestore',
+            name='dump_format',
+            field=models.CharField(choices=[('plain', 'Plain SQL'), ('directory', 'Directory (parallel)')], default='plain', max_length=10),
+        ),
+    ]
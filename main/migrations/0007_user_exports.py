@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0006_directory_backups'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='databasebackup',
+            name='dump_format',
+            field=models.CharField(choices=[('plain', 'Plain SQL'), ('directory', 'Directory (parallel)'), ('user', 'My data (NDJSON)')], default='plain', max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='databaserestore',
+            name='dump_format',
+            field=models.CharField(choices=[('plain', 'Plain SQL'), ('directory', 'Directory (parallel)'), ('user', 'My data (NDJSON)')], default='plain', max_length=10),
+        ),
+    ]
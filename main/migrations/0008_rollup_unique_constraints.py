@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:20
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def merge_duplicate_rows(apps, schema_editor):
+    """Fold concurrent duplicates of (user, NULL account, date) into one row"""
+    DailyAccountRollup = apps.get_model('main', 'DailyAccountRollup')
+    duplicates = DailyAccountRollup.objects.filter(
+        balance_account__isnull=True
+    ).values('user_id', 'date').annotate(
+        rows=Count('id'),
+        income=Sum('income_total'),
+        expense=Sum('expense_total'),
+        txns=Sum('txn_count')
+    ).filter(rows__gt=1).order_by()
+
+    for row in duplicates:
+        rollups = DailyAccountRollup.objects.filter(
+            user_id=row['user_id'], balance_account__isnull=True, date=row['date']
+        ).order_by('id')
+        keep = rollups.first()
+        rollups.exclude(pk=keep.pk).delete()
+        rollups.filter(pk=keep.pk).update(
+            income_total=row['income'], expense_total=row['expense'], txn_count=row['txns']
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0007_user_exports'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_rows, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='dailyaccountrollup',
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name='dailyaccountrollup',
+            constraint=models.UniqueConstraint(fields=('user', 'balance_account', 'date'), name='rollup_user_account_date_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailyaccountrollup',
+            constraint=models.UniqueConstraint(condition=models.Q(('balance_account__isnull', True)), fields=('user', 'date'), name='rollup_user_date_no_account_uniq'),
+        ),
+    ]
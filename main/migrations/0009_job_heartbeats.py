@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0008_rollup_unique_constraints'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='databasebackup',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='databaserestore',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -1,4 +1,6 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import User
 from datetime import datetime, timedelta, date
 from django.utils import timezone
@@ -75,12 +77,25 @@ class ExpenseBlock(models.Model):
     start_date = models.DateField()
     end_date = models.DateField()
     total_expense = models.DecimalField(max_digits=12, decimal_places=2, default=0.00)
+    item_count = models.PositiveIntegerField(default=0)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='active')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-start_date', '-created_at']
+        indexes = [
+            # Block list / report tree (keyset on start_date, created_at)
+            models.Index(fields=['user', '-start_date', '-created_at'], name='expblock_user_start_idx'),
+            # Active block covering a date
+            models.Index(
+                fields=['user', 'start_date', 'end_date'],
+                condition=models.Q(status='active'),
+                name='expblock_user_active_idx'
+            ),
+            # close_expired
+            models.Index(fields=['end_date'], condition=models.Q(status='active'), name='expblock_active_end_idx'),
+        ]
 
     def __str__(self):
         return f"{self.title or 'Expense Block'} ({self.start_date} - {self.end_date})"
@@ -117,23 +132,14 @@ class ExpenseBlock(models.Model):
             _, last_day = monthrange(start_date.year, start_date.month)
             return date(start_date.year, start_date.month, last_day)
     
-    def update_total(self):
-        """Update total expense from all items"""
-        total = self.items.aggregate(total=models.Sum('amount'))['total'] or 0
-        self.total_expense = total
-        self.save(update_fields=['total_expense', 'updated_at'])
-    
-    def check_and_close(self):
-        """Check if block should be closed based on current time"""
-        now = timezone.now()
-        
-        # Create end datetime (end_date 11:59 PM)
-        if now.date() > self.end_date or (now.date() == self.end_date and now.hour >= 23 and now.minute >= 59):
-            if self.status == 'active':
-                self.status = 'closed'
-                self.save(update_fields=['status', 'updated_at'])
-                return True
-        return False
+    @staticmethod
+    def apply_item_delta(block_id, amount=0, count=0):
+        """Add an item amount/count delta to a block with a single UPDATE"""
+        ExpenseBlock.objects.filter(pk=block_id).update(
+            total_expense=models.F('total_expense') + amount,
+            item_count=models.F('item_count') + count,
+            updated_at=timezone.now()
+        )
     
     @property
     def is_active(self):
@@ -146,10 +152,6 @@ class ExpenseBlock(models.Model):
         remaining = (self.end_date - date.today()).days
         return max(0, remaining)
     
-    @property
-    def item_count(self):
-        return self.items.count()
-    
     def get_expenses_by_day(self):
         """Get expenses grouped by day"""
         from collections import OrderedDict
@@ -206,6 +208,12 @@ class ExpenseItem(models.Model):
 
     class Meta:
         ordering = ['-expense_date', '-created_at']
+        indexes = [
+            # Block detail pages, day totals and day lists
+            models.Index(fields=['expense_block', 'expense_date'], name='expitem_block_date_idx'),
+            # Per-account date ranges (goals, rollup rebuilds)
+            models.Index(fields=['user_balance', 'expense_date'], name='expitem_balance_date_idx'),
+        ]
 
     def __str__(self):
         return f"{self.expense_name} - Rs. {self.amount}"
@@ -217,7 +225,58 @@ class ExpenseItem(models.Model):
             return self.user_balance.account_name
         return "N/A"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember what this row contributes to DailyAccountRollup
+        if not instance.get_deferred_fields() & {'user_balance_id', 'expense_date', 'amount'}:
+            from .rollups import expense_state
+            instance._rollup_state = expense_state(instance)
+        if not instance.get_deferred_fields() & {'expense_block_id', 'amount'}:
+            instance._block_state = (instance.expense_block_id, instance.amount)
+        return instance
+    
+    def _previous_rollup_state(self):
+        """Rollup contribution of this row as currently stored"""
+        if self._state.adding:
+            return None
+        if not hasattr(self, '_rollup_state'):
+            stored = ExpenseItem.objects.filter(pk=self.pk).first()
+            return getattr(stored, '_rollup_state', None)
+        return self._rollup_state
+    
+    def _previous_block_state(self):
+        """(block, amount) this row contributes to its block's totals as currently stored"""
+        if self._state.adding:
+            return None
+        if not hasattr(self, '_block_state'):
+            stored = ExpenseItem.objects.filter(pk=self.pk).only('expense_block_id', 'amount').first()
+            return getattr(stored, '_block_state', None)
+        return self._block_state
+    
+    def _apply_block_change(self, old, new):
+        """Move this row's amount/count from its old (block, amount) state to the new one"""
+        deltas = {}
+        if old:
+            amount, count = deltas.get(old[0], (0, 0))
+            deltas[old[0]] = (amount - old[1], count - 1)
+        if new:
+            amount, count = deltas.get(new[0], (0, 0))
+            deltas[new[0]] = (amount + new[1], count + 1)
+        
+        for block_id, (amount, count) in deltas.items():
+            if amount or count:
+                ExpenseBlock.apply_item_delta(block_id, amount=amount, count=count)
+        
+        # Keep the loaded block instance in step without reading it back
+        if ExpenseItem.expense_block.is_cached(self) and self.expense_block.pk in deltas:
+            amount, count = deltas[self.expense_block.pk]
+            self.expense_block.total_expense = Decimal(self.expense_block.total_expense) + amount
+            self.expense_block.item_count += count
+    
     def save(self, *args, **kwargs):
+        from .rollups import expense_state, record_change
+        
         if not self.expense_date:
             self.expense_date = date.today()
         
@@ -229,13 +288,25 @@ class ExpenseItem(models.Model):
         if self.user_balance:
             self.payment_method = self.user_balance.income_method
         
-        super().save(*args, **kwargs)
-        self.expense_block.update_total()
+        previous = self._previous_rollup_state()
+        previous_block = self._previous_block_state()
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            self._rollup_state = expense_state(self)
+            self._block_state = (self.expense_block_id, self.amount)
+            record_change(self.expense_block.user_id, previous, self._rollup_state, 'expense')
+            self._apply_block_change(previous_block, self._block_state)
     
     def delete(self, *args, **kwargs):
+        from .rollups import record_change
+        
         block = self.expense_block
-        super().delete(*args, **kwargs)
-        block.update_total()
+        previous = self._previous_rollup_state()
+        previous_block = self._previous_block_state()
+        with transaction.atomic():
+            super().delete(*args, **kwargs)
+            record_change(block.user_id, previous, None, 'expense')
+            self._apply_block_change(previous_block, None)
 
 
 
@@ -271,10 +342,116 @@ class UserIncome(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Income list (keyset on created_at) and dashboard date ranges
+            models.Index(fields=['user', '-created_at'], name='income_user_created_idx'),
+            # Per-account date ranges (goals, rollup rebuilds)
+            models.Index(fields=['balance_account', 'created_at'], name='income_balance_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.get_income_source_display()} - Rs. {self.amount} - {self.user.email}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember what this row contributes to DailyAccountRollup
+        if not instance.get_deferred_fields() & {'balance_account_id', 'created_at', 'amount'}:
+            from .rollups import income_state
+            instance._rollup_state = income_state(instance)
+        return instance
+    
+    def _previous_rollup_state(self):
+        """Rollup contribution of this row as currently stored"""
+        if self._state.adding:
+            return None
+        if not hasattr(self, '_rollup_state'):
+            stored = UserIncome.objects.filter(pk=self.pk).first()
+            return getattr(stored, '_rollup_state', None)
+        return self._rollup_state
+    
+    def save(self, *args, **kwargs):
+        from .rollups import income_state, record_change
+        
+        previous = self._previous_rollup_state()
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            self._rollup_state = income_state(self)
+            record_change(self.user_id, previous, self._rollup_state, 'income')
+    
+    def delete(self, *args, **kwargs):
+        from .rollups import record_change
+        
+        previous = self._previous_rollup_state()
+        with transaction.atomic():
+            super().delete(*args, **kwargs)
+            record_change(self.user_id, previous, None, 'income')
+
+
+class DailyAccountRollup(models.Model):
+    """
+    Daily income/expense totals per balance account.
+    Kept in step with every UserIncome / ExpenseItem write (see main/rollups.py)
+    so period totals read a few rows per day instead of scanning raw history.
+    Rebuild with: python manage.py rebuild_rollups
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_rollups')
+    balance_account = models.ForeignKey(
+        UserBalance,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='daily_rollups'
+    )
+    date = models.DateField()
+    income_total = models.DecimalField(max_digits=14, decimal_places=2, default=0.00)
+    expense_total = models.DecimalField(max_digits=14, decimal_places=2, default=0.00)
+    txn_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-date']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'balance_account', 'date'], name='rollup_user_account_date_uniq'),
+            # NULLs are distinct in a unique index, so expenses without an
+            # account need their own constraint to keep one row per day
+            models.UniqueConstraint(
+                fields=['user', 'date'],
+                condition=models.Q(balance_account__isnull=True),
+                name='rollup_user_date_no_account_uniq'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.date} - {self.balance_account_id} - {self.user_id}"
+
+
+class UserGoalQuerySet(models.QuerySet):
+    def with_progress(self):
+        """
+        Annotate income_total and expense_total on every goal using correlated
+        subqueries over the daily rollups of its balance_accounts. A whole page
+        of goals costs one query; savings, achievement rate and prediction are
+        then derived from these two values by the UserGoal methods without
+        further queries.
+        """
+        money = models.DecimalField(max_digits=12, decimal_places=2)
+
+        rollups = DailyAccountRollup.objects.filter(
+            user=OuterRef('user'),
+            balance_account__goals=OuterRef('pk'),
+            date__gte=OuterRef('start_date'),
+            date__lte=OuterRef('deadline')
+        ).order_by().values('user')
+
+        income = rollups.annotate(total=Sum('income_total')).values('total')
+        expense = rollups.annotate(total=Sum('expense_total')).values('total')
+
+        return self.annotate(
+            income_total=Coalesce(Subquery(income, output_field=money), Value(Decimal('0.00')), output_field=money),
+            expense_total=Coalesce(Subquery(expense, output_field=money), Value(Decimal('0.00')), output_field=money),
+        )
+
 
 class UserGoal(models.Model):
     STATUS_CHOICES = [
@@ -294,8 +471,18 @@ class UserGoal(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = UserGoalQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # close_expired: overdue goals still open
+            models.Index(
+                fields=['deadline'],
+                condition=models.Q(status__in=['new', 'running']),
+                name='goal_open_deadline_idx'
+            ),
+        ]
 
     def __str__(self):
         return f"{self.title} - Rs. {self.target_amount}"
@@ -333,7 +520,8 @@ class UserGoal(models.Model):
     
     def get_total_income(self):
         """Get total income within goal period from selected accounts"""
-        from django.db.models import Sum
+        if hasattr(self, 'income_total'):
+            return self.income_total
         total = UserIncome.objects.filter(
             user=self.user,
             balance_account__in=self.balance_accounts.all(),
@@ -344,7 +532,8 @@ class UserGoal(models.Model):
     
     def get_total_expense(self):
         """Get total expenses within goal period from selected accounts"""
-        from django.db.models import Sum
+        if hasattr(self, 'expense_total'):
+            return self.expense_total
         total = ExpenseItem.objects.filter(
             expense_block__user=self.user,
             user_balance__in=self.balance_accounts.all(),
@@ -421,11 +610,39 @@ class UserKeep(models.Model):
     
 
 class DatabaseBackup(models.Model):
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    COMPRESSION_CHOICES = [
+        ('none', 'None'),
+        ('gzip', 'gzip'),
+        ('zstd', 'Zstandard'),
+    ]
+
+    FORMAT_CHOICES = [
+        ('plain', 'Plain SQL'),
+        ('directory', 'Directory (parallel)'),
+        ('user', 'My data (NDJSON)'),
+    ]
+
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='backups')
     filename = models.CharField(max_length=255)
     file_path = models.FileField(upload_to='backups/')
     file_size = models.BigIntegerField(default=0)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='completed')
+    compression = models.CharField(max_length=10, choices=COMPRESSION_CHOICES, default='none')
+    dump_format = models.CharField(max_length=10, choices=FORMAT_CHOICES, default='plain')
+    bytes_processed = models.BigIntegerField(default=0)  # Dump bytes written so far
+    estimated_size = models.BigIntegerField(default=0)  # Database size when the dump started
+    checksum = models.CharField(max_length=64, blank=True)  # SHA-256 of the stored file
+    error = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)  # Last beat of the process holding the job
+    completed_at = models.DateTimeField(null=True, blank=True)
     notes = models.TextField(blank=True, null=True)
 
     class Meta:
@@ -447,6 +664,47 @@ class DatabaseBackup(models.Model):
             size /= 1024
         return f"{size:.2f} TB"
 
+    @property
+    def is_ready(self):
+        return self.status == 'completed'
+
+    def get_progress(self):
+        """Dump progress in percent, estimated from the database size"""
+        if self.status == 'completed':
+            return 100
+        if not self.estimated_size:
+            return 0
+        return min(99, int(self.bytes_processed * 100 / self.estimated_size))
+
+
+class DatabaseRestore(models.Model):
+    """A restore job, fed from a stored backup or streamed from an upload"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='restores')
+    backup = models.ForeignKey(DatabaseBackup, on_delete=models.SET_NULL, null=True, blank=True, related_name='restores')
+    filename = models.CharField(max_length=255)
+    compression = models.CharField(max_length=10, choices=DatabaseBackup.COMPRESSION_CHOICES, default='none')
+    dump_format = models.CharField(max_length=10, choices=DatabaseBackup.FORMAT_CHOICES, default='plain')
+    status = models.CharField(max_length=20, choices=DatabaseBackup.STATUS_CHOICES, default='pending')
+    bytes_total = models.BigIntegerField(default=0)  # Size of the (compressed) input, when known
+    bytes_processed = models.BigIntegerField(default=0)  # Input bytes fed to psql so far
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)  # Last beat of the process holding the job
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Restore of {self.filename} - {self.user.email}"
+
+    def get_progress(self):
+        if self.status == 'completed':
+            return 100
+        if not self.bytes_total:
+            return 0
+        return min(99, int(self.bytes_processed * 100 / self.bytes_total))
+
 
 
 class HabitBlock(models.Model):
@@ -475,11 +733,19 @@ class HabitBlock(models.Model):
     start_date = models.DateField()
     end_date = models.DateField()
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='active')
+    habit_count = models.PositiveIntegerField(default=0)
+    checked_count = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-start_date', '-created_at']
+        indexes = [
+            # Habit block list
+            models.Index(fields=['user', '-start_date', '-created_at'], name='habitblock_user_start_idx'),
+            # close_expired
+            models.Index(fields=['end_date'], condition=models.Q(status='active'), name='habitblock_active_end_idx'),
+        ]
 
     def __str__(self):
         return f"{self.title} ({self.start_date} - {self.end_date})"
@@ -493,24 +759,10 @@ class HabitBlock(models.Model):
             days_until_saturday = 7
         return start_date + timedelta(days=days_until_saturday)
     
-    def check_and_close(self):
-        """Check if block should be closed based on current time"""
-        now = timezone.now()
-        if now.date() > self.end_date or (now.date() == self.end_date and now.hour >= 23 and now.minute >= 59):
-            if self.status == 'active':
-                self.status = 'closed'
-                self.save(update_fields=['status', 'updated_at'])
-                return True
-        return False
-    
     @property
     def is_active(self):
         return self.status == 'active'
     
-    @property
-    def habit_count(self):
-        return self.habits.count()
-    
     @property
     def days_remaining(self):
         if self.status == 'closed':
@@ -518,6 +770,12 @@ class HabitBlock(models.Model):
         remaining = (self.end_date - date.today()).days
         return max(0, remaining)
     
+    def get_days_to_date(self, today=None):
+        """Number of block days up to and including today"""
+        today = today or date.today()
+        last_day = min(today, self.end_date)
+        return max(0, (last_day - self.start_date).days + 1)
+    
     def get_week_days(self):
         """Get list of days from starting_day to Saturday"""
         day_order = ['sunday', 'monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday']
@@ -547,28 +805,38 @@ class HabitBlock(models.Model):
         
         return days
     
-    def get_completion_rate(self):
-        """Calculate overall completion rate"""
-        total_possible = 0
-        total_checked = 0
-        
-        today = date.today()
-        
-        for habit in self.habits.all():
-            for checkin in habit.checkins.filter(check_date__lte=today):
-                total_possible += 1
-                if checkin.is_checked:
-                    total_checked += 1
+    def create_habits(self, habit_names):
+        """
+        Create the block's habits with one bulk INSERT (call inside
+        transaction.atomic()). Check-ins are sparse: a row is only stored
+        when a habit is actually checked, see HabitItem.check_in().
+        """
+        habits = HabitItem.objects.bulk_create([
+            HabitItem(habit_block=self, habit_name=habit_name)
+            for habit_name in habit_names
+        ])
+        HabitBlock.objects.filter(pk=self.pk).update(habit_count=models.F('habit_count') + len(habits))
+        self.habit_count += len(habits)
+        return habits
+    
+    def get_completion_rate(self, today=None):
+        """
+        Overall completion rate from the stored counters.
+        Only today's check-in can be checked, so every checked check-in is
+        already within the days counted so far.
+        """
+        total_possible = self.habit_count * self.get_days_to_date(today)
         
         if total_possible == 0:
             return 0
-        return round((total_checked / total_possible) * 100)
+        return round((self.checked_count / total_possible) * 100)
 
 
 class HabitItem(models.Model):
     """Individual habit to track within a habit block"""
     habit_block = models.ForeignKey(HabitBlock, on_delete=models.CASCADE, related_name='habits')
     habit_name = models.CharField(max_length=100)
+    checked_count = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -579,25 +847,45 @@ class HabitItem(models.Model):
         return self.habit_name
     
     def get_checkin_for_date(self, check_date):
-        """Get or create checkin for a specific date"""
+        """Get the checkin for a specific date, or None if the habit was not checked"""
+        return self.checkins.filter(check_date=check_date, is_checked=True).first()
+    
+    def check_in(self, check_date):
+        """
+        Store a checked check-in for the date and bump the counters.
+        Returns the check-in, or None if the date was already checked.
+        """
         days = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
-        day_name = days[check_date.weekday()]
         
-        checkin, created = HabitCheckIn.objects.get_or_create(
-            habit_item=self,
-            check_date=check_date,
-            defaults={'day_name': day_name}
-        )
+        with transaction.atomic():
+            checkin, created = HabitCheckIn.objects.get_or_create(
+                habit_item=self,
+                check_date=check_date,
+                defaults={
+                    'day_name': days[check_date.weekday()],
+                    'is_checked': True,
+                    'checked_at': timezone.now(),
+                }
+            )
+            checkin.habit_item = self
+            if not created:
+                # Unchecked row from before sparse storage, or a double submit
+                return checkin if checkin.mark_checked() else None
+            
+            HabitCheckIn.increment_counters(self)
         return checkin
     
     def get_completion_count(self):
         """Get number of days completed"""
-        return self.checkins.filter(is_checked=True).count()
+        return self.checked_count
     
-    def get_total_days(self):
-        """Get total days up to today"""
-        today = date.today()
-        return self.checkins.filter(check_date__lte=today).count()
+    def get_total_days(self, today=None):
+        """
+        Block days from start_date up to today (or end_date), computed from
+        the dates: check-ins are stored only for checked days, so they cannot
+        be counted. Pairs with checked_count for completion rates.
+        """
+        return self.habit_block.get_days_to_date(today)
 
 
 class HabitCheckIn(models.Model):
@@ -626,4 +914,38 @@ class HabitCheckIn(models.Model):
 
     def __str__(self):
         status = "✓" if self.is_checked else "✗"
-        return f"{self.habit_item.habit_name} - {self.check_date} [{status}]"
\ No newline at end of file
+        return f"{self.habit_item.habit_name} - {self.check_date} [{status}]"
+    
+    def mark_checked(self):
+        """
+        Check a stored, unchecked check-in and bump the habit and block counters.
+        The UPDATE only matches an unchecked row, so a double submit is
+        counted once. Returns False if it was already checked.
+        """
+        now = timezone.now()
+        habit_item = self.habit_item
+        
+        with transaction.atomic():
+            flipped = HabitCheckIn.objects.filter(pk=self.pk, is_checked=False).update(
+                is_checked=True,
+                checked_at=now,
+                updated_at=now
+            )
+            if not flipped:
+                return False
+            HabitCheckIn.increment_counters(habit_item)
+        
+        self.is_checked = True
+        self.checked_at = now
+        return True
+    
+    @staticmethod
+    def increment_counters(habit_item):
+        """Count one more checked day on the habit and its block"""
+        HabitItem.objects.filter(pk=habit_item.pk).update(checked_count=models.F('checked_count') + 1)
+        HabitBlock.objects.filter(pk=habit_item.habit_block_id).update(checked_count=models.F('checked_count') + 1)
+        
+        # Keep the loaded instances in step without reading them back
+        habit_item.checked_count += 1
+        if HabitItem.habit_block.is_cached(habit_item):
+            habit_item.habit_block.checked_count += 1
\ No newline at end of file
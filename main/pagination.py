@@ -0,0 +1,218 @@
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(values, position=None):
+    """
+    Opaque, URL-safe cursor for the ordering values of the last row on a page.
+    `position` (the row's 1-based index in the full listing) is optional and
+    only used for display, e.g. serial numbers.
+    """
+    def encode_value(value):
+        # isoformat() keeps full microseconds so equality on the boundary row holds
+        if isinstance(value, (date, datetime)):
+            return value.isoformat()
+        if isinstance(value, Decimal):
+            return str(value)
+        return value
+
+    data = [encode_value(value) for value in values]
+    if position is not None:
+        data = {'k': data, 'p': position}
+    raw = json.dumps(data)
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor, size, with_position=False):
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+    except (ValueError, UnicodeError):
+        raise InvalidCursor('Invalid cursor')
+
+    position = None
+    if isinstance(data, dict):
+        values, position = data.get('k'), data.get('p')
+    else:
+        values = data
+
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursor('Invalid cursor')
+
+    if with_position:
+        if not isinstance(position, int) or position < 1:
+            position = None
+        return values, position
+    return values
+
+
+def keyset_filter(ordering, values):
+    """
+    Q matching rows strictly after `values` in `ordering`, e.g. for
+    ('-created_at', '-id'): created_at < v0 OR (created_at = v0 AND id < v1).
+    """
+    condition = Q()
+    equal_so_far = Q()
+
+    for field_name, value in zip(ordering, values):
+        descending = field_name.startswith('-')
+        name = field_name.lstrip('-')
+        lookup = 'lt' if descending else 'gt'
+
+        condition |= equal_so_far & Q(**{f'{name}__{lookup}': value})
+        equal_so_far &= Q(**{name: value})
+
+    return condition
+
+
+def keyset_page(queryset, ordering, cursor=None, limit=50):
+    """
+    Fetch one page of `queryset` ordered by `ordering` (which must end in a
+    unique field such as 'id'), starting after `cursor`.
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    Each page costs one query and never uses OFFSET, so deep pages are as
+    cheap as the first one.
+    """
+    queryset = queryset.order_by(*ordering)
+    if cursor:
+        values = decode_cursor(cursor, len(ordering))
+        queryset = _filter_after(queryset, ordering, values)
+
+    rows = list(queryset[:limit + 1])
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    next_cursor = encode_cursor([
+        getattr(last, field_name.lstrip('-')) for field_name in ordering
+    ])
+    return rows, next_cursor
+
+
+def parse_limit(value, default=50, maximum=200):
+    """Page size from a query string value, clamped to [1, maximum]"""
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(limit, maximum))
+
+
+# ============================================
+# Template pages
+# ============================================
+class CursorPage:
+    """
+    One keyset page for templates. Mirrors the parts of Django's Page the
+    templates use (iteration, has_next / has_previous, start_index /
+    end_index) but links with cursors instead of page numbers.
+    """
+    def __init__(self, rows, next_cursor=None, previous_cursor=None, start_index=1):
+        self.object_list = rows
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self._start = start_index
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    def start_index(self):
+        return self._start if self.object_list else 0
+
+    def end_index(self):
+        return self._start + len(self.object_list) - 1 if self.object_list else 0
+
+
+def cursor_page(queryset, ordering, params, per_page=50):
+    """
+    CursorPage for the `cursor` (rows after) or `before` (rows before) query
+    parameter in `params`. Like keyset_page, every page costs one query with
+    no COUNT(*) or OFFSET. Invalid or exhausted cursors fall back to the
+    first page.
+    """
+    after = params.get('cursor')
+    before = params.get('before')
+
+    try:
+        if before:
+            page = _page_before(queryset, ordering, before, per_page)
+        elif after:
+            page = _page_after(queryset, ordering, after, per_page)
+        else:
+            page = None
+    except InvalidCursor:
+        page = None
+
+    if page is None or not page.object_list:
+        page = _page_after(queryset, ordering, None, per_page)
+    return page
+
+
+def _row_values(row, ordering):
+    return [getattr(row, field_name.lstrip('-')) for field_name in ordering]
+
+
+def _page_after(queryset, ordering, cursor, per_page):
+    queryset = queryset.order_by(*ordering)
+    start = 1
+    if cursor:
+        values, position = decode_cursor(cursor, len(ordering), with_position=True)
+        start = (position or 0) + 1
+        queryset = _filter_after(queryset, ordering, values)
+
+    rows = list(queryset[:per_page + 1])
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        next_cursor = encode_cursor(_row_values(rows[-1], ordering), start + per_page - 1)
+
+    previous_cursor = None
+    if cursor and rows:
+        previous_cursor = encode_cursor(_row_values(rows[0], ordering), start)
+    return CursorPage(rows, next_cursor, previous_cursor, start)
+
+
+def _page_before(queryset, ordering, cursor, per_page):
+    # Walk the reversed ordering from the cursor, then flip the rows back
+    reverse = [name[1:] if name.startswith('-') else f'-{name}' for name in ordering]
+    values, position = decode_cursor(cursor, len(ordering), with_position=True)
+
+    queryset = _filter_after(queryset.order_by(*reverse), reverse, values)
+    rows = list(queryset[:per_page + 1])
+    has_previous = len(rows) > per_page
+    rows = list(reversed(rows[:per_page]))
+    if not rows:
+        return None
+
+    start = max(1, (position or 1) - len(rows)) if has_previous else 1
+    previous_cursor = encode_cursor(_row_values(rows[0], ordering), start) if has_previous else None
+    next_cursor = encode_cursor(_row_values(rows[-1], ordering), start + len(rows) - 1)
+    return CursorPage(rows, next_cursor, previous_cursor, start)
+
+
+def _filter_after(queryset, ordering, values):
+    try:
+        return queryset.filter(keyset_filter(ordering, values))
+    except (TypeError, ValueError, ValidationError):
+        raise InvalidCursor('Invalid cursor')
@@ -0,0 +1,85 @@
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import Count, Sum
+
+from .models import ExpenseBlock, ExpenseItem
+
+
+def get_block_day_totals(user, block_ids=None):
+    """
+    Expense total and item count per (block, date) for a user, in one grouped
+    query. Returns {block_id: {date: {'total': Decimal, 'count': int}}}.
+    """
+    rows = ExpenseItem.objects.filter(expense_block__user=user)
+    if block_ids is not None:
+        rows = rows.filter(expense_block_id__in=block_ids)
+
+    rows = rows.values('expense_block_id', 'expense_date').annotate(
+        total=Sum('amount'),
+        count=Count('id')
+    ).order_by()
+
+    day_totals = defaultdict(dict)
+    for row in rows:
+        day_totals[row['expense_block_id']][row['expense_date']] = {
+            'total': row['total'],
+            'count': row['count'],
+        }
+    return day_totals
+
+
+def serialize_block_days(block, day_totals):
+    """One entry per day of the block, with zero for days without expenses"""
+    days_list = []
+    current_date = block.start_date
+    while current_date <= block.end_date:
+        day_name = ExpenseBlock.get_day_name(current_date)
+        day = day_totals.get(current_date, {'total': Decimal('0.00'), 'count': 0})
+
+        days_list.append({
+            'name': day_name,
+            'display': day_name.capitalize(),
+            'date': current_date.strftime('%Y-%m-%d'),
+            'date_display': current_date.strftime('%b %d, %Y'),
+            'expense_count': day['count'],
+            'total': float(day['total']),
+        })
+        current_date += timedelta(days=1)
+
+    return days_list
+
+
+def serialize_block(block):
+    """Report tree node for one expense block (summary only)"""
+    return {
+        'id': block.id,
+        'title': block.title,
+        'expense_type': block.expense_type,
+        'expense_type_display': block.get_expense_type_display(),
+        'status': block.status,
+        'status_display': block.get_status_display(),
+        'start_date': block.start_date.strftime('%b %d'),
+        'end_date': block.end_date.strftime('%b %d, %Y'),
+        'total_expense': float(block.total_expense),
+        'item_count': block.item_count,
+    }
+
+
+def serialize_item(item):
+    """Report table row for one expense item"""
+    return {
+        'id': item.id,
+        'block_id': item.expense_block_id,
+        'expense_name': item.expense_name,
+        'amount': float(item.amount),
+        'account_name': item.account_name,
+        'payment_method': item.get_payment_method_display(),
+        'expense_day': item.expense_day,
+        'expense_day_display': item.expense_day.capitalize(),
+        'expense_date': item.expense_date.strftime('%Y-%m-%d'),
+        'expense_date_display': item.expense_date.strftime('%b %d, %Y'),
+        'notes': item.notes or '',
+        'created_at': item.created_at.strftime('%I:%M %p'),
+    }
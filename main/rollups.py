@@ -0,0 +1,193 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import DailyAccountRollup, UserIncome, ExpenseItem
+
+
+# ============================================
+# Incremental maintenance
+# ============================================
+def lock_user_rollups(user_id):
+    """
+    Serialize rollup writes for one user on their auth_user row (call inside
+    a transaction). Deltas and rebuilds both take it, so a delta lands wholly
+    before or after a rebuild instead of being lost or counted twice.
+    """
+    list(User.objects.select_for_update().filter(pk=user_id).values_list('pk', flat=True))
+
+
+def apply_delta(user_id, balance_account_id, day, income=0, expense=0, txn_count=0):
+    """
+    Add income/expense/count deltas to one (user, account, date) rollup row
+    with a single UPDATE, creating the row the first time that day is touched.
+    """
+    if not (income or expense or txn_count):
+        return
+
+    rows = DailyAccountRollup.objects.filter(
+        user_id=user_id,
+        balance_account_id=balance_account_id,
+        date=day
+    )
+    deltas = {
+        'income_total': F('income_total') + income,
+        'expense_total': F('expense_total') + expense,
+        'txn_count': F('txn_count') + txn_count,
+    }
+
+    with transaction.atomic():
+        lock_user_rollups(user_id)
+        if rows.update(**deltas):
+            if txn_count < 0:
+                # Drop days that no longer have any transactions
+                rows.filter(txn_count__lte=0).delete()
+            return
+        try:
+            with transaction.atomic():
+                DailyAccountRollup.objects.create(
+                    user_id=user_id,
+                    balance_account_id=balance_account_id,
+                    date=day,
+                    income_total=income,
+                    expense_total=expense,
+                    txn_count=txn_count
+                )
+        except IntegrityError:
+            # Another request created the row first
+            rows.update(**deltas)
+
+
+def record_change(user_id, old, new, field):
+    """
+    Move a money row's contribution from its old (account, date, amount)
+    state to the new one. Either side may be None for inserts and deletes.
+    `field` is 'income' or 'expense'.
+    """
+    if old and new and old[:2] == new[:2]:
+        # Same account and day: only the amount moved
+        apply_delta(user_id, new[0], new[1], **{field: new[2] - old[2]})
+        return
+
+    if old:
+        apply_delta(user_id, old[0], old[1], txn_count=-1, **{field: -old[2]})
+    if new:
+        apply_delta(user_id, new[0], new[1], txn_count=1, **{field: new[2]})
+
+
+def income_state(income):
+    """(account, local date, amount) an income contributes to the rollup"""
+    return (income.balance_account_id, timezone.localdate(income.created_at), income.amount)
+
+
+def expense_state(item):
+    """(account, date, amount) an expense item contributes to the rollup"""
+    return (item.user_balance_id, item.expense_date, item.amount)
+
+
+def remove_block_items(block):
+    """Subtract every item of an expense block (used before cascade deletes)"""
+    rows = ExpenseItem.objects.filter(
+        expense_block=block
+    ).values('user_balance_id', 'expense_date').annotate(
+        total=Sum('amount'),
+        count=Count('id')
+    ).order_by()
+
+    for row in rows:
+        apply_delta(
+            block.user_id,
+            row['user_balance_id'],
+            row['expense_date'],
+            expense=-row['total'],
+            txn_count=-row['count']
+        )
+
+
+def detach_balance_items(balance):
+    """
+    Move a balance's expense items to the no-account rollup rows before the
+    balance is deleted: its rollup rows cascade away, while its items
+    survive with user_balance set to NULL.
+    """
+    rows = ExpenseItem.objects.filter(
+        user_balance=balance
+    ).values('expense_date').annotate(
+        total=Sum('amount'),
+        count=Count('id')
+    ).order_by()
+
+    for row in rows:
+        apply_delta(
+            balance.user_id,
+            None,
+            row['expense_date'],
+            expense=row['total'],
+            txn_count=row['count']
+        )
+
+
+# ============================================
+# Full rebuild
+# ============================================
+def rebuild_user_rollups(user_id):
+    """
+    Recompute all rollup rows for one user from raw incomes and expenses.
+    Safe while the app takes writes: the user's rollup lock is held from
+    reading the raw rows until the new rollups are in place.
+    """
+    with transaction.atomic():
+        lock_user_rollups(user_id)
+        return _rebuild_user_rollups(user_id)
+
+
+def _rebuild_user_rollups(user_id):
+    totals = defaultdict(lambda: {'income': Decimal('0.00'), 'expense': Decimal('0.00'), 'count': 0})
+
+    incomes = UserIncome.objects.filter(
+        user_id=user_id
+    ).annotate(
+        day=TruncDate('created_at')
+    ).values('balance_account_id', 'day').annotate(
+        total=Sum('amount'),
+        count=Count('id')
+    ).order_by()
+
+    for row in incomes:
+        entry = totals[(row['balance_account_id'], row['day'])]
+        entry['income'] += row['total']
+        entry['count'] += row['count']
+
+    expenses = ExpenseItem.objects.filter(
+        expense_block__user_id=user_id
+    ).values('user_balance_id', 'expense_date').annotate(
+        total=Sum('amount'),
+        count=Count('id')
+    ).order_by()
+
+    for row in expenses:
+        entry = totals[(row['user_balance_id'], row['expense_date'])]
+        entry['expense'] += row['total']
+        entry['count'] += row['count']
+
+    rollups = [
+        DailyAccountRollup(
+            user_id=user_id,
+            balance_account_id=account_id,
+            date=day,
+            income_total=entry['income'],
+            expense_total=entry['expense'],
+            txn_count=entry['count']
+        )
+        for (account_id, day), entry in totals.items()
+    ]
+
+    DailyAccountRollup.objects.filter(user_id=user_id).delete()
+    DailyAccountRollup.objects.bulk_create(rollups, batch_size=1000)
+
+    return len(rollups)
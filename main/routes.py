@@ -5,6 +5,7 @@ urlpatterns = [
 
     #!================== DASHBOARD ========================== 
     path('dashboard/', views.dashboard_view, name='dashboard_view'),
+    path('dashboard/cache-stats/', views.dashboard_cache_stats, name='dashboard_cache_stats'),
 
 
     #!================= BALANCE MANAGEMENT ==========================
@@ -21,6 +22,7 @@ urlpatterns = [
     path('expenses/<int:block_id>/', views.expense_detail_view, name='expense_detail_view'),
     path('expenses/<int:block_id>/update/', views.update_expense_block, name='update_expense_block'),
     path('expenses/<int:block_id>/add/', views.add_expense_item, name='add_expense_item'),
+    path('expenses/<int:block_id>/import/', views.import_expense_items, name='import_expense_items'),
     path('expenses/item/<int:item_id>/update/', views.update_expense_item, name='update_expense_item'),
     path('expenses/item/<int:item_id>/get/', views.get_expense_item, name='get_expense_item'),
 
@@ -44,6 +46,9 @@ urlpatterns = [
     # !================= REPORTS ========================== 
     path('report/', views.report_view, name='report_view'),
     path('report/expenses/<int:block_id>/<str:day>/', views.get_day_expenses, name='get_day_expenses'),
+    path('report/api/blocks/', views.report_blocks_api, name='report_blocks_api'),
+    path('report/api/blocks/<int:block_id>/days/', views.report_block_days_api, name='report_block_days_api'),
+    path('report/api/blocks/<int:block_id>/items/', views.report_items_api, name='report_items_api'),
 
 
     #!================= KEEP MANAGEMENT ==========================
@@ -57,8 +62,10 @@ urlpatterns = [
     #!================= BACKUP MANAGEMENT ==========================
     path('backup/', database_backup.backup_view, name='backup_view'),
     path('backup/create/', database_backup.create_backup, name='create_backup'),
+    path('backup/status/<int:backup_id>/', database_backup.backup_status, name='backup_status'),
     path('backup/download/<int:backup_id>/', database_backup.download_backup, name='download_backup'),
     path('backup/restore/', database_backup.restore_backup, name='restore_backup'),
+    path('backup/restore/status/<int:restore_id>/', database_backup.restore_status, name='restore_status'),
     path('backup/delete/<int:backup_id>/', database_backup.delete_backup, name='delete_backup'),
     path('backup/get/<int:backup_id>/', database_backup.get_backup, name='get_backup'),
     path('backup/list/', database_backup.get_all_backups, name='get_all_backups'),
@@ -67,8 +74,9 @@ urlpatterns = [
      # !================= HABIT MANAGEMENT ==========================
     path('habits/', views.habits_view, name='habits_view'),
     path('habits/create/', views.create_habit_block, name='create_habit_block'),
+    path('habits/analytics/', views.habit_analytics, name='habit_analytics'),
     path('habits/<int:block_id>/', views.habit_detail_view, name='habit_detail_view'),
     path('habits/<int:block_id>/update/', views.update_habit_block, name='update_habit_block'),
     path('habits/<int:block_id>/delete/', views.delete_habit_block, name='delete_habit_block'),
-    path('habits/<int:block_id>/check/<int:checkin_id>/', views.check_habit, name='check_habit'),
+    path('habits/<int:block_id>/habit/<int:habit_id>/check/', views.check_habit, name='check_habit'),
 ]
\ No newline at end of file
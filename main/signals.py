@@ -0,0 +1,54 @@
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
+from django.dispatch import receiver
+
+from .models import UserBalance, UserIncome, ExpenseBlock, ExpenseItem, UserGoal
+from .dashboard import invalidate_dashboard
+from .rollups import detach_balance_items, remove_block_items
+
+
+# ============================================
+# Dashboard snapshot invalidation
+# ============================================
+@receiver(post_save, sender=UserBalance)
+@receiver(post_delete, sender=UserBalance)
+@receiver(post_save, sender=UserIncome)
+@receiver(post_delete, sender=UserIncome)
+@receiver(post_save, sender=ExpenseBlock)
+@receiver(post_delete, sender=ExpenseBlock)
+@receiver(post_save, sender=UserGoal)
+@receiver(post_delete, sender=UserGoal)
+def invalidate_user_dashboard(sender, instance, **kwargs):
+    invalidate_dashboard(instance.user_id)
+
+
+@receiver(post_save, sender=ExpenseItem)
+@receiver(post_delete, sender=ExpenseItem)
+def invalidate_expense_dashboard(sender, instance, **kwargs):
+    try:
+        user_id = instance.expense_block.user_id
+    except ExpenseBlock.DoesNotExist:
+        # Deleted along with its block, which invalidates on its own
+        return
+    invalidate_dashboard(user_id)
+
+
+@receiver(m2m_changed, sender=UserGoal.balance_accounts.through)
+def invalidate_goal_accounts_dashboard(sender, instance, action, **kwargs):
+    # instance is the goal, or the balance when changed from the reverse side
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_dashboard(instance.user_id)
+
+
+# ============================================
+# Daily rollup maintenance
+# ============================================
+@receiver(pre_delete, sender=ExpenseBlock)
+def remove_block_from_rollups(sender, instance, **kwargs):
+    # Items are cascade-deleted without ExpenseItem.delete(), so subtract them here
+    remove_block_items(instance)
+
+
+@receiver(pre_delete, sender=UserBalance)
+def move_balance_items_in_rollups(sender, instance, **kwargs):
+    # The balance's rollup rows cascade away; its items stay, without an account
+    detach_balance_items(instance)
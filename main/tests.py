@@ -1,3 +1,689 @@
+import json
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock, skipUnless
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.test import TestCase
+from django.utils import timezone
+
+from accounts.models import LoginAttempt
+from .models import (
+    UserBalance, ExpenseBlock, ExpenseItem, UserIncome, UserGoal,
+    HabitBlock, HabitItem, HabitCheckIn, DailyAccountRollup, DatabaseBackup, DatabaseRestore, UserKeep
+)
+from . import backup_jobs
+from .balances import InsufficientBalance, debit
+from .pagination import InvalidCursor, cursor_page, encode_cursor, keyset_page
+from .rollups import rebuild_user_rollups
+from .user_export import RECORD_TYPES, import_user_data, iter_user_export
+
+
+# ============================================
+# Hot query plans
+# ============================================
+@skipUnless(connection.vendor == 'postgresql', 'Query plans are checked on PostgreSQL only')
+class HotQueryIndexTests(TestCase):
+    """
+    Run EXPLAIN on every hot filter path against seeded data and fail when
+    one of them has to fall back to a sequential scan of its table.
+    Sequential scans are disabled for the check, so a Seq Scan in the plan
+    means no index can serve the query at all.
+    """
+    USERS = 10
+    BLOCKS_PER_USER = 30
+    ITEMS_PER_BLOCK = 10
+    INCOMES_PER_USER = 200
+
+    @classmethod
+    def setUpTestData(cls):
+        today = date.today()
+        now = timezone.now()
+
+        users = User.objects.bulk_create([
+            User(username=f'user{n}', email=f'user{n}@example.com') for n in range(cls.USERS)
+        ])
+        balances = UserBalance.objects.bulk_create([
+            UserBalance(user=user, account_name=f'Account {n}', account_number=f'{user.id}{n}')
+            for user in users for n in range(2)
+        ])
+
+        blocks = ExpenseBlock.objects.bulk_create([
+            ExpenseBlock(
+                user=user,
+                title=f'Week {n}',
+                start_date=today - timedelta(days=7 * n + 6),
+                end_date=today - timedelta(days=7 * n),
+                status='active' if n == 0 else 'closed'
+            )
+            for user in users for n in range(cls.BLOCKS_PER_USER)
+        ])
+        user_balances = {}
+        for balance in balances:
+            user_balances.setdefault(balance.user_id, []).append(balance)
+
+        ExpenseItem.objects.bulk_create([
+            ExpenseItem(
+                expense_block=block,
+                user_balance=user_balances[block.user_id][n % 2],
+                expense_name=f'Item {n}',
+                amount=Decimal('10.00'),
+                expense_day='sunday',
+                expense_date=block.start_date + timedelta(days=n % 7)
+            )
+            for block in blocks for n in range(cls.ITEMS_PER_BLOCK)
+        ])
+
+        UserIncome.objects.bulk_create([
+            UserIncome(
+                user=user,
+                balance_account=user_balances[user.id][n % 2],
+                income_source='salary',
+                amount=Decimal('100.00')
+            )
+            for user in users for n in range(cls.INCOMES_PER_USER)
+        ])
+
+        UserGoal.objects.bulk_create([
+            UserGoal(
+                user=user,
+                title=f'Goal {n}',
+                target_amount=Decimal('1000.00'),
+                start_date=today - timedelta(days=60),
+                deadline=today + timedelta(days=30 - n * 10),
+                status='running' if n % 2 else 'completed'
+            )
+            for user in users for n in range(6)
+        ])
+
+        habit_blocks = HabitBlock.objects.bulk_create([
+            HabitBlock(
+                user=user,
+                title=f'Habits {n}',
+                starting_day='sunday',
+                start_date=today - timedelta(days=7 * n + 6),
+                end_date=today - timedelta(days=7 * n),
+                status='active' if n == 0 else 'closed'
+            )
+            for user in users for n in range(10)
+        ])
+        habits = HabitItem.objects.bulk_create([
+            HabitItem(habit_block=block, habit_name=f'Habit {n}')
+            for block in habit_blocks for n in range(3)
+        ])
+        HabitCheckIn.objects.bulk_create([
+            HabitCheckIn(
+                habit_item=habit,
+                check_date=habit.habit_block.start_date + timedelta(days=n),
+                day_name='sunday',
+                is_checked=True
+            )
+            for habit in habits for n in range(0, 7, 2)
+        ])
+
+        LoginAttempt.objects.bulk_create([
+            LoginAttempt(email=f'user{n % 50}@example.com', ip_address='127.0.0.1', was_successful=n % 3 == 0)
+            for n in range(2000)
+        ])
+
+        cls.user = users[0]
+        cls.balance = user_balances[cls.user.id][0]
+        cls.block = blocks[0]
+        cls.habit = habits[0]
+        cls.today = today
+        cls.now = now
+
+    def setUp(self):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+            cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def hot_queries(self):
+        today = self.today
+        return {
+            'expense block list': (
+                ExpenseBlock.objects.filter(user=self.user).order_by('-start_date', '-created_at', '-id')[:11]
+            ),
+            'active expense block on a date': ExpenseBlock.objects.filter(
+                user=self.user, status='active', start_date__lte=today, end_date__gte=today
+            ),
+            'expired expense blocks': ExpenseBlock.objects.filter(status='active', end_date__lt=today),
+            'expense items of a block day': ExpenseItem.objects.filter(
+                expense_block=self.block, expense_date=self.block.start_date
+            ),
+            'expense items of an account': ExpenseItem.objects.filter(
+                user_balance=self.balance,
+                expense_date__gte=today - timedelta(days=30),
+                expense_date__lte=today
+            ),
+            'income list': UserIncome.objects.filter(user=self.user).order_by('-created_at', '-id')[:51],
+            'income of an account': UserIncome.objects.filter(
+                balance_account=self.balance,
+                created_at__gte=self.now - timedelta(days=30)
+            ),
+            'recent failed logins': LoginAttempt.objects.filter(
+                email='user1@example.com',
+                was_successful=False,
+                attempt_time__gte=self.now - timedelta(hours=1)
+            ),
+            'habit check-in of a day': HabitCheckIn.objects.filter(
+                habit_item=self.habit, check_date=self.habit.habit_block.start_date
+            ),
+            'expired habit blocks': HabitBlock.objects.filter(status='active', end_date__lt=today),
+            'overdue goals': UserGoal.objects.filter(status__in=['new', 'running'], deadline__lt=today),
+        }
+
+    def test_hot_queries_use_indexes(self):
+        for name, queryset in self.hot_queries().items():
+            with self.subTest(query=name):
+                plan = json.loads(queryset.explain(format='json'))
+                table = queryset.model._meta.db_table
+                self.assertNotIn(table, seq_scanned_tables(plan[0]['Plan']), f'{name}: sequential scan')
+
+
+def seq_scanned_tables(node):
+    """Tables read with a sequential scan anywhere in an EXPLAIN (FORMAT JSON) plan"""
+    tables = set()
+    if node.get('Node Type') == 'Seq Scan':
+        tables.add(node.get('Relation Name'))
+    for child in node.get('Plans', []):
+        tables |= seq_scanned_tables(child)
+    return tables
+
+
+# ============================================
+# Daily rollups
+# ============================================
+class DailyRollupTests(TestCase):
+    """Rollups kept current on every save/delete must equal a full rebuild"""
+
+    def setUp(self):
+        self.today = date.today()
+        self.user = User.objects.create_user('rollups', 'rollups@example.com', 'password')
+        self.bank = UserBalance.objects.create(user=self.user, account_name='Bank', account_number='111')
+        self.wallet = UserBalance.objects.create(user=self.user, account_name='Wallet', account_number='222')
+        self.block = ExpenseBlock.objects.create(
+            user=self.user, start_date=self.today - timedelta(days=3), end_date=self.today + timedelta(days=3)
+        )
+        self.items = [
+            ExpenseItem.objects.create(
+                expense_block=self.block,
+                user_balance=self.bank if n % 2 else self.wallet,
+                expense_name=f'Item {n}',
+                amount=Decimal(10 + n),
+                expense_date=self.today - timedelta(days=n % 3)
+            )
+            for n in range(6)
+        ]
+        UserIncome.objects.create(user=self.user, income_source='salary', amount=Decimal('500'), balance_account=self.bank)
+
+    def rollups(self):
+        return sorted(
+            DailyAccountRollup.objects.filter(user=self.user).values_list(
+                'balance_account_id', 'date', 'income_total', 'expense_total', 'txn_count'
+            ),
+            key=str
+        )
+
+    def assertMatchesRebuild(self):
+        incremental = self.rollups()
+        rebuild_user_rollups(self.user.id)
+        self.assertEqual(incremental, self.rollups())
+
+    def test_item_update(self):
+        item = self.items[0]
+        item.amount = Decimal('99')
+        item.expense_date = self.today - timedelta(days=2)
+        item.user_balance = self.bank
+        item.save()
+        self.assertMatchesRebuild()
+
+    def test_balance_delete(self):
+        self.wallet.delete()
+        self.assertTrue(ExpenseItem.objects.filter(expense_block=self.block, user_balance=None).exists())
+        self.assertMatchesRebuild()
+
+    def test_block_delete(self):
+        self.block.delete()
+        self.assertMatchesRebuild()
+        self.assertEqual(DailyAccountRollup.objects.filter(user=self.user).exclude(income_total=0).count(), 1)
+
+    def test_income_edit_and_delete(self):
+        income = UserIncome.objects.get(user=self.user)
+        income.amount = Decimal('250')
+        income.balance_account = self.wallet
+        income.save()
+        self.assertMatchesRebuild()
+        income.delete()
+        self.assertMatchesRebuild()
+
+
+# ============================================
+# Balance debits / credits
+# ============================================
+AJAX = {'HTTP_X_REQUESTED_WITH': 'XMLHttpRequest'}
+
+
+class BalanceUpdateTests(TestCase):
+    def setUp(self):
+        today = date.today()
+        self.user = User.objects.create_user('balances', 'balances@example.com', 'password')
+        self.client.force_login(self.user)
+        self.bank = UserBalance.objects.create(
+            user=self.user, account_name='Bank', account_number='111', available_balance=Decimal('100.00')
+        )
+        self.wallet = UserBalance.objects.create(
+            user=self.user, account_name='Wallet', account_number='222', available_balance=Decimal('50.00')
+        )
+        self.block = ExpenseBlock.objects.create(
+            user=self.user, start_date=today - timedelta(days=1), end_date=today + timedelta(days=5)
+        )
+
+    def available(self, balance):
+        balance.refresh_from_db()
+        return balance.available_balance
+
+    def add_expense(self, amount, balance):
+        response = self.client.post(
+            f'/main/expenses/{self.block.id}/add/',
+            {'expense_name': 'Groceries', 'amount': amount, 'balance_id': balance.id},
+            **AJAX
+        )
+        return response.json()
+
+    def test_debit_rejects_insufficient_funds(self):
+        with self.assertRaises(InsufficientBalance) as raised:
+            debit(self.bank, Decimal('100.01'))
+        self.assertEqual(raised.exception.available, Decimal('100.00'))
+        self.assertEqual(self.available(self.bank), Decimal('100.00'))
+
+        result = self.add_expense('150', self.bank)
+        self.assertFalse(result['success'])
+        self.assertEqual(self.available(self.bank), Decimal('100.00'))
+        self.assertFalse(ExpenseItem.objects.filter(expense_block=self.block).exists())
+
+    def test_update_moves_item_between_accounts(self):
+        self.assertTrue(self.add_expense('30', self.bank)['success'])
+        self.assertEqual(self.available(self.bank), Decimal('70.00'))
+        item = ExpenseItem.objects.get(expense_block=self.block)
+
+        response = self.client.post(
+            f'/main/expenses/item/{item.id}/update/',
+            {'expense_name': 'Groceries', 'amount': '40', 'balance_id': self.wallet.id},
+            **AJAX
+        )
+        self.assertTrue(response.json()['success'], response.json())
+        self.assertEqual(self.available(self.bank), Decimal('100.00'))
+        self.assertEqual(self.available(self.wallet), Decimal('10.00'))
+
+    def test_income_edit_and_delete_take_back_old_credit(self):
+        response = self.client.post(
+            '/main/income/add/', {'amount': '25', 'income_source': 'salary', 'balance_account': self.bank.id}, **AJAX
+        )
+        self.assertTrue(response.json()['success'], response.json())
+        self.assertEqual(self.available(self.bank), Decimal('125.00'))
+        income = UserIncome.objects.get(user=self.user)
+
+        response = self.client.post(
+            f'/main/income/edit/{income.id}/',
+            {'amount': '40', 'income_source': 'salary', 'balance_account': self.wallet.id},
+            **AJAX
+        )
+        self.assertTrue(response.json()['success'], response.json())
+        self.assertEqual(self.available(self.bank), Decimal('100.00'))
+        self.assertEqual(self.available(self.wallet), Decimal('90.00'))
+
+        response = self.client.post(f'/main/income/delete/{income.id}/', **AJAX)
+        self.assertTrue(response.json()['success'], response.json())
+        self.assertEqual(self.available(self.wallet), Decimal('50.00'))
+
+
+# ============================================
+# Bulk expense import
+# ============================================
+class ExpenseImportTests(TestCase):
+    def setUp(self):
+        self.today = date.today()
+        self.user = User.objects.create_user('importer', 'importer@example.com', 'password')
+        self.client.force_login(self.user)
+        self.bank = UserBalance.objects.create(
+            user=self.user, account_name='Bank', account_number='111', available_balance=Decimal('1000.00')
+        )
+        self.wallet = UserBalance.objects.create(
+            user=self.user, account_name='Wallet', account_number='222', available_balance=Decimal('20.00')
+        )
+        self.block = ExpenseBlock.objects.create(
+            user=self.user, start_date=self.today - timedelta(days=2), end_date=self.today + timedelta(days=4)
+        )
+
+    def upload(self, lines, balance_id=''):
+        content = '\n'.join(['expense_name,amount,expense_date,account'] + lines).encode()
+        return self.client.post(
+            f'/main/expenses/{self.block.id}/import/',
+            {'file': SimpleUploadedFile('expenses.csv', content, content_type='text/csv'), 'balance_id': balance_id},
+            **AJAX
+        ).json()
+
+    def assertNothingImported(self):
+        self.block.refresh_from_db()
+        self.assertFalse(ExpenseItem.objects.filter(expense_block=self.block).exists())
+        self.assertEqual((self.block.total_expense, self.block.item_count), (Decimal('0.00'), 0))
+        self.assertFalse(DailyAccountRollup.objects.filter(user=self.user).exists())
+        self.bank.refresh_from_db()
+        self.wallet.refresh_from_db()
+        self.assertEqual((self.bank.available_balance, self.wallet.available_balance), (Decimal('1000.00'), Decimal('20.00')))
+
+    def test_valid_csv_updates_totals_balances_and_rollups(self):
+        yesterday = (self.today - timedelta(days=1)).isoformat()
+        result = self.upload([
+            f'Rent,300,{yesterday},Bank',
+            f'Coffee,4.50,{self.today.isoformat()},{self.wallet.id}',
+            f'Lunch,12,{self.today.isoformat()},',
+        ], balance_id=str(self.bank.id))
+        self.assertTrue(result['success'], result)
+        self.assertEqual(result['imported'], 3)
+
+        self.block.refresh_from_db()
+        self.assertEqual(self.block.total_expense, Decimal('316.50'))
+        self.assertEqual(self.block.item_count, 3)
+        self.bank.refresh_from_db()
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.bank.available_balance, Decimal('688.00'))
+        self.assertEqual(self.wallet.available_balance, Decimal('15.50'))
+
+        rollups = {
+            (row.balance_account_id, row.date): (row.expense_total, row.txn_count)
+            for row in DailyAccountRollup.objects.filter(user=self.user)
+        }
+        self.assertEqual(rollups, {
+            (self.bank.id, self.today - timedelta(days=1)): (Decimal('300.00'), 1),
+            (self.bank.id, self.today): (Decimal('12.00'), 1),
+            (self.wallet.id, self.today): (Decimal('4.50'), 1),
+        })
+
+    def test_bad_account_values(self):
+        result = self.upload([f'Coffee,4,{self.today.isoformat()},'], balance_id='abc')
+        self.assertFalse(result['success'])
+
+        result = self.upload([f'Coffee,4,{self.today.isoformat()},'], balance_id='999999')
+        self.assertFalse(result['success'])
+
+        result = self.upload([
+            f'Coffee,4,{self.today.isoformat()},Savings',
+            f'Tea,3,{self.today.isoformat()},'
+        ])
+        self.assertFalse(result['success'])
+        self.assertEqual(len(result['errors']), 2)
+        self.assertNothingImported()
+
+    def test_rows_are_all_or_nothing(self):
+        result = self.upload([
+            f'Rent,300,{self.today.isoformat()},Bank',
+            f'Coffee,not-a-number,{self.today.isoformat()},Bank',
+        ])
+        self.assertFalse(result['success'])
+        self.assertEqual(result['errors'], ['Row 2: invalid amount'])
+        self.assertNothingImported()
+
+        # Valid rows, but the second account cannot cover its share
+        result = self.upload([
+            f'Rent,300,{self.today.isoformat()},Bank',
+            f'Coffee,25,{self.today.isoformat()},Wallet',
+        ])
+        self.assertFalse(result['success'])
+        self.assertNothingImported()
+
+
+# ============================================
+# Cursor pagination
+# ============================================
+class CursorPaginationTests(TestCase):
+    ORDERING = ('-created_at', '-id')
+
+    def setUp(self):
+        self.user = User.objects.create_user('pages', 'pages@example.com', 'password')
+        bank = UserBalance.objects.create(user=self.user, account_name='Bank', account_number='111')
+        UserIncome.objects.bulk_create([
+            UserIncome(user=self.user, balance_account=bank, amount=Decimal(number), income_source='salary')
+            for number in range(1, 121)
+        ])
+        # Runs of equal timestamps, so pages also split inside ties (decided by id)
+        now = timezone.now()
+        for number, income in enumerate(UserIncome.objects.filter(user=self.user).order_by('id')):
+            UserIncome.objects.filter(id=income.id).update(created_at=now + timedelta(seconds=number // 7))
+
+        self.expected = list(
+            UserIncome.objects.filter(user=self.user).order_by(*self.ORDERING).values_list('id', flat=True)
+        )
+
+    def page(self, **params):
+        return cursor_page(UserIncome.objects.filter(user=self.user), self.ORDERING, params, per_page=50)
+
+    def assertPage(self, page, first, last):
+        self.assertEqual([row.id for row in page], self.expected[first - 1:last])
+        self.assertEqual((page.start_index(), page.end_index()), (first, last))
+
+    def test_forward_and_back(self):
+        first = self.page()
+        self.assertPage(first, 1, 50)
+        self.assertFalse(first.has_previous())
+
+        second = self.page(cursor=first.next_cursor)
+        self.assertPage(second, 51, 100)
+        self.assertTrue(second.has_previous())
+
+        third = self.page(cursor=second.next_cursor)
+        self.assertPage(third, 101, 120)
+        self.assertFalse(third.has_next())
+
+        back = self.page(before=third.previous_cursor)
+        self.assertPage(back, 51, 100)
+        self.assertTrue(back.has_next())
+
+        back = self.page(before=back.previous_cursor)
+        self.assertPage(back, 1, 50)
+        self.assertFalse(back.has_previous())
+        self.assertPage(self.page(cursor=back.next_cursor), 51, 100)
+
+    def test_page_boundaries(self):
+        # Exactly one full page left: no next link and no empty page after it
+        rows, next_cursor = keyset_page(
+            UserIncome.objects.filter(user=self.user), self.ORDERING, limit=60
+        )
+        rows, next_cursor = keyset_page(
+            UserIncome.objects.filter(user=self.user), self.ORDERING, cursor=next_cursor, limit=60
+        )
+        self.assertEqual([row.id for row in rows], self.expected[60:])
+        self.assertIsNone(next_cursor)
+
+        everything = cursor_page(UserIncome.objects.filter(user=self.user), self.ORDERING, {}, per_page=120)
+        self.assertPage(everything, 1, 120)
+        self.assertFalse(everything.has_other_pages())
+
+        # A cursor past the last row falls back to the first page
+        last = UserIncome.objects.get(id=self.expected[-1])
+        self.assertPage(self.page(cursor=encode_cursor([last.created_at, last.id], 120)), 1, 50)
+
+    def test_malformed_cursors(self):
+        queryset = UserIncome.objects.filter(user=self.user)
+        for cursor in ['not-base64!', encode_cursor([1]), encode_cursor(['yesterday', 'x']), 'e30=']:
+            with self.subTest(cursor=cursor):
+                with self.assertRaises(InvalidCursor):
+                    keyset_page(queryset, self.ORDERING, cursor=cursor)
+                self.assertPage(self.page(cursor=cursor), 1, 50)
+                self.assertPage(self.page(before=cursor), 1, 50)
+
+        self.client.force_login(self.user)
+        result = self.client.get('/main/report/api/blocks/', {'cursor': 'not-base64!'}, **AJAX).json()
+        self.assertFalse(result['success'])
+
+
+# ============================================
+# Lost backup jobs
+# ============================================
+class StaleJobTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('backups', 'backups@example.com', 'password')
+        self.now = timezone.now()
+
+    def job(self, model=DatabaseBackup, created=0, heartbeat=None, status='running'):
+        job = model.objects.create(user=self.user, filename='backup.sql', status=status)
+        model.objects.filter(pk=job.pk).update(
+            created_at=self.now - timedelta(seconds=created),
+            heartbeat_at=None if heartbeat is None else self.now - timedelta(seconds=heartbeat)
+        )
+        return job
+
+    def test_only_jobs_without_a_recent_heartbeat_fail(self):
+        long_running = self.job(created=12 * 60 * 60, heartbeat=10)
+        lost = self.job(created=60 * 60, heartbeat=10 * 60)
+        never_started = self.job(created=10 * 60, status='pending')
+        just_queued = self.job(created=10, status='pending')
+        lost_restore = self.job(DatabaseRestore, created=60 * 60, heartbeat=10 * 60)
+        finished = self.job(created=60 * 60, heartbeat=60 * 60, status='completed')
+
+        self.assertEqual(backup_jobs.fail_stale_jobs(timeout=5 * 60), (2, 1))
+        statuses = {
+            job.pk: DatabaseBackup.objects.get(pk=job.pk).status
+            for job in (long_running, lost, never_started, just_queued, finished)
+        }
+        self.assertEqual(statuses, {
+            long_running.pk: 'running',
+            lost.pk: 'failed',
+            never_started.pk: 'failed',
+            just_queued.pk: 'pending',
+            finished.pk: 'completed',
+        })
+        self.assertEqual(DatabaseRestore.objects.get(pk=lost_restore.pk).status, 'failed')
+
+    def test_live_jobs_keep_beating(self):
+        job = self.job(created=12 * 60 * 60, heartbeat=60 * 60)
+        backup_jobs._live_jobs.add((DatabaseBackup, job.pk))
+        self.addCleanup(backup_jobs._live_jobs.discard, (DatabaseBackup, job.pk))
+
+        self.assertEqual(backup_jobs.beat_live_jobs(), 1)
+        self.assertEqual(backup_jobs.fail_stale_jobs(timeout=5 * 60), (0, 0))
+        self.assertEqual(DatabaseBackup.objects.get(pk=job.pk).status, 'running')
+
+
+# ============================================
+# Directory backup compression
+# ============================================
+class DirectoryCompressionTests(TestCase):
+    def setUp(self):
+        backup_jobs.pg_dump_version.cache_clear()
+        self.addCleanup(backup_jobs.pg_dump_version.cache_clear)
+
+    def pg_dump(self, output):
+        return mock.patch(
+            'main.backup_jobs.subprocess.run',
+            return_value=mock.Mock(stdout=output, returncode=0)
+        )
+
+    def test_zstd_follows_pg_dump_version(self):
+        with self.pg_dump('pg_dump (PostgreSQL) 15.6 (Debian 15.6-1.pgdg120+2)\n'):
+            self.assertEqual(backup_jobs.pg_dump_version(), 15)
+            self.assertEqual(backup_jobs.directory_compressions(), ['none', 'gzip'])
+
+        backup_jobs.pg_dump_version.cache_clear()
+        with self.pg_dump('pg_dump (PostgreSQL) 16.2\n'):
+            self.assertEqual(backup_jobs.directory_compressions(), ['none', 'gzip', 'zstd'])
+
+        backup_jobs.pg_dump_version.cache_clear()
+        with mock.patch('main.backup_jobs.subprocess.run', side_effect=FileNotFoundError):
+            self.assertIsNone(backup_jobs.pg_dump_version())
+            self.assertNotIn('zstd', backup_jobs.directory_compressions())
+
+    def test_old_pg_dump_rejects_zstd_directory_backups(self):
+        user = User.objects.create_user('dumper', 'dumper@example.com', 'password')
+        self.client.force_login(user)
+        with self.pg_dump('pg_dump (PostgreSQL) 15.6\n'), self.settings(BACKUP_COMPRESSION='zstd'):
+            result = self.client.post(
+                '/main/backup/create/', {'format': 'directory', 'compression': 'zstd'}, **AJAX
+            ).json()
+            self.assertFalse(result['success'])
+            self.assertEqual(backup_jobs.default_compression('directory'), 'gzip')
+        self.assertFalse(DatabaseBackup.objects.exists())
+
+
+# ============================================
+# Per-user export / import
+# ============================================
+class UserExportTests(TestCase):
+    def setUp(self):
+        today = date.today()
+        self.source = User.objects.create_user('exporter', 'exporter@example.com', 'password')
+        self.target = User.objects.create_user('importer', 'importer@example.com', 'password')
+
+        bank = UserBalance.objects.create(
+            user=self.source, account_name='Bank', account_number='111', available_balance=Decimal('900.00')
+        )
+        wallet = UserBalance.objects.create(user=self.source, account_name='Wallet', account_number='222')
+        UserIncome.objects.create(user=self.source, balance_account=wallet, amount=Decimal('50.00'), income_source='gift')
+        block = ExpenseBlock.objects.create(
+            user=self.source, start_date=today - timedelta(days=3), end_date=today + timedelta(days=3)
+        )
+        ExpenseItem.objects.create(
+            expense_block=block, user_balance=bank, expense_name='Rent', amount=Decimal('300.00'), expense_date=today
+        )
+        ExpenseItem.objects.create(expense_block=block, expense_name='Cash', amount=Decimal('5.25'), expense_date=today)
+        goal = UserGoal.objects.create(
+            user=self.source, title='Trip', target_amount=Decimal('1000.00'),
+            start_date=today, deadline=today + timedelta(days=90)
+        )
+        goal.balance_accounts.set([bank, wallet])
+        UserKeep.objects.create(user=self.source, title='Note', description='Keep me')
+        habit_block = HabitBlock.objects.create(
+            user=self.source, title='Week', start_date=today, end_date=today + timedelta(days=6)
+        )
+        habit = HabitItem.objects.create(habit_block=habit_block, habit_name='Run')
+        HabitCheckIn.objects.create(
+            habit_item=habit, check_date=today, day_name='monday', is_checked=True, checked_at=timezone.now()
+        )
+
+        # Something to be replaced on import
+        UserBalance.objects.create(user=self.target, account_name='Old', account_number='999')
+
+    def normalized_export(self, user):
+        """Export records with ids replaced by their position, so two users' exports compare"""
+        positions = {record_type: {} for record_type in RECORD_TYPES}
+        records = []
+        for line in iter_user_export(user):
+            record = json.loads(line)
+            if record['type'] == 'header':
+                continue
+            model, foreign_keys = RECORD_TYPES[record['type']]
+            data = record['data']
+            old_id = data.pop(model._meta.pk.attname)
+            positions[record['type']][old_id] = len(positions[record['type']])
+            for attname, target in foreign_keys.items():
+                if data[attname] is not None:
+                    data[attname] = positions[target][data[attname]]
+            records.append((record['type'], data))
+        return records
+
+    def test_round_trip_into_another_user(self):
+        exported = self.normalized_export(self.source)
+        counts = import_user_data(self.target, iter_user_export(self.source))
+
+        self.assertEqual(counts, {
+            'balance': 2, 'income': 1, 'expense_block': 1, 'expense_item': 2, 'goal': 1,
+            'goal_account': 2, 'keep': 1, 'habit_block': 1, 'habit_item': 1, 'habit_checkin': 1,
+        })
+        self.assertEqual(self.normalized_export(self.target), exported)
+        self.assertFalse(UserBalance.objects.filter(user=self.target, account_name='Old').exists())
+
+        # Foreign keys point at the target's new rows, never at the source's
+        rent = ExpenseItem.objects.get(expense_block__user=self.target, expense_name='Rent')
+        self.assertEqual((rent.user_balance.user, rent.user_balance.account_name), (self.target, 'Bank'))
+        goal = UserGoal.objects.get(user=self.target)
+        self.assertEqual(sorted(goal.balance_accounts.values_list('user__username', flat=True)), ['importer'] * 2)
+        self.assertEqual(len(self.normalized_export(self.source)), len(exported))
 
-# Create your tests here.
+        # Rollups are rebuilt for the imported rows
+        self.assertEqual(
+            DailyAccountRollup.objects.filter(user=self.target, balance_account=rent.user_balance).get().expense_total,
+            Decimal('300.00')
+        )
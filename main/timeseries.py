@@ -0,0 +1,88 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import Sum
+from django.db.models.functions import TruncDate
+
+from .models import UserIncome, ExpenseItem
+
+
+def cashflow_series(user, accounts, start_date, end_date):
+    """
+    Daily income, expense, savings and cumulative savings for the given
+    balance accounts, one entry per calendar day from start_date to end_date
+    (inclusive). Costs two grouped queries however long the range is;
+    days without activity are filled with zero.
+    `accounts` may be a queryset or a list of UserBalance ids.
+    """
+    income_rows = UserIncome.objects.filter(
+        user=user,
+        balance_account__in=accounts,
+        created_at__date__gte=start_date,
+        created_at__date__lte=end_date
+    ).annotate(
+        day=TruncDate('created_at')
+    ).values('day').annotate(
+        total=Sum('amount')
+    ).order_by()
+
+    expense_rows = ExpenseItem.objects.filter(
+        expense_block__user=user,
+        user_balance__in=accounts,
+        expense_date__gte=start_date,
+        expense_date__lte=end_date
+    ).values('expense_date').annotate(
+        total=Sum('amount')
+    ).order_by()
+
+    income_by_day = {row['day']: row['total'] for row in income_rows}
+    expense_by_day = {row['expense_date']: row['total'] for row in expense_rows}
+
+    series = []
+    running_total = Decimal('0.00')
+    current_date = start_date
+
+    while current_date <= end_date:
+        day_income = income_by_day.get(current_date, Decimal('0.00'))
+        day_expense = expense_by_day.get(current_date, Decimal('0.00'))
+        running_total += day_income - day_expense
+
+        series.append({
+            'date': current_date,
+            'income': day_income,
+            'expense': day_expense,
+            'savings': day_income - day_expense,
+            'cumulative': running_total,
+        })
+        current_date += timedelta(days=1)
+
+    return series
+
+
+def goal_chart_data(goal, today):
+    """
+    Chart data for the goal detail page: the last 7 days of activity and the
+    cumulative savings vs. target line since the goal started.
+    """
+    chart_end = min(goal.deadline, today)
+    series = cashflow_series(goal.user, goal.balance_accounts.all(), goal.start_date, chart_end)
+
+    total_days = goal.total_days if goal.total_days > 0 else 1
+    daily_target = goal.target_amount / total_days
+
+    # Last 7 days (or the goal period, whichever is shorter)
+    chart_start = max(goal.start_date, today - timedelta(days=6))
+    recent = [day for day in series if day['date'] >= chart_start]
+
+    return {
+        'daily_labels': [day['date'].strftime('%b %d') for day in recent],
+        'daily_income_data': [float(day['income']) for day in recent],
+        'daily_expense_data': [float(day['expense']) for day in recent],
+        'daily_savings_data': [float(day['savings']) for day in recent],
+        'cumulative_labels': [day['date'].strftime('%b %d') for day in series],
+        'cumulative_savings': [float(day['cumulative']) for day in series],
+        'target_line': [
+            float(daily_target * ((day['date'] - goal.start_date).days + 1))
+            for day in series
+        ],
+    }
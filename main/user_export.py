@@ -0,0 +1,239 @@
+import datetime
+import json
+from collections import defaultdict
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .dashboard import invalidate_dashboard
+from .models import (
+    UserBalance, UserIncome, ExpenseBlock, ExpenseItem, UserGoal, UserKeep,
+    HabitBlock, HabitItem, HabitCheckIn
+)
+from .rollups import rebuild_user_rollups
+
+
+EXPORT_VERSION = 1
+EXPORT_CHUNK_SIZE = 2000
+IMPORT_BATCH_SIZE = 500
+
+
+class UserImportError(Exception):
+    pass
+
+
+# ============================================
+# Exported rows
+# ============================================
+# (record type, model, lookup to the owning user, {foreign key attname: record type it points to}).
+# Parents come before their children, so an import can remap ids in one pass.
+EXPORT_MODELS = [
+    ('balance', UserBalance, 'user', {}),
+    ('income', UserIncome, 'user', {'balance_account_id': 'balance'}),
+    ('expense_block', ExpenseBlock, 'user', {}),
+    ('expense_item', ExpenseItem, 'expense_block__user', {
+        'expense_block_id': 'expense_block',
+        'user_balance_id': 'balance',
+    }),
+    ('goal', UserGoal, 'user', {}),
+    ('goal_account', UserGoal.balance_accounts.through, 'usergoal__user', {
+        'usergoal_id': 'goal',
+        'userbalance_id': 'balance',
+    }),
+    ('keep', UserKeep, 'user', {}),
+    ('habit_block', HabitBlock, 'user', {}),
+    ('habit_item', HabitItem, 'habit_block__user', {'habit_block_id': 'habit_block'}),
+    ('habit_checkin', HabitCheckIn, 'habit_item__habit_block__user', {'habit_item_id': 'habit_item'}),
+]
+
+RECORD_TYPES = {record_type: (model, foreign_keys) for record_type, model, _, foreign_keys in EXPORT_MODELS}
+
+
+def export_fields(model):
+    """Columns written for a model: all but the owner, which an import replaces"""
+    return [field.attname for field in model._meta.concrete_fields if field.attname != 'user_id']
+
+
+# ============================================
+# Export
+# ============================================
+class _ExportEncoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder, but keeping microseconds so timestamps round-trip exactly"""
+
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+def _line(record):
+    return json.dumps(record, cls=_ExportEncoder, separators=(',', ':')).encode() + b'\n'
+
+
+def iter_user_export(user, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    NDJSON lines (bytes) of everything `user` owns: a header, then one
+    {"type", "data"} record per row. Rows are read with values().iterator(),
+    so memory stays flat and the cost follows the user's data only.
+    All models are read in one transaction, from one snapshot, so a child
+    row never points at a parent created or deleted during the export.
+    """
+    # A caller's transaction already fixes the isolation level
+    own_transaction = not connection.in_atomic_block
+    with transaction.atomic():
+        if own_transaction and connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                # Must be the transaction's first statement
+                cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY')
+
+        yield _line({
+            'type': 'header',
+            'version': EXPORT_VERSION,
+            'user': user.email,
+            'exported_at': timezone.now(),
+        })
+
+        for record_type, model, owner, _ in EXPORT_MODELS:
+            rows = model.objects.filter(**{owner: user}).order_by('pk').values(*export_fields(model))
+            for row in rows.iterator(chunk_size=chunk_size):
+                yield _line({'type': record_type, 'data': row})
+
+
+def iter_lines(source, chunk_size=64 * 1024):
+    """Lines of a readable byte stream (decompressors do not all support readline)"""
+    pending = b''
+    while True:
+        chunk = source.read(chunk_size)
+        if not chunk:
+            break
+        pending += chunk
+        lines = pending.split(b'\n')
+        pending = lines.pop()
+        yield from lines
+    if pending:
+        yield pending
+
+
+# ============================================
+# Import
+# ============================================
+def delete_user_data(user):
+    """Remove every exported row of `user` (their balances last: items point at them)"""
+    UserGoal.objects.filter(user=user).delete()
+    ExpenseBlock.objects.filter(user=user).delete()
+    HabitBlock.objects.filter(user=user).delete()
+    UserKeep.objects.filter(user=user).delete()
+    UserIncome.objects.filter(user=user).delete()
+    UserBalance.objects.filter(user=user).delete()
+
+
+def _build_objects(user, record_type, rows, id_maps):
+    """Model instances for a batch of records, foreign keys remapped to new ids"""
+    model, foreign_keys = RECORD_TYPES[record_type]
+    fields = {field.attname: field for field in model._meta.concrete_fields}
+    pk_name = model._meta.pk.attname
+
+    objects = []
+    old_ids = []
+    for data in rows:
+        values = {}
+        for attname, value in data.items():
+            field = fields.get(attname)
+            if field is None:
+                raise UserImportError(f'{record_type}: unknown field "{attname}"')
+            if value is None:
+                values[attname] = None
+            elif attname in foreign_keys:
+                try:
+                    values[attname] = id_maps[foreign_keys[attname]][value]
+                except KeyError:
+                    raise UserImportError(
+                        f'{record_type} {data.get(pk_name)}: {attname} refers to a row missing from the export'
+                    )
+            else:
+                values[attname] = field.to_python(value)
+
+        old_ids.append(values.pop(pk_name, None))
+        if 'user_id' in fields:
+            values['user_id'] = user.id
+        objects.append(model(**values))
+    return model, objects, old_ids
+
+
+def _insert_batch(user, record_type, rows, id_maps):
+    model, objects, old_ids = _build_objects(user, record_type, rows, id_maps)
+
+    # bulk_create stamps auto_now / auto_now_add fields; put the exported times back
+    timestamp_fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    timestamps = [
+        {field.attname: getattr(obj, field.attname) for field in timestamp_fields}
+        for obj in objects
+    ]
+
+    model.objects.bulk_create(objects)
+
+    restored = []
+    for obj, values in zip(objects, timestamps):
+        values = {name: value for name, value in values.items() if value is not None}
+        if values:
+            for name, value in values.items():
+                setattr(obj, name, value)
+            restored.append(obj)
+    if restored:
+        model.objects.bulk_update(restored, [field.name for field in timestamp_fields])
+
+    for old_id, obj in zip(old_ids, objects):
+        if old_id is not None:
+            id_maps[record_type][old_id] = obj.pk
+    return len(objects)
+
+
+def import_user_data(user, lines, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Replace `user`'s data with an export (an iterable of NDJSON lines) in one
+    transaction: nothing changes unless every line imports. Rows are inserted
+    with bulk_create in batches and get new ids, so an export can be
+    imported into another account or instance. Returns {record type: rows}.
+    """
+    id_maps = defaultdict(dict)
+    counts = defaultdict(int)
+    record_type = None
+    batch = []
+
+    with transaction.atomic():
+        delete_user_data(user)
+
+        for number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                raise UserImportError(f'Line {number}: invalid JSON')
+
+            kind = record.get('type')
+            if kind == 'header':
+                if record.get('version') != EXPORT_VERSION:
+                    raise UserImportError(f'Unsupported export version: {record.get("version")}')
+                continue
+            if kind not in RECORD_TYPES:
+                raise UserImportError(f'Line {number}: unknown record type "{kind}"')
+
+            if kind != record_type or len(batch) >= batch_size:
+                if batch:
+                    counts[record_type] += _insert_batch(user, record_type, batch, id_maps)
+                record_type, batch = kind, []
+            batch.append(record.get('data') or {})
+
+        if batch:
+            counts[record_type] += _insert_batch(user, record_type, batch, id_maps)
+
+        # Derived rows are rebuilt rather than exported
+        rebuild_user_rollups(user.id)
+
+    invalidate_dashboard(user.id)
+    return dict(counts)
@@ -1,4 +1,11 @@
 from .models import UserBalance , ExpenseBlock, ExpenseItem , UserIncome , UserGoal , UserKeep , HabitBlock , HabitItem , HabitCheckIn
+from .dashboard import get_dashboard_summary, get_cache_stats
+from .timeseries import goal_chart_data
+from .reports import get_block_day_totals, serialize_block, serialize_block_days, serialize_item
+from .pagination import InvalidCursor, cursor_page, keyset_page, parse_limit
+from .balances import InsufficientBalance, credit, debit
+from .imports import ExpenseImportError, detect_format, import_expenses, parse_expense_file
+from .habit_analytics import get_habit_analytics, get_habit_names
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
@@ -9,8 +16,8 @@ from bleach.css_sanitizer import CSSSanitizer
 from django.contrib.auth import logout
 from django.http import JsonResponse
 from django.utils import timezone
-from django.db.models import Sum
-from django.db import models
+from django.db.models import Count, Prefetch, Q, Sum
+from django.db import transaction
 import bleach
 import json
 
@@ -38,245 +45,32 @@ def dashboard_view(request):
     if not full_name:
         full_name = user.email.split('@')[0]
 
-    # Get total available balance from UserBalance model
-    total_balance = UserBalance.objects.filter(
-        user=user, 
-        status='active'
-    ).aggregate(total=models.Sum('available_balance'))['total'] or Decimal('0.00')
-
-    # Get total income
-    total_income = UserIncome.objects.filter(
-        user=user
-    ).aggregate(total=models.Sum('amount'))['total'] or Decimal('0.00')
-
-    # Get this month's income
-    today = date.today()
-    first_day_of_month = today.replace(day=1)
-    monthly_income = UserIncome.objects.filter(
-        user=user,
-        created_at__date__gte=first_day_of_month,
-        created_at__date__lte=today
-    ).aggregate(total=models.Sum('amount'))['total'] or Decimal('0.00')
-
-    # Get income breakdown by source for chart
-    income_breakdown = UserIncome.objects.filter(
-        user=user
-    ).values('income_source').annotate(
-        total=models.Sum('amount')
-    ).order_by('-total')[:5]  # Top 5 sources
-
-    income_labels = []
-    income_values = []
-    
-    income_source_display = dict(UserIncome.INCOME_SOURCE_CHOICES)
-    for item in income_breakdown:
-        source = item['income_source']
-        income_labels.append(income_source_display.get(source, source.capitalize()))
-        income_values.append(float(item['total']))
-
-    today_day_name = get_day_name(today)
-    
-    # Get current active expense block
-    active_block = ExpenseBlock.objects.filter(
-        user=user,
-        status='active',
-        start_date__lte=today,
-        end_date__gte=today
-    ).first()
-    
-    # Get today's expenses
-    todays_expenses = Decimal('0.00')
-    weekly_expenses_data = {
-        'sunday': Decimal('0.00'),
-        'monday': Decimal('0.00'),
-        'tuesday': Decimal('0.00'),
-        'wednesday': Decimal('0.00'),
-        'thursday': Decimal('0.00'),
-        'friday': Decimal('0.00'),
-        'saturday': Decimal('0.00'),
-    }
-    
-    total_weekly_expense = Decimal('0.00')
-    
-    if active_block:
-        # Get today's expenses from active block
-        todays_expenses = ExpenseItem.objects.filter(
-            expense_block=active_block,
-            expense_date=today
-        ).aggregate(total=models.Sum('amount'))['total'] or Decimal('0.00')
-        
-        # Get weekly expenses grouped by day
-        weekly_items = ExpenseItem.objects.filter(
-            expense_block=active_block
-        ).values('expense_day').annotate(
-            total=models.Sum('amount')
-        )
-        
-        for item in weekly_items:
-            day = item['expense_day']
-            if day in weekly_expenses_data:
-                weekly_expenses_data[day] = item['total']
-        
-        total_weekly_expense = active_block.total_expense
-    
-    # Prepare weekly expenses for template (ordered Sunday to Saturday)
-    day_order = ['sunday', 'monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday']
-    day_labels = ['Sun', 'Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat']
-    day_full_labels = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']
-    
-    weekly_amounts = []
-    
-    for i, day in enumerate(day_order):
-        amount = weekly_expenses_data[day]
-        weekly_amounts.append(float(amount))
-    
-    # Get balance breakdown by income method for chart
-    balance_breakdown = UserBalance.objects.filter(
-        user=user,
-        status='active'
-    ).values('income_method').annotate(
-        total=models.Sum('available_balance')
-    )
-    
-    balance_labels = []
-    balance_values = []
-    
-    for item in balance_breakdown:
-        method = item['income_method']
-        balance_labels.append(method.capitalize())
-        balance_values.append(float(item['total']))
-
-    # ============================================
-    # GOALS DATA
-    # ============================================
-    
-    # Get all user goals
-    all_goals = UserGoal.objects.filter(user=user).prefetch_related('balance_accounts')
-    
-    # Update status for overdue goals
-    for goal in all_goals.filter(status__in=['new', 'running']):
-        if goal.deadline < today:
-            if goal.get_achievement_rate() >= 100:
-                goal.status = 'completed'
-            else:
-                goal.status = 'failed'
-            goal.save(update_fields=['status', 'updated_at'])
-    
-    # Refresh queryset after status updates
-    all_goals = UserGoal.objects.filter(user=user).prefetch_related('balance_accounts')
-    
-    # Goals statistics
-    total_goals = all_goals.count()
-    active_goals = all_goals.filter(status__in=['new', 'running'])
-    active_goals_count = active_goals.count()
-    completed_goals_count = all_goals.filter(status='completed').count()
-    failed_goals_count = all_goals.filter(status='failed').count()
-    
-    # Goals status distribution for chart
-    goals_status_labels = []
-    goals_status_values = []
-    goals_status_colors = []
-    
-    status_data = [
-        ('new', 'New', '#6366f1', all_goals.filter(status='new').count()),
-        ('running', 'Running', '#f59e0b', all_goals.filter(status='running').count()),
-        ('completed', 'Completed', '#10b981', completed_goals_count),
-        ('failed', 'Failed', '#ef4444', failed_goals_count),
-    ]
-    
-    for status_key, status_label, color, count in status_data:
-        if count > 0:
-            goals_status_labels.append(status_label)
-            goals_status_values.append(count)
-            goals_status_colors.append(color)
-    
-    # Active goals progress data for chart
-    goals_progress_labels = []
-    goals_progress_values = []
-    goals_target_values = []
-    goals_current_values = []
-    
-    # Get top 5 active goals for progress chart
-    top_active_goals = active_goals.order_by('-created_at')[:5]
-    
-    for goal in top_active_goals:
-        # Truncate title if too long
-        title = goal.title[:20] + '...' if len(goal.title) > 20 else goal.title
-        goals_progress_labels.append(title)
-        goals_progress_values.append(float(goal.get_achievement_rate()))
-        goals_target_values.append(float(goal.target_amount))
-        goals_current_values.append(float(goal.get_current_savings()))
-    
-    # Calculate total goals target and current savings
-    total_goals_target = sum(float(g.target_amount) for g in active_goals)
-    total_goals_savings = sum(float(g.get_current_savings()) for g in active_goals)
-    
-    # Overall goals achievement rate
-    if total_goals_target > 0:
-        overall_goals_rate = min(100, (total_goals_savings / total_goals_target) * 100)
-    else:
-        overall_goals_rate = 0
-    
-    # Get nearest deadline goal
-    nearest_goal = active_goals.order_by('deadline').first()
-    
-    # Goals prediction summary
-    on_track_count = sum(1 for g in active_goals if g.get_status_prediction() == 'on_track')
-    at_risk_count = sum(1 for g in active_goals if g.get_status_prediction() == 'at_risk')
-    behind_count = sum(1 for g in active_goals if g.get_status_prediction() == 'behind')
-
-    has_goals = total_goals > 0
-    has_active_goals = active_goals_count > 0
+    # Cached snapshot of all balances, income, expense and goal figures
+    summary = get_dashboard_summary(user)
 
     context = {
         'user': user,
         'profile': profile,
         'first_letter': first_letter,
         'full_name': full_name,
-        'available_balance': float(total_balance),
-        'total_income': float(total_income),
-        'monthly_income': float(monthly_income),
-        'todays_expenses': float(todays_expenses),
-        'total_weekly_expense': float(total_weekly_expense),
-        'weekly_amounts': weekly_amounts,
-        'day_labels': day_labels,
-        'day_full_labels': day_full_labels,
-        'today_day_name': today_day_name.capitalize(),
-        'today_date': today,
-        'current_month': today.strftime('%B %Y'),
-        'balance_labels': balance_labels,
-        'balance_values': balance_values,
-        'income_labels': income_labels,
-        'income_values': income_values,
-        'has_balance': len(balance_labels) > 0,
-        'has_income': len(income_labels) > 0,
-        'has_expenses': total_weekly_expense > 0,
-        
-        # Goals data
-        'total_goals': total_goals,
-        'active_goals_count': active_goals_count,
-        'completed_goals_count': completed_goals_count,
-        'failed_goals_count': failed_goals_count,
-        'has_goals': has_goals,
-        'has_active_goals': has_active_goals,
-        'goals_status_labels': goals_status_labels,
-        'goals_status_values': goals_status_values,
-        'goals_status_colors': goals_status_colors,
-        'goals_progress_labels': goals_progress_labels,
-        'goals_progress_values': goals_progress_values,
-        'goals_target_values': goals_target_values,
-        'goals_current_values': goals_current_values,
-        'total_goals_target': total_goals_target,
-        'total_goals_savings': total_goals_savings,
-        'overall_goals_rate': round(overall_goals_rate, 1),
-        'nearest_goal': nearest_goal,
-        'on_track_count': on_track_count,
-        'at_risk_count': at_risk_count,
-        'behind_count': behind_count,
-        'top_active_goals': top_active_goals,
     }
+    context.update(summary.as_context())
 
     return render(request, 'Main/dashboard.html', context)
+
+
+# ============================================
+# Dashboard Cache Stats (staff only)
+# ============================================
+@login_required(login_url='/401/')
+def dashboard_cache_stats(request):
+    if not request.user.is_staff:
+        return JsonResponse({'success': False, 'message': 'Permission denied', 'type': 'error'}, status=403)
+
+    return JsonResponse({
+        'success': True,
+        'stats': get_cache_stats(),
+    })
 #?======================================================================================================================
 #!=========================================== END OF DASHBOARD VIEWS ===========================================
 #?======================================================================================================================
@@ -600,31 +394,22 @@ def expenses_view(request):
     first_letter = user.first_name[0].upper() if user.first_name else user.email[0].upper()
     full_name = f"{user.first_name} {user.last_name}".strip() or user.email.split('@')[0]
 
-    # Get all expense blocks for this user
+    # Get all expense blocks for this user (expired blocks are closed by close_expired)
     expense_blocks = ExpenseBlock.objects.filter(user=user)
     
-    # Check and close expired blocks
-    for block in expense_blocks.filter(status='active'):
-        block.check_and_close()
-    
-    # Refresh queryset after closing
-    expense_blocks = ExpenseBlock.objects.filter(user=user)
-    
-    # Pagination
-    page = request.GET.get('page', 1)
-    paginator = Paginator(expense_blocks, 10)
-    
-    try:
-        expense_blocks_page = paginator.page(page)
-    except PageNotAnInteger:
-        expense_blocks_page = paginator.page(1)
-    except EmptyPage:
-        expense_blocks_page = paginator.page(paginator.num_pages)
+    # Keyset pagination
+    expense_blocks_page = cursor_page(expense_blocks, ('-start_date', '-created_at', '-id'), request.GET, per_page=10)
     
     # Calculate stats
-    total_expenses = expense_blocks.aggregate(total=Sum('total_expense'))['total'] or 0
-    active_blocks_count = expense_blocks.filter(status='active').count()
-    closed_blocks_count = expense_blocks.filter(status='closed').count()
+    stats = expense_blocks.aggregate(
+        total=Sum('total_expense'),
+        blocks=Count('id'),
+        active=Count('id', filter=Q(status='active')),
+        closed=Count('id', filter=Q(status='closed')),
+    )
+    total_expenses = stats['total'] or 0
+    active_blocks_count = stats['active']
+    closed_blocks_count = stats['closed']
 
     context = {
         'user': user,
@@ -632,6 +417,7 @@ def expenses_view(request):
         'first_letter': first_letter,
         'full_name': full_name,
         'expense_blocks': expense_blocks_page,
+        'total_blocks': stats['blocks'],
         'total_expenses': total_expenses,
         'active_blocks_count': active_blocks_count,
         'closed_blocks_count': closed_blocks_count,
@@ -723,9 +509,6 @@ def expense_detail_view(request, block_id):
     # Get the expense block
     expense_block = get_object_or_404(ExpenseBlock, id=block_id, user=user)
     
-    # Check if block should be closed
-    expense_block.check_and_close()
-    
     # Get today's info
     today = date.today()
     today_day_name = get_day_name(today)
@@ -740,17 +523,10 @@ def expense_detail_view(request, block_id):
     today_expenses = expense_block.items.filter(expense_date=today)
     has_today_expenses = today_expenses.exists()
     
-    # All expense items with pagination
-    all_expenses = expense_block.items.all()
-    page = request.GET.get('page', 1)
-    paginator = Paginator(all_expenses, 15)
-    
-    try:
-        expense_items = paginator.page(page)
-    except PageNotAnInteger:
-        expense_items = paginator.page(1)
-    except EmptyPage:
-        expense_items = paginator.page(paginator.num_pages)
+    # All expense items, keyset paginated (the total is the block's item_count)
+    expense_items = cursor_page(
+        expense_block.items.select_related('user_balance'), ('-expense_date', '-created_at', '-id'), request.GET, per_page=15
+    )
     
     # Get user's active balance accounts
     user_balances = UserBalance.objects.filter(user=user, status='active')
@@ -845,27 +621,22 @@ def add_expense_item(request, block_id):
                 'redirect_balance': True
             })
         
-        if user_balance.available_balance < amount_decimal:
-            return JsonResponse({
-                'success': False, 
-                'message': f'Insufficient balance in {user_balance.account_name}. Available: Rs. {user_balance.available_balance}'
-            })
-        
-        # Deduct from balance
-        user_balance.available_balance -= amount_decimal
-        user_balance.save(update_fields=['available_balance', 'updated_at'])
-        
-        # Create expense item
-        expense_item = ExpenseItem.objects.create(
-            expense_block=expense_block,
-            user_balance=user_balance,
-            expense_name=expense_name,
-            amount=amount_decimal,
-            payment_method=user_balance.income_method,
-            expense_day=today_day_name,
-            expense_date=today,
-            notes=notes if notes else None
-        )
+        # Deduct from balance and create the expense item together
+        try:
+            with transaction.atomic():
+                debit(user_balance, amount_decimal)
+                expense_item = ExpenseItem.objects.create(
+                    expense_block=expense_block,
+                    user_balance=user_balance,
+                    expense_name=expense_name,
+                    amount=amount_decimal,
+                    payment_method=user_balance.income_method,
+                    expense_day=today_day_name,
+                    expense_date=today,
+                    notes=notes if notes else None
+                )
+        except InsufficientBalance as e:
+            return JsonResponse({'success': False, 'message': str(e)})
         
         return JsonResponse({
             'success': True,
@@ -959,34 +730,23 @@ def update_expense_item(request, item_id):
                 'redirect_balance': True
             })
         
-        # Handle balance adjustments
-        # Refund old amount to old balance account
-        if old_balance and old_balance.status == 'active':
-            old_balance.available_balance += old_amount
-            old_balance.save(update_fields=['available_balance', 'updated_at'])
-        
-        # Check if new balance has sufficient funds
-        if new_balance.available_balance < amount_decimal:
-            # Rollback refund
-            if old_balance and old_balance.status == 'active':
-                old_balance.available_balance -= old_amount
-                old_balance.save(update_fields=['available_balance', 'updated_at'])
-            return JsonResponse({
-                'success': False, 
-                'message': f'Insufficient balance in {new_balance.account_name}. Available: Rs. {new_balance.available_balance}'
-            })
-        
-        # Deduct new amount from new balance
-        new_balance.available_balance -= amount_decimal
-        new_balance.save(update_fields=['available_balance', 'updated_at'])
-        
-        # Update expense item
-        expense_item.expense_name = expense_name
-        expense_item.amount = amount_decimal
-        expense_item.user_balance = new_balance
-        expense_item.payment_method = new_balance.income_method
-        expense_item.notes = notes if notes else None
-        expense_item.save()
+        # Refund the old amount and charge the new one in one transaction,
+        # so an insufficient balance rolls the refund back as well
+        try:
+            with transaction.atomic():
+                if old_balance and old_balance.status == 'active':
+                    credit(old_balance, old_amount)
+                debit(new_balance, amount_decimal)
+                
+                # Update expense item
+                expense_item.expense_name = expense_name
+                expense_item.amount = amount_decimal
+                expense_item.user_balance = new_balance
+                expense_item.payment_method = new_balance.income_method
+                expense_item.notes = notes if notes else None
+                expense_item.save()
+        except InsufficientBalance as e:
+            return JsonResponse({'success': False, 'message': str(e)})
         
         return JsonResponse({
             'success': True,
@@ -1047,6 +807,60 @@ def get_expense_item(request, item_id):
         return JsonResponse({'success': False, 'message': 'Expense item not found'})
     except Exception as e:
         return JsonResponse({'success': False, 'message': 'An error occurred'})
+
+
+# ============================================
+# Import Expense Items (CSV / JSON)
+# ============================================
+@login_required(login_url='/401/')
+def import_expense_items(request, block_id):
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'message': 'Invalid request method', 'type': 'error'})
+    
+    if not is_ajax(request):
+        return JsonResponse({'success': False, 'message': 'Invalid request', 'type': 'error'})
+    
+    expense_block = get_object_or_404(ExpenseBlock, id=block_id, user=request.user)
+    upload = request.FILES.get('file')
+    balance_id = request.POST.get('balance_id', '').strip()
+    
+    if not upload:
+        return JsonResponse({'success': False, 'message': 'Please choose a CSV or JSON file', 'type': 'error'})
+    
+    # Default account for rows without an account column
+    default_balance = None
+    if balance_id:
+        if not balance_id.isdigit():
+            return JsonResponse({'success': False, 'message': 'Selected account not found or inactive', 'type': 'error'})
+        default_balance = UserBalance.objects.filter(id=balance_id, user=request.user, status='active').first()
+        if default_balance is None:
+            return JsonResponse({'success': False, 'message': 'Selected account not found or inactive', 'type': 'error'})
+    
+    try:
+        content = upload.read().decode('utf-8-sig')
+    except UnicodeDecodeError:
+        return JsonResponse({'success': False, 'message': 'File must be UTF-8 encoded', 'type': 'error'})
+    
+    try:
+        rows = parse_expense_file(content, detect_format(upload.name, upload.content_type))
+        imported, total = import_expenses(expense_block, rows, default_balance)
+    except ExpenseImportError as e:
+        return JsonResponse({'success': False, 'message': str(e), 'errors': e.errors[:50], 'type': 'error'})
+    except InsufficientBalance as e:
+        return JsonResponse({'success': False, 'message': str(e), 'type': 'error'})
+    except Exception as e:
+        return JsonResponse({'success': False, 'message': 'An error occurred. Please try again.', 'type': 'error'})
+    
+    return JsonResponse({
+        'success': True,
+        'message': f'Imported {imported} expense{"s" if imported != 1 else ""} (Rs. {total})',
+        'type': 'success',
+        'imported': imported,
+        'block_total': str(expense_block.total_expense),
+        'item_count': expense_block.item_count
+    })
+
+
 # ============================================
 # Update Expense Block Title Only
 # ============================================
@@ -1108,16 +922,8 @@ def income_view(request):
     # Get all incomes for the user
     incomes_list = UserIncome.objects.filter(user=user).select_related('balance_account')
     
-    # Pagination - 50 items per page
-    paginator = Paginator(incomes_list, 50)
-    page = request.GET.get('page', 1)
-    
-    try:
-        incomes = paginator.page(page)
-    except PageNotAnInteger:
-        incomes = paginator.page(1)
-    except EmptyPage:
-        incomes = paginator.page(paginator.num_pages)
+    # Keyset pagination - 50 items per page
+    incomes = cursor_page(incomes_list, ('-created_at', '-id'), request.GET, per_page=50)
 
     # Get user's active balance accounts for the dropdown
     balance_accounts = UserBalance.objects.filter(user=user, status='active')
@@ -1179,18 +985,16 @@ def add_income(request):
         except UserBalance.DoesNotExist:
             return JsonResponse({'success': False, 'message': 'Selected account not found or inactive', 'type': 'error'})
 
-        # Create income
-        income = UserIncome.objects.create(
-            user=request.user,
-            income_source=income_source,
-            amount=amount_decimal,
-            balance_account=balance_account,
-            description=description
-        )
-
-        # Update balance account
-        balance_account.available_balance += amount_decimal
-        balance_account.save()
+        # Create income and credit the balance account together
+        with transaction.atomic():
+            income = UserIncome.objects.create(
+                user=request.user,
+                income_source=income_source,
+                amount=amount_decimal,
+                balance_account=balance_account,
+                description=description
+            )
+            credit(balance_account, amount_decimal)
 
         return JsonResponse({
             'success': True, 
@@ -1257,21 +1061,17 @@ def edit_income(request, income_id):
         except UserBalance.DoesNotExist:
             return JsonResponse({'success': False, 'message': 'Selected account not found or inactive', 'type': 'error'})
 
-        # Adjust balance accounts
-        # First, subtract old amount from old account
-        old_balance_account.available_balance -= old_amount
-        old_balance_account.save()
+        with transaction.atomic():
+            # Move the income from the old account to the new one
+            debit(old_balance_account, old_amount, allow_overdraft=True)
+            credit(new_balance_account, amount_decimal)
 
-        # Then, add new amount to new account
-        new_balance_account.available_balance += amount_decimal
-        new_balance_account.save()
-
-        # Update income
-        income.income_source = income_source
-        income.amount = amount_decimal
-        income.balance_account = new_balance_account
-        income.description = description
-        income.save()
+            # Update income
+            income.income_source = income_source
+            income.amount = amount_decimal
+            income.balance_account = new_balance_account
+            income.description = description
+            income.save()
 
         return JsonResponse({
             'success': True, 
@@ -1306,12 +1106,10 @@ def delete_income(request, income_id):
     try:
         income = get_object_or_404(UserIncome, id=income_id, user=request.user)
         
-        # Subtract amount from balance account
-        balance_account = income.balance_account
-        balance_account.available_balance -= income.amount
-        balance_account.save()
-        
-        income.delete()
+        # Subtract amount from balance account and delete together
+        with transaction.atomic():
+            debit(income.balance_account, income.amount, allow_overdraft=True)
+            income.delete()
 
         return JsonResponse({
             'success': True, 
@@ -1368,21 +1166,10 @@ def goals_view(request):
     first_letter = user.first_name[0].upper() if user.first_name else user.email[0].upper()
     full_name = f"{user.first_name} {user.last_name}".strip() or user.email.split('@')[0]
 
-    # Get all goals for the user with pagination
-    goals_list = UserGoal.objects.filter(user=user).prefetch_related('balance_accounts')
-    
-    # Update status for overdue goals
     today = date.today()
-    for goal in goals_list.filter(status__in=['new', 'running']):
-        if goal.deadline < today:
-            if goal.get_achievement_rate() >= 100:
-                goal.status = 'completed'
-            else:
-                goal.status = 'failed'
-            goal.save(update_fields=['status', 'updated_at'])
     
-    # Refresh queryset
-    goals_list = UserGoal.objects.filter(user=user).prefetch_related('balance_accounts')
+    # Get all goals for the user with progress annotated per row
+    goals_list = UserGoal.objects.filter(user=user).with_progress().prefetch_related('balance_accounts')
     
     # Pagination - 10 items per page
     paginator = Paginator(goals_list, 10)
@@ -1609,17 +1396,10 @@ def goal_detail_view(request, goal_id):
     first_letter = user.first_name[0].upper() if user.first_name else user.email[0].upper()
     full_name = f"{user.first_name} {user.last_name}".strip() or user.email.split('@')[0]
 
-    # Get the goal
-    goal = get_object_or_404(UserGoal, id=goal_id, user=user)
+    # Get the goal with income/expense totals annotated
+    goal = get_object_or_404(UserGoal.objects.with_progress(), id=goal_id, user=user)
     
-    # Update status if needed
     today = date.today()
-    if goal.status in ['new', 'running'] and goal.deadline < today:
-        if goal.get_achievement_rate() >= 100:
-            goal.status = 'completed'
-        else:
-            goal.status = 'failed'
-        goal.save(update_fields=['status', 'updated_at'])
     
     # Get income and expense data for the goal period
     total_income = goal.get_total_income()
@@ -1638,72 +1418,8 @@ def goal_detail_view(request, goal_id):
         success_rate = 0
         remaining_rate = 100
     
-    # Get daily data for charts (last 7 days or goal period, whichever is shorter)
-    chart_start = max(goal.start_date, today - timedelta(days=6))
-    chart_end = min(goal.deadline, today)
-    
-    daily_income_data = []
-    daily_expense_data = []
-    daily_labels = []
-    daily_savings_data = []
-    
-    current_date = chart_start
-    while current_date <= chart_end:
-        daily_labels.append(current_date.strftime('%b %d'))
-        
-        # Get daily income
-        day_income = UserIncome.objects.filter(
-            user=user,
-            balance_account__in=goal.balance_accounts.all(),
-            created_at__date=current_date
-        ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-        daily_income_data.append(float(day_income))
-        
-        # Get daily expense
-        day_expense = ExpenseItem.objects.filter(
-            expense_block__user=user,
-            user_balance__in=goal.balance_accounts.all(),
-            expense_date=current_date
-        ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-        daily_expense_data.append(float(day_expense))
-        
-        # Daily savings
-        daily_savings_data.append(float(day_income - day_expense))
-        
-        current_date += timedelta(days=1)
-    
-    # Cumulative data for progress chart
-    cumulative_savings = []
-    running_total = Decimal('0.00')
-    current_date = goal.start_date
-    cumulative_labels = []
-    target_line = []
-    
-    total_days = goal.total_days if goal.total_days > 0 else 1
-    daily_target = target / total_days
-    
-    while current_date <= min(goal.deadline, today):
-        cumulative_labels.append(current_date.strftime('%b %d'))
-        
-        day_income = UserIncome.objects.filter(
-            user=user,
-            balance_account__in=goal.balance_accounts.all(),
-            created_at__date=current_date
-        ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-        
-        day_expense = ExpenseItem.objects.filter(
-            expense_block__user=user,
-            user_balance__in=goal.balance_accounts.all(),
-            expense_date=current_date
-        ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-        
-        running_total += (day_income - day_expense)
-        cumulative_savings.append(float(running_total))
-        
-        days_from_start = (current_date - goal.start_date).days + 1
-        target_line.append(float(daily_target * days_from_start))
-        
-        current_date += timedelta(days=1)
+    # Daily and cumulative chart data (two grouped queries for the whole goal period)
+    chart_data = goal_chart_data(goal, today)
     
     # Selected accounts info
     selected_accounts = goal.balance_accounts.all()
@@ -1732,15 +1448,9 @@ def goal_detail_view(request, goal_id):
         'today_date': today,
         'selected_accounts': selected_accounts,
         'accounts_total_balance': float(accounts_total_balance),
-        # Chart data
-        'daily_labels': daily_labels,
-        'daily_income_data': daily_income_data,
-        'daily_expense_data': daily_expense_data,
-        'daily_savings_data': daily_savings_data,
-        'cumulative_labels': cumulative_labels,
-        'cumulative_savings': cumulative_savings,
-        'target_line': target_line,
     }
+    # Chart data
+    context.update(chart_data)
 
     return render(request, 'Goals/goal_detail.html', context)
 
@@ -1760,101 +1470,135 @@ def report_view(request):
     first_letter = user.first_name[0].upper() if user.first_name else user.email[0].upper()
     full_name = f"{user.first_name} {user.last_name}".strip() or user.email.split('@')[0]
 
-    # Get all expense blocks for the user
-    expense_blocks = ExpenseBlock.objects.filter(user=user).prefetch_related('items')
-    
-    # Check and close expired blocks
-    for block in expense_blocks.filter(status='active'):
-        block.check_and_close()
-    
-    # Refresh queryset
-    expense_blocks = ExpenseBlock.objects.filter(user=user).prefetch_related('items')
-    
-    # Prepare blocks data for JSON
-    import json
-    blocks_tree = []
-    all_expenses_list = []
-    
-    for block in expense_blocks:
-        days_list = []
-        current_date = block.start_date
-        while current_date <= block.end_date:
-            day_name = get_day_name(current_date)
-            day_expenses = block.items.filter(expense_date=current_date)
-            day_total = day_expenses.aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-            
-            days_list.append({
-                'name': day_name,
-                'display': day_name.capitalize(),
-                'date': current_date.strftime('%Y-%m-%d'),
-                'date_display': current_date.strftime('%b %d, %Y'),
-                'expense_count': day_expenses.count(),
-                'total': float(day_total),
-            })
-            current_date += timedelta(days=1)
-        
-        blocks_tree.append({
-            'id': block.id,
-            'title': block.title,
-            'expense_type': block.expense_type,
-            'expense_type_display': block.get_expense_type_display(),
-            'status': block.status,
-            'status_display': block.get_status_display(),
-            'start_date': block.start_date.strftime('%b %d'),
-            'end_date': block.end_date.strftime('%b %d, %Y'),
-            'total_expense': float(block.total_expense),
-            'item_count': block.item_count,
-            'days': days_list,
-        })
-    
-    # Get all expense items for JSON
-    all_items = ExpenseItem.objects.filter(expense_block__user=user).select_related('expense_block', 'user_balance')
-    
-    for item in all_items:
-        all_expenses_list.append({
-            'id': item.id,
-            'block_id': item.expense_block.id,
-            'block_title': item.expense_block.title,
-            'expense_name': item.expense_name,
-            'amount': float(item.amount),
-            'account_name': item.account_name,
-            'payment_method': item.get_payment_method_display(),
-            'expense_day': item.expense_day,
-            'expense_day_display': item.expense_day.capitalize(),
-            'expense_date': item.expense_date.strftime('%Y-%m-%d'),
-            'expense_date_display': item.expense_date.strftime('%b %d, %Y'),
-            'notes': item.notes or '',
-            'created_at': item.created_at.strftime('%I:%M %p'),
-        })
-    
-    # Stats
-    total_expenses = expense_blocks.aggregate(total=Sum('total_expense'))['total'] or Decimal('0.00')
-    total_items = ExpenseItem.objects.filter(expense_block__user=user).count()
-    active_blocks = expense_blocks.filter(status='active').count()
-    closed_blocks = expense_blocks.filter(status='closed').count()
-    
-    # Weekly vs Monthly counts
-    weekly_blocks = expense_blocks.filter(expense_type='weekly').count()
-    monthly_blocks = expense_blocks.filter(expense_type='monthly').count()
+    # Stats (the tree and expense rows are loaded on demand by the report API)
+    stats = ExpenseBlock.objects.filter(user=user).aggregate(
+        total_expenses=Sum('total_expense'),
+        total_items=Sum('item_count'),
+        active_blocks=Count('id', filter=Q(status='active')),
+        closed_blocks=Count('id', filter=Q(status='closed')),
+        weekly_blocks=Count('id', filter=Q(expense_type='weekly')),
+        monthly_blocks=Count('id', filter=Q(expense_type='monthly')),
+    )
 
     context = {
         'user': user,
         'profile': profile,
         'first_letter': first_letter,
         'full_name': full_name,
-        'total_expenses': total_expenses,
-        'total_items': total_items,
-        'active_blocks': active_blocks,
-        'closed_blocks': closed_blocks,
-        'weekly_blocks': weekly_blocks,
-        'monthly_blocks': monthly_blocks,
-        'blocks_tree_json': json.dumps(blocks_tree),
-        'all_expenses_json': json.dumps(all_expenses_list),
+        'total_expenses': stats['total_expenses'] or Decimal('0.00'),
+        'total_items': stats['total_items'] or 0,
+        'active_blocks': stats['active_blocks'],
+        'closed_blocks': stats['closed_blocks'],
+        'weekly_blocks': stats['weekly_blocks'],
+        'monthly_blocks': stats['monthly_blocks'],
     }
 
     return render(request, 'Report/report.html', context)
 
 
+# ============================================
+# Report API (AJAX, cursor paginated)
+# ============================================
+REPORT_PAGE_SIZE = 50
+
+
+@login_required(login_url='/401/')
+def report_blocks_api(request):
+    """Expense blocks for the report tree (summary only, no days)"""
+    if not is_ajax(request):
+        return JsonResponse({'success': False, 'message': 'Invalid request'})
+
+    limit = parse_limit(request.GET.get('limit'), default=REPORT_PAGE_SIZE)
+    try:
+        blocks, next_cursor = keyset_page(
+            ExpenseBlock.objects.filter(user=request.user),
+            ('-start_date', '-created_at', '-id'),
+            cursor=request.GET.get('cursor'),
+            limit=limit
+        )
+    except InvalidCursor as e:
+        return JsonResponse({'success': False, 'message': str(e), 'type': 'error'})
+
+    return JsonResponse({
+        'success': True,
+        'blocks': [serialize_block(block) for block in blocks],
+        'next_cursor': next_cursor,
+        'has_more': next_cursor is not None,
+    })
+
+
+@login_required(login_url='/401/')
+def report_block_days_api(request, block_id):
+    """Per-day totals for one expense block"""
+    if not is_ajax(request):
+        return JsonResponse({'success': False, 'message': 'Invalid request'})
+
+    block = get_object_or_404(ExpenseBlock, id=block_id, user=request.user)
+    day_totals = get_block_day_totals(request.user, [block.id])
+
+    return JsonResponse({
+        'success': True,
+        'block_id': block.id,
+        'days': serialize_block_days(block, day_totals.get(block.id, {})),
+    })
+
+
+@login_required(login_url='/401/')
+def report_items_api(request, block_id):
+    """
+    Expense items of a block, optionally for one day (?date=YYYY-MM-DD).
+    The first page also carries the total and counts for the whole selection.
+    """
+    if not is_ajax(request):
+        return JsonResponse({'success': False, 'message': 'Invalid request'})
+
+    block = get_object_or_404(ExpenseBlock, id=block_id, user=request.user)
+    items = ExpenseItem.objects.filter(expense_block=block).select_related('user_balance')
+
+    day = request.GET.get('date')
+    if day:
+        try:
+            expense_date = datetime.strptime(day, '%Y-%m-%d').date()
+        except ValueError:
+            return JsonResponse({'success': False, 'message': 'Invalid date format', 'type': 'error'})
+        items = items.filter(expense_date=expense_date)
+
+    cursor = request.GET.get('cursor')
+    limit = parse_limit(request.GET.get('limit'), default=REPORT_PAGE_SIZE)
+    try:
+        page, next_cursor = keyset_page(
+            items,
+            ('expense_date', '-created_at', '-id'),
+            cursor=cursor,
+            limit=limit
+        )
+    except InvalidCursor as e:
+        return JsonResponse({'success': False, 'message': str(e), 'type': 'error'})
+
+    response = {
+        'success': True,
+        'block_id': block.id,
+        'block_title': block.title,
+        'items': [serialize_item(item) for item in page],
+        'next_cursor': next_cursor,
+        'has_more': next_cursor is not None,
+    }
+
+    if not cursor:
+        summary = items.aggregate(
+            total=Sum('amount'),
+            count=Count('id'),
+            days=Count('expense_date', distinct=True)
+        )
+        response['summary'] = {
+            'total': float(summary['total'] or Decimal('0.00')),
+            'count': summary['count'],
+            'days': summary['days'],
+        }
+
+    return JsonResponse(response)
+
+
 # ============================================
 # Get Day Expenses (AJAX)
 # ============================================
@@ -1968,16 +1712,8 @@ def keep_view(request):
     # Get all keeps for the user
     keeps_list = UserKeep.objects.filter(user=user)
     
-    # Pagination
-    page = request.GET.get('page', 1)
-    paginator = Paginator(keeps_list, 10)  # 10 items per page
-    
-    try:
-        keeps = paginator.page(page)
-    except PageNotAnInteger:
-        keeps = paginator.page(1)
-    except EmptyPage:
-        keeps = paginator.page(paginator.num_pages)
+    # Keyset pagination - 10 items per page
+    keeps = cursor_page(keeps_list, ('-created_at', '-id'), request.GET, per_page=10)
 
     context = {
         'user': user,
@@ -1985,7 +1721,6 @@ def keep_view(request):
         'first_letter': first_letter,
         'full_name': full_name,
         'keeps': keeps,
-        'paginator': paginator,
     }
 
     return render(request, 'Keep/keep.html', context)
@@ -2178,14 +1913,7 @@ def habits_view(request):
     first_letter = user.first_name[0].upper() if user.first_name else user.email[0].upper()
     full_name = f"{user.first_name} {user.last_name}".strip() or user.email.split('@')[0]
 
-    # Get all habit blocks for this user
-    habit_blocks = HabitBlock.objects.filter(user=user)
-    
-    # Check and close expired blocks
-    for block in habit_blocks.filter(status='active'):
-        block.check_and_close()
-    
-    # Refresh queryset after closing
+    # Get all habit blocks for this user (expired blocks are closed by close_expired)
     habit_blocks = HabitBlock.objects.filter(user=user)
     
     # Pagination
@@ -2290,32 +2018,16 @@ def create_habit_block(request):
         # Calculate end date (always Saturday)
         end_date = HabitBlock.calculate_end_date(today, starting_day)
         
-        # Create new habit block
-        block = HabitBlock.objects.create(
-            user=user,
-            title=title,
-            starting_day=starting_day,
-            start_date=today,
-            end_date=end_date
-        )
-        
-        # Create habit items and their checkins
-        week_days = block.get_week_days()
-        
-        for habit_name in cleaned_habits:
-            habit_item = HabitItem.objects.create(
-                habit_block=block,
-                habit_name=habit_name
+        # Create the block, its habits and their checkins in one transaction
+        with transaction.atomic():
+            block = HabitBlock.objects.create(
+                user=user,
+                title=title,
+                starting_day=starting_day,
+                start_date=today,
+                end_date=end_date
             )
-            
-            # Create checkin entries for each day
-            for day_info in week_days:
-                HabitCheckIn.objects.create(
-                    habit_item=habit_item,
-                    check_date=day_info['date'],
-                    day_name=day_info['name'],
-                    is_checked=False
-                )
+            block.create_habits(cleaned_habits)
         
         return JsonResponse({
             'success': True,
@@ -2341,9 +2053,6 @@ def habit_detail_view(request, block_id):
     # Get the habit block
     habit_block = get_object_or_404(HabitBlock, id=block_id, user=user)
     
-    # Check if block should be closed
-    habit_block.check_and_close()
-    
     # Get today's info
     today = date.today()
     today_day_name = get_day_name(today)
@@ -2351,45 +2060,43 @@ def habit_detail_view(request, block_id):
     # Get week days for the block
     week_days = habit_block.get_week_days()
     
-    # Get all habits with their checkins
-    habits = habit_block.habits.all()
+    # All habits with their (sparse, checked-only) checkins prefetched (2 queries);
+    # counts come from the counters
+    habits = habit_block.habits.prefetch_related(
+        Prefetch('checkins', queryset=HabitCheckIn.objects.filter(is_checked=True))
+    )
+    total_days = habit_block.get_days_to_date(today)
     
-    # Build habit data with checkins for each day
+    # Build habit data with checkins for each day, in memory
     habits_data = []
     for habit in habits:
+        checkins_by_date = {checkin.check_date: checkin for checkin in habit.checkins.all()}
+        
         habit_info = {
             'id': habit.id,
             'name': habit.habit_name,
             'checkins': {},
-            'completion_count': habit.get_completion_count(),
-            'total_days': habit.get_total_days(),
+            'completion_count': habit.checked_count,
+            'total_days': total_days,
         }
         
         for day_info in week_days:
-            checkin = habit.checkins.filter(check_date=day_info['date']).first()
-            if checkin:
-                habit_info['checkins'][day_info['name']] = {
-                    'id': checkin.id,
-                    'is_checked': checkin.is_checked,
-                    'can_check': day_info['is_today'] and not checkin.is_checked and habit_block.is_active,
-                    'is_past': day_info['is_past'],
-                    'is_future': day_info['is_future'],
-                    'is_today': day_info['is_today'],
-                }
-            else:
-                habit_info['checkins'][day_info['name']] = {
-                    'id': None,
-                    'is_checked': False,
-                    'can_check': False,
-                    'is_past': day_info['is_past'],
-                    'is_future': day_info['is_future'],
-                    'is_today': day_info['is_today'],
-                }
+            # Only checked days are stored; a missing row means unchecked
+            checkin = checkins_by_date.get(day_info['date'])
+            is_checked = checkin is not None
+            habit_info['checkins'][day_info['name']] = {
+                'id': checkin.id if checkin else None,
+                'is_checked': is_checked,
+                'can_check': day_info['is_today'] and not is_checked and habit_block.is_active,
+                'is_past': day_info['is_past'],
+                'is_future': day_info['is_future'],
+                'is_today': day_info['is_today'],
+            }
         
         habits_data.append(habit_info)
     
     # Calculate completion rate
-    completion_rate = habit_block.get_completion_rate()
+    completion_rate = habit_block.get_completion_rate(today)
 
     context = {
         'user': user,
@@ -2411,7 +2118,7 @@ def habit_detail_view(request, block_id):
 # Check Habit (Toggle Check-in)
 # ============================================
 @login_required(login_url='/401/')
-def check_habit(request, block_id, checkin_id):
+def check_habit(request, block_id, habit_id):
     if request.method != 'POST':
         return JsonResponse({'success': False, 'message': 'Invalid request method'})
     
@@ -2426,28 +2133,24 @@ def check_habit(request, block_id, checkin_id):
         if habit_block.status == 'closed':
             return JsonResponse({'success': False, 'message': 'This habit block is closed'})
         
-        # Get the checkin
-        checkin = get_object_or_404(HabitCheckIn, id=checkin_id, habit_item__habit_block=habit_block)
+        # Get the habit
+        habit_item = get_object_or_404(HabitItem, id=habit_id, habit_block=habit_block)
+        habit_item.habit_block = habit_block
         
-        # Check if it's already checked (can't uncheck)
-        if checkin.is_checked:
-            return JsonResponse({'success': False, 'message': 'Already checked. Cannot uncheck.'})
-        
-        # Check if it's for today only
+        # Habits can only be checked for today, within the block
         today = date.today()
-        if checkin.check_date != today:
+        if not (habit_block.start_date <= today <= habit_block.end_date):
             return JsonResponse({'success': False, 'message': 'You can only check habits for today'})
         
-        # Check the habit
-        checkin.is_checked = True
-        checkin.checked_at = timezone.now()
-        checkin.save()
+        # Store today's check-in (counters are bumped in the same transaction)
+        checkin = habit_item.check_in(today)
+        if checkin is None:
+            return JsonResponse({'success': False, 'message': 'Already checked. Cannot uncheck.'})
         
-        # Get updated stats
-        habit_item = checkin.habit_item
+        # Updated stats from the counters
         completion_count = habit_item.get_completion_count()
-        total_days = habit_item.get_total_days()
-        block_completion_rate = habit_block.get_completion_rate()
+        total_days = habit_item.get_total_days(today)
+        block_completion_rate = habit_item.habit_block.get_completion_rate(today)
         
         return JsonResponse({
             'success': True,
@@ -2459,12 +2162,35 @@ def check_habit(request, block_id, checkin_id):
             'block_completion_rate': block_completion_rate,
         })
     
-    except HabitCheckIn.DoesNotExist:
-        return JsonResponse({'success': False, 'message': 'Check-in not found'})
+    except HabitItem.DoesNotExist:
+        return JsonResponse({'success': False, 'message': 'Habit not found'})
     except Exception as e:
         return JsonResponse({'success': False, 'message': f'An error occurred: {str(e)}'})
 
 
+# ============================================
+# Habit Analytics (AJAX)
+# ============================================
+@login_required(login_url='/401/')
+def habit_analytics(request):
+    if not is_ajax(request):
+        return JsonResponse({'success': False, 'message': 'Invalid request'})
+    
+    habit_name = request.GET.get('name', '').strip()
+    
+    # Without a name, list the habits that can be analysed
+    if not habit_name:
+        return JsonResponse({'success': True, 'habit_names': get_habit_names(request.user)})
+    
+    weeks = parse_limit(request.GET.get('weeks'), default=12, maximum=104)
+    analytics = get_habit_analytics(request.user, habit_name, weeks=weeks)
+    
+    if analytics is None:
+        return JsonResponse({'success': False, 'message': 'Habit not found'})
+    
+    return JsonResponse({'success': True, **analytics})
+
+
 # ============================================
 # Update Habit Block Title
 # ============================================
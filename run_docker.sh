@@ -9,6 +9,33 @@ docker build -t exptrac .
 # Run container in detached mode
 docker run -d --name exptrac_app --network host exptrac
 
-# Run migrations once inside container
-docker exec exptrac_app python manage.py makemigrations
-docker exec exptrac_app python manage.py migrate
+# Run migrations once inside container (migrations are tracked in the repo;
+# --fake-initial adopts tables created by earlier deploy-time makemigrations)
+docker exec exptrac_app python manage.py migrate --fake-initial
+
+# Backup / restore jobs run inside the app process: those of the replaced
+# container died with it (the backup page also fails jobs whose heartbeat is older than BACKUP_JOB_TIMEOUT)
+docker exec exptrac_app python manage.py fail_stale_backup_jobs --timeout 0
+
+# Backfill / repair the daily ledger rollups (safe while serving: each user is
+# rebuilt under the same row lock the app takes for rollup deltas)
+docker exec exptrac_app python manage.py rebuild_rollups
+
+# Backfill / repair stored expense block totals and item counts
+docker exec exptrac_app python manage.py verify_block_totals --repair
+
+# Backfill / repair habit completion counters
+docker exec exptrac_app python manage.py rebuild_habit_counters
+
+# Drop unchecked habit check-in rows (check-ins are stored sparsely)
+docker exec exptrac_app python manage.py compact_habit_checkins
+
+# Close expired blocks and finalize overdue goals now (the app then runs this
+# every EXPIRY_RUNNER_INTERVAL seconds)
+docker exec exptrac_app python manage.py close_expired
+
+# Drop login attempts past LOGIN_ATTEMPT_RETENTION_DAYS (schedule daily; see also partition_login_attempts)
+docker exec exptrac_app python manage.py prune_login_attempts
+
+# Backfill avatar variants for profile images uploaded before they existed
+docker exec exptrac_app python manage.py generate_profile_images